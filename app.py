@@ -4,7 +4,8 @@ Investo Web Application
 Flask web application for Railway deployment with welcome page and stock analysis.
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, stream_with_context, send_file
+from werkzeug.security import safe_join
 import os
 import sys
 from pathlib import Path
@@ -18,6 +19,7 @@ app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'dev-secret-key-change-in-pr
 # Register feedback blueprint
 from core.feedback_handler import feedback_bp
 app.register_blueprint(feedback_bp)
+from utils.helpers import is_valid_ticker, normalize_ticker
 
 
 # Add CORS headers to all responses
@@ -39,6 +41,9 @@ except Exception as e:
 # Try to load configuration, but don't fail if it's not available
 config = {}
 create_combined_report = None
+stream_combined_report = None
+report_encodings = []
+job_queue = None
 
 print("=" * 60)
 print("Initializing Investo Flask App...")
@@ -57,8 +62,9 @@ except Exception as e:
 
 try:
     from core.finnhub_api import set_api_key
-    if config.get('FINNHUB_API_KEY'):
-        set_api_key(config['FINNHUB_API_KEY'])
+    finnhub_keys = config.get('FINNHUB_API_KEYS') or config.get('FINNHUB_API_KEY')
+    if finnhub_keys:
+        set_api_key(finnhub_keys)
         print("✓ Finnhub API key configured")
     else:
         print("✗ Warning: FINNHUB_API_KEY not found in config")
@@ -68,13 +74,22 @@ except Exception as e:
     traceback.print_exc()
 
 try:
-    from reports.combined_report_generator import create_combined_report
+    from reports.combined_report_generator import create_combined_report, stream_combined_report
+    from reports.combined_report_generator import REPORT_ENCODINGS as report_encodings
     print("✓ Report generator imported successfully")
 except Exception as e:
     print(f"✗ ERROR: Could not import report generator: {e}")
     import traceback
     traceback.print_exc()
     create_combined_report = None
+    stream_combined_report = None
+
+try:
+    from utils.job_queue import job_queue
+    print("✓ Background job queue ready")
+except Exception as e:
+    print(f"✗ Warning: Could not start job queue: {e}")
+    job_queue = None
 
 print("=" * 60)
 if create_combined_report:
@@ -131,6 +146,14 @@ def health_check():
     """Health check endpoint for Railway"""
     return {"status": "ok"}, 200
 
+def quota_info():
+    """Shared upstream quota usage, or an error note if unavailable"""
+    try:
+        from utils.quota_manager import quota_manager
+        return quota_manager.get_info()
+    except Exception as e:
+        return {"error": str(e)}
+
 @app.route('/status')
 def status_check():
     """Diagnostic endpoint to check system status"""
@@ -145,6 +168,7 @@ def status_check():
             "REDDIT_CLIENT_SECRET": "set" if os.getenv("REDDIT_CLIENT_SECRET") else "missing",
             "REDDIT_USER_AGENT": "set" if os.getenv("REDDIT_USER_AGENT") else "missing",
         },
+        "upstream_quotas": quota_info(),
         "optional_features": {
             "feedback_email": "enabled" if os.getenv("GMAIL_APP_PASSWORD") else "disabled (saves to file only)",
             "flask_sessions": "enabled" if os.getenv("FLASK_SECRET_KEY") else "using default key"
@@ -264,19 +288,33 @@ def analyze_stock():
             print("ERROR: No JSON data received")
             return jsonify({'error': 'Invalid request. Please send JSON data.'}), 400
             
-        symbol = data.get('symbol', '').upper().strip()
+        symbol = normalize_ticker(str(data.get('symbol') or ''))
         print(f"Analyzing symbol: {symbol}")
         
         if not symbol:
             return jsonify({'error': 'Please enter a valid ticker symbol'}), 400
             
-        if len(symbol) > 10:
-            return jsonify({'error': 'Ticker symbol seems too long. Please enter a valid ticker (e.g., TSLA, AAPL).'}), 400
+        if not is_valid_ticker(symbol):
+            return jsonify({'error': 'Invalid ticker symbol. Please enter a valid ticker (e.g., TSLA, AAPL).'}), 400
         
+        force_refresh = bool(data.get('force_refresh'))
+
+        # Job mode: queue the analysis and let the client poll /jobs/<id>
+        if data.get('mode') == 'job' and create_combined_report is not None and job_queue is not None:
+            job = job_queue.submit('analyze', symbol, create_combined_report, symbol,
+                                   force_refresh=force_refresh)
+            return jsonify({
+                'success': True,
+                'message': f'Analysis queued for {symbol}.',
+                'symbol': symbol,
+                'job_id': job['id'],
+                'status_url': url_for('job_status', job_id=job['id'])
+            }), 202
+
         # Try to run full analysis if available
         if create_combined_report is not None:
             try:
-                report_path = create_combined_report(symbol)
+                report_path = create_combined_report(symbol, force_refresh=force_refresh)
                 if report_path:
                     return jsonify({
                         'success': True,
@@ -309,18 +347,124 @@ def analyze_stock():
         traceback.print_exc()
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
+@app.route('/screen')
+def screen_universe():
+    """Rank a universe on the Graham and Lynch tests from cached fundamentals (JSON)"""
+    try:
+        from config.settings import SCREEN_PAGE_SIZE
+        from core.screener import screen, load_universe, list_universes, parse_symbols, parse_filters
+    except Exception as e:
+        print(f"Screener not available: {e}")
+        return jsonify({'error': 'Screener is not available'}), 503
+
+    args = request.args.to_dict()
+    universe = args.pop('universe', 'dow30')
+    custom = args.pop('symbols', None)
+    sort = args.pop('sort', 'rank')
+    descending = args.pop('order', 'desc').lower() != 'asc'
+    try:
+        page = int(args.pop('page', 1))
+        page_size = int(args.pop('page_size', SCREEN_PAGE_SIZE))
+        symbols = parse_symbols(custom) if custom else load_universe(universe)
+        result = screen(symbols, parse_filters(args), sort, descending, page, page_size)
+    except KeyError:
+        return jsonify({'error': f'Unknown universe: {universe}', 'universes': list_universes()}), 404
+    except ValueError as e:
+        return jsonify({'error': f'Invalid screen: {e}'}), 400
+    result['universe'] = 'custom' if custom else universe
+    return jsonify(result), 200
+
+def job_payload(job):
+    """Public view of a job record"""
+    payload = {
+        'job_id': job['id'],
+        'symbol': job['job_key'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'progress': job['progress'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at'],
+    }
+    if job['status'] == 'done' and job['result']:
+        payload['report_path'] = job['result']
+        payload['report_url'] = url_for('serve_report', filename=Path(job['result']).name)
+    return payload
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report stage progress of a background analysis job"""
+    if job_queue is None:
+        return jsonify({'error': 'Job queue is not available'}), 503
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_payload(job)), 200
+
+@app.route('/jobs/<job_id>/report')
+def job_report(job_id):
+    """Redirect to the report of a finished job"""
+    if job_queue is None:
+        return jsonify({'error': 'Job queue is not available'}), 503
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    payload = job_payload(job)
+    if 'report_url' not in payload:
+        return jsonify(payload), 409
+    return redirect(payload['report_url'])
+
+@app.route('/report/stream/<symbol>')
+def stream_report(symbol):
+    """Stream a report for symbol: the page head at once, the analysis as it is rendered"""
+    symbol = normalize_ticker(symbol)
+    if not is_valid_ticker(symbol):
+        return "Invalid ticker symbol", 400
+    if stream_combined_report is None:
+        return "Report generator is not available", 503
+
+    save = request.args.get('save', '1') != '0'
+    force_refresh = request.args.get('refresh') == '1'
+    try:
+        chunks = stream_combined_report(symbol, save=save, force_refresh=force_refresh)
+    except Exception as e:
+        print(f"Streaming report failed for {symbol}: {e}")
+        import traceback
+        traceback.print_exc()
+        return f"Analysis failed: {e}", 500
+    return Response(stream_with_context(chunks), mimetype='text/html')
+
 @app.route('/report/<path:filename>')
 def serve_report(filename):
-    """Serve generated reports"""
+    """Serve a generated report file"""
+    if not filename.endswith('.html'):
+        return "Report not found", 404
+
     reports_dir = PROJECT_ROOT / "reports" / "generated"
-    file_path = reports_dir / filename
-    
-    if file_path.exists():
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        return content
-    else:
+    safe_path = safe_join(str(reports_dir), filename)
+    if safe_path is None or not Path(safe_path).is_file():
         return "Report not found", 404
+    file_path = Path(safe_path)
+
+    # Pick the best precompressed variant the client accepts and that is
+    # at least as new as the report itself
+    served_path, encoding = file_path, None
+    report_mtime = file_path.stat().st_mtime_ns
+    for suffix, name in report_encodings:
+        variant = file_path.with_name(file_path.name + suffix)
+        if request.accept_encodings[name] and variant.is_file() and variant.stat().st_mtime_ns >= report_mtime:
+            served_path, encoding = variant, name
+            break
+
+    # send_file hands the file to the server's zero-copy file wrapper and
+    # answers If-None-Match / If-Modified-Since with 304
+    response = send_file(served_path, mimetype='text/html', conditional=True,
+                         etag=True, last_modified=file_path.stat().st_mtime, max_age=0)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_cache = True
+    return response
 
 if __name__ == '__main__':
     # Create templates directory if it doesn't exist
@@ -0,0 +1,139 @@
+"""
+Throughput benchmark for get_stock_packages
+Compares the batch API against fetching the same sources one symbol at a time,
+for a range of batch pool sizes. Runs against Yahoo Finance by default;
+--simulate swaps yfinance for a latency model so it runs offline.
+
+    python benchmark_stock_packages.py dow30
+    python benchmark_stock_packages.py --simulate --synthetic 500 --workers 4 8 16 24
+"""
+
+import argparse
+import importlib
+import io
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import redirect_stdout
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import core.data_sources as data_sources
+from core.screener import load_universe
+from core.ticker_context import TickerContext
+from utils.cache_manager import CacheManager
+
+SOURCES = {"fundamentals", "chart_data"}   # What get_stock_packages fetches by default
+
+# utils re-exports the cached() decorator under the submodule's name
+cached_module = importlib.import_module("utils.cached")
+
+
+class LatencyModel:
+    """Stand-in for yfinance: sleeps like one Yahoo request per resource and symbol"""
+
+    def __init__(self, info, statement, history):
+        self.info, self.statement, self.history = info, statement, history
+
+    def frame(self, index=None):
+        index = index if index is not None else pd.bdate_range(end="2025-01-31", periods=252)
+        prices = np.linspace(100, 120, len(index))
+        return pd.DataFrame({"Open": prices, "High": prices + 1, "Low": prices - 1,
+                             "Close": prices, "Volume": 1_000_000}, index=index)
+
+    def ticker(self, symbol):
+        model = self
+
+        class Ticker:
+            @property
+            def info(self):
+                time.sleep(model.info)
+                return {"shortName": symbol, "currentPrice": 110.0, "trailingPE": 14.0, "marketCap": 5e9}
+
+            @property
+            def balance_sheet(self):
+                time.sleep(model.statement)
+                return pd.DataFrame()
+
+            def history(self, period="1y"):
+                time.sleep(model.history)
+                return model.frame()
+
+        return Ticker()
+
+    def download(self, symbols, threads=True, **kwargs):
+        # yfinance downloads each symbol separately on `threads` threads
+        # (cpu_count() * 2 when threads=True)
+        import os
+        workers = threads if threads is not True else (os.cpu_count() or 1) * 2
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(symbols)))) as pool:
+            list(pool.map(lambda _: time.sleep(self.history), symbols))
+        frame = self.frame()
+        return pd.concat({s: frame for s in symbols}, axis=1)
+
+    def install(self):
+        yf.Ticker = self.ticker
+        yf.download = self.download
+        yf.Tickers = lambda names: type("Tickers", (), {"tickers": {s: self.ticker(s) for s in names.split()}})()
+
+
+def fresh_cache():
+    """Point the fetcher cache at an empty directory so every run hits the upstream"""
+    cached_module.default_cache = CacheManager(cache_dir=Path(tempfile.mkdtemp(prefix="investo-bench-")))
+
+
+def run_loop(symbols):
+    """The same sources fetched one symbol at a time, as a loop over get_stock_package would"""
+    fresh_cache()
+    started = time.monotonic()
+    for symbol in symbols:
+        futures = data_sources._submit_package(symbol, TickerContext(symbol), SOURCES)
+        wait(futures.values())
+    return time.monotonic() - started
+
+
+def run_batch(symbols, workers):
+    fresh_cache()
+    data_sources._batch_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="investo-batch")
+    data_sources.BATCH_FETCH_WORKERS = workers
+    started = time.monotonic()
+    packages = data_sources.get_stock_packages(symbols)
+    elapsed = time.monotonic() - started
+    data_sources._batch_executor.shutdown()
+    missing = sum(1 for p in packages.values() if not p.get("price") or not p.get("chart_data"))
+    return elapsed, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark get_stock_packages against a per-symbol loop")
+    parser.add_argument("universe", nargs="?", default="dow30", help="Universe name from config/universes")
+    parser.add_argument("--synthetic", type=int, help="Use N made-up symbols instead of a universe (needs --simulate)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[data_sources.BATCH_FETCH_WORKERS])
+    parser.add_argument("--loop-sample", type=int, default=50,
+                        help="Symbols timed in the per-symbol loop; the loop scales linearly")
+    parser.add_argument("--simulate", action="store_true", help="Use the latency model instead of Yahoo")
+    parser.add_argument("--info-latency", type=float, default=0.35)
+    parser.add_argument("--statement-latency", type=float, default=0.35)
+    parser.add_argument("--history-latency", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if args.simulate:
+        LatencyModel(args.info_latency, args.statement_latency, args.history_latency).install()
+    symbols = [f"S{i:04d}" for i in range(args.synthetic)] if args.synthetic else load_universe(args.universe)
+
+    # The fetchers log every symbol; keep the report readable
+    quiet = redirect_stdout(io.StringIO())
+    sample = symbols[:args.loop_sample]
+    with quiet:
+        loop = run_loop(sample) * len(symbols) / len(sample)
+    print(f"{len(symbols)} symbols, per-symbol loop: {loop:.1f}s (from {len(sample)} symbols)")
+    for workers in args.workers:
+        with quiet:
+            elapsed, missing = run_batch(symbols, workers)
+        print(f"  batch, {workers:>3} workers: {elapsed:7.1f}s  {loop / elapsed:5.1f}x  incomplete: {missing}")
+
+
+if __name__ == "__main__":
+    main()
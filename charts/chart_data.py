@@ -4,27 +4,31 @@ Chart Data Module
 Handles fetching and processing stock chart data from various APIs.
 """
 
-import yfinance as yf
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
+from core.ticker_context import TickerContext, ticker_context
+from utils.cached import cached
 
-def get_chart_data(symbol: str, period: str = "1y") -> Optional[Dict]:
+@cached("chart", is_valid=lambda chart: chart is not None)
+def get_chart_data(symbol: str, period: str = "1y", ctx: Optional[TickerContext] = None) -> Optional[Dict]:
     """
     Get historical stock price data for charting.
     
     Args:
         symbol (str): Stock symbol (e.g., 'AAPL')
         period (str): Period for historical data ('1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max')
+        ctx (TickerContext): Optional shared context so the history is downloaded once per analysis
     
     Returns:
         dict: Chart data with dates, prices, volumes, highs, and lows
         None: If data cannot be fetched
+
+    Results are cached (stale-while-revalidate) for about a minute.
     """
     try:
         print(f"Fetching chart data for {symbol} (period: {period})...")
         
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period=period)
+        hist = ticker_context(symbol, ctx).history(period)
         
         if hist.empty:
             print(f"No historical data found for {symbol}")
@@ -62,21 +66,25 @@ def get_chart_data(symbol: str, period: str = "1y") -> Optional[Dict]:
         print(f"Error fetching chart data for {symbol}: {e}")
         return None
 
-def get_multiple_periods_data(symbol: str) -> Dict[str, Optional[Dict]]:
+def get_multiple_periods_data(symbol: str, ctx: Optional[TickerContext] = None) -> Dict[str, Optional[Dict]]:
     """
     Get chart data for multiple periods.
     
     Args:
         symbol (str): Stock symbol
+        ctx (TickerContext): Optional shared context
         
     Returns:
         dict: Chart data for different periods
     """
     periods = ['1mo', '3mo', '6mo', '1y', '2y', '5y']
     data = {}
+    ctx = ticker_context(symbol, ctx)
     
-    for period in periods:
-        data[period] = get_chart_data(symbol, period)
+    # Longest period first so the shorter ones are sliced from one download
+    for period in reversed(periods):
+        data[period] = get_chart_data(symbol, period, ctx=ctx)
+    data = {period: data[period] for period in periods}
         
     return data
 
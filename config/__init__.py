@@ -17,6 +17,7 @@ def load_config():
         "TELEGRAM_BOT_TOKEN": os.getenv("TELEGRAM_BOT_TOKEN"),
         "TELEGRAM_CHAT_ID": os.getenv("TELEGRAM_CHAT_ID"),
         "FINNHUB_API_KEY": os.getenv("FINNHUB_API_KEY"),
+        "FINNHUB_API_KEYS": [k.strip() for k in os.getenv("FINNHUB_API_KEYS", "").split(",") if k.strip()],
         "REDDIT_CLIENT_ID": os.getenv("REDDIT_CLIENT_ID"),
         "REDDIT_CLIENT_SECRET": os.getenv("REDDIT_CLIENT_SECRET"),
         "REDDIT_USER_AGENT": os.getenv("REDDIT_USER_AGENT"),
@@ -13,17 +13,61 @@ REPORTS_DIR = PROJECT_ROOT / "reports"
 TELEGRAM_DIR = PROJECT_ROOT / "telegram"
 UTILS_DIR = PROJECT_ROOT / "utils"
 TESTS_DIR = PROJECT_ROOT / "tests"
+SYMBOL_MASTER_PATH = CONFIG_DIR / "symbols.txt"   # Known symbols for ticker extraction
 
 # API timeouts
 HTTP_TIMEOUT = 12
 REQUEST_TIMEOUT = 15
 
+# Shared HTTP client
+HTTP_POOL_CONNECTIONS = 10     # Number of per-host connection pools kept
+HTTP_POOL_MAXSIZE = 20         # Keep-alive connections per host
+HTTP_RETRIES = 2               # Retries for connection errors and 5xx on idempotent requests
+HTTP_BACKOFF = 0.5             # Exponential backoff factor between retries (seconds)
+
+# Upstream quotas: (requests allowed, per seconds), shared by all workers
+QUOTA_LIMITS = {
+    "finnhub": (60, 60),       # Finnhub free tier, per API key
+    "reddit": (100, 60),       # Reddit OAuth clients via praw
+    "stocktwits": (200, 3600), # Unauthenticated StockTwits streams
+}
+QUOTA_MAX_WAIT = 5             # Seconds a caller may queue for a token before giving up
+
+# Universe screener (/screen): runs on cached fundamentals only
+UNIVERSES_DIR = CONFIG_DIR / "universes"   # <name>.txt symbol lists, e.g. dow30.txt
+SCREEN_PAGE_SIZE = 25
+SCREEN_MAX_PAGE_SIZE = 200
+
+# Stock package fan-out
+PACKAGE_FETCH_WORKERS = 8      # Shared pool for concurrent upstream fetches
+PACKAGE_DEADLINE = 20          # Seconds allowed for a whole get_stock_package call
+BATCH_FETCH_WORKERS = 16       # get_stock_packages pool and yf.download threads, apart from /analyze's
+
+# Reddit stage fan-out
+REDDIT_FETCH_WORKERS = 6       # Concurrent Reddit searches and comment fetches
+REDDIT_DEADLINE = 12           # Seconds allowed for a whole Reddit sentiment summary
+REDDIT_COMMENT_BUDGET = 10     # Top-scored posts whose comments are fetched per summary (0 = none)
+REDDIT_COMMENTS_PER_POST = 3   # Top-level comments scored per fetched post
+REDDIT_COMMENT_WEIGHT = 0.25   # Share of a post's sentiment taken from its comments
+REDDIT_MIN_POST_SCORE = 5      # Posts with fewer upvotes are ignored by search and ingester alike
+REDDIT_POST_RETENTION_DAYS = 30 # Scored posts are kept this long in cache/reddit_posts.db
+REDDIT_DAILY_RETENTION_DAYS = 120 # Daily per-ticker mention series are kept this long
+REDDIT_CURSOR_OVERLAP_SECONDS = 6 * 3600 # Re-list this much before a cursor so young posts can qualify
+REDDIT_INGEST_CHECKPOINT_SECONDS = 60  # Streaming ingester writes cache/reddit_ingest.json this often
+REDDIT_INGEST_STALE_SECONDS = 600      # Older checkpoints mean the ingester is down; fall back to live search
+REDDIT_INGEST_PENDING_HOURS = 24       # Streamed posts below REDDIT_MIN_POST_SCORE are re-checked this long
+
 # Analysis settings
 TOP_N_TRENDING = 10
 MAX_NEWS_ITEMS = 5
 MAX_GLOBAL_NEWS = 6
 MAX_SENTIMENT_ITEMS = 100
 
+# Background jobs (/analyze job mode)
+JOB_WORKERS = 2                # Report builds running concurrently per web worker
+JOB_STALE_SECONDS = 600        # Active jobs silent for longer are reported as failed
+JOB_RETENTION_SECONDS = 86400  # Finished jobs are purged after a day
+
 # Token budget settings
 DEFAULT_BUDGET = 1000
 BUDGET_THRESHOLD_PERCENT = 10
@@ -32,9 +76,40 @@ BUDGET_THRESHOLD_PERCENT = 10
 TOKEN_DATA_PATH = os.path.expanduser("~/investment_news_bot/token_data.json")
 ENV_FILE_PATH = PROJECT_ROOT / ".env"
 
+# Cache settings
+CACHE_BACKEND = os.getenv("INVESTO_CACHE_BACKEND", "sqlite")  # "sqlite" (cache/cache.db) or "file"
+CACHE_MEMORY_BUDGET_BYTES = 32 * 1024 * 1024   # In-process LRU tier per worker
+CACHE_MAX_DISK_BYTES = 256 * 1024 * 1024       # Disk tier is trimmed back below this
+# Payload encoding per key namespace ("<namespace>:<rest>"); others use JSON.
+# msgpack and zstd are optional and fall back to pickle and zlib.
+CACHE_CODECS = {
+    "chart": "msgpack+zstd",   # Long numeric series
+    "stock": "pickle+zstd",
+    "news": "msgpack+zstd",
+    "sentiment": "msgpack+zstd",
+    "report": "json",
+}
+# Stale-while-revalidate policy per fetcher namespace: (fresh seconds, stale seconds).
+# Stale values are served instantly while a background refresh runs.
+CACHE_POLICIES = {
+    "stock": (6 * 3600, 18 * 3600),   # Fundamentals
+    "news": (10 * 60, 50 * 60),
+    "sentiment": (5 * 60, 25 * 60),
+    "chart": (60, 15 * 60),           # Prices
+}
+CACHE_LAST_GOOD_SECONDS = 7 * 24 * 3600  # Keep values this long past stale to cover upstream outages
+CACHE_REFRESH_WORKERS = 4
+
 # Report settings
 REPORT_TEMPLATES_DIR = REPORTS_DIR / "templates"
 GENERATED_REPORTS_DIR = REPORTS_DIR / "generated"
+REPORT_FRESHNESS_SECONDS = 900 # Reuse a symbol's report for this long unless force_refresh
+REPORT_PIPELINE_VERSION = "1"  # Bump to invalidate cached reports after analysis changes
+STREAM_CHUNK_SIZE = 16 * 1024  # Characters flushed per chunk when streaming a report
+# Re-check template files for changes on every render; off in production (Railway)
+TEMPLATE_AUTO_RELOAD = os.getenv(
+    "INVESTO_TEMPLATE_AUTO_RELOAD", "0" if os.getenv("RAILWAY_ENVIRONMENT") else "1"
+) == "1"
 
 # Logging settings
 LOG_LEVEL = "INFO"
@@ -5,40 +5,34 @@ Combines Yahoo Finance, Finnhub, StockTwits, and Reddit APIs
 to provide comprehensive stock data for analysis.
 """
 
+import time
+import pandas as pd
 import yfinance as yf
-import requests
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from config.settings import HTTP_TIMEOUT, MAX_NEWS_ITEMS, MAX_GLOBAL_NEWS, MAX_SENTIMENT_ITEMS
+from config.settings import (
+    MAX_NEWS_ITEMS, MAX_GLOBAL_NEWS, MAX_SENTIMENT_ITEMS,
+    PACKAGE_FETCH_WORKERS, PACKAGE_DEADLINE, BATCH_FETCH_WORKERS
+)
+from core.ticker_context import TickerContext, ticker_context
+from core.finnhub_api import finnhub_get, set_api_key as set_finnhub_api_key
+from utils.cached import cached
+from utils.http_client import http_client
+from utils.quota_manager import quota_manager, retry_after_seconds
+from utils.ticker_matcher import ticker_matcher
 
-# Global API key storage
-FINNHUB_API_KEY = None
+STOCKTWITS_STREAM_URL = "https://api.stocktwits.com/api/2/streams/symbol/{symbol}.json"
 
-def set_finnhub_api_key(key):
-    """Set the Finnhub API key"""
-    global FINNHUB_API_KEY
-    FINNHUB_API_KEY = key
+# Shared, bounded pool used to fan out the upstream calls of a stock package
+_fetch_executor = ThreadPoolExecutor(max_workers=PACKAGE_FETCH_WORKERS, thread_name_prefix="investo-fetch")
+# Batch packages (screens, cache warming) queue on their own pool, so a large
+# batch cannot hold up interactive single-symbol requests
+_batch_executor = ThreadPoolExecutor(max_workers=BATCH_FETCH_WORKERS, thread_name_prefix="investo-batch")
+PACKAGE_SOURCES = ("fundamentals", "news", "yahoo_news", "crowd", "chart_data")
 
-def finnhub_get(path, params):
-    """Make a request to Finnhub API"""
-    if not FINNHUB_API_KEY:
-        return None
-    try:
-        url = f"https://finnhub.io/api/v1/{path}"
-        p = dict(params or {})
-        p["token"] = FINNHUB_API_KEY
-        r = requests.get(url, params=p, timeout=HTTP_TIMEOUT)
-        if r.ok:
-            return r.json()
-    except Exception:
-        return None
-    return None
-
-def get_full_stock_data(symbol: str) -> dict:
-    """
-    Fetch all relevant stock data for a given symbol using yfinance.
-    Returns a dictionary with fields required for fundamental analysis models.
-    """
-    data = {
+def _empty_stock_data(symbol: str) -> dict:
+    """Return the fundamentals dictionary with every field unset"""
+    return {
         "symbol": symbol,
         "price": None,
         "shortName": None,
@@ -87,9 +81,22 @@ def get_full_stock_data(symbol: str) -> dict:
         # Graham Net-Net fields:
         "totalLiabilities": None
     }
+
+def _has_fundamentals(data: dict) -> bool:
+    return bool(data) and (data.get("price") is not None or data.get("shortName") is not None)
+
+@cached("stock", is_valid=_has_fundamentals)
+def get_full_stock_data(symbol: str, ctx: TickerContext = None) -> dict:
+    """
+    Fetch all relevant stock data for a given symbol using yfinance.
+    Returns a dictionary with fields required for fundamental analysis models.
+    Pass a TickerContext to share Yahoo requests with other fetchers.
+    Results are cached (stale-while-revalidate) for hours.
+    """
+    data = _empty_stock_data(symbol)
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
+        ctx = ticker_context(symbol, ctx)
+        info = ctx.info
 
         # Basic Info
         data["shortName"] = info.get("shortName")
@@ -152,7 +159,7 @@ def get_full_stock_data(symbol: str) -> dict:
         # Try to get from balance sheet if not in info
         if not data["totalCurrentAssets"] or not data["totalCurrentLiabilities"] or not data["totalLiabilities"]:
             try:
-                balance = ticker.balance_sheet
+                balance = ctx.balance_sheet
                 # Use the most recent column (0)
                 data["totalCurrentAssets"] = balance.loc["Total Current Assets"][0] if "Total Current Assets" in balance.index else data["totalCurrentAssets"]
                 data["totalCurrentLiabilities"] = balance.loc["Total Current Liabilities"][0] if "Total Current Liabilities" in balance.index else data["totalCurrentLiabilities"]
@@ -181,11 +188,10 @@ def get_company_news(symbol, days=7, max_items=MAX_NEWS_ITEMS):
         if len(out) >= max_items: break
     return out
 
-def get_yahoo_news(symbol, max_items=10):
+def get_yahoo_news(symbol, max_items=10, ctx=None):
     """Get latest news from Yahoo Finance for a stock"""
     try:
-        ticker = yf.Ticker(symbol)
-        news = ticker.news
+        news = ticker_context(symbol, ctx).news
         
         if not news or len(news) == 0:
             print(f"No Yahoo Finance news found for {symbol}")
@@ -298,16 +304,18 @@ def get_tradingview_news(symbol, max_items=10):
     print(f"TradingView news API not available (no public API)")
     return []
 
-def get_aggregated_news(symbol, max_items=3):
+@cached("news", is_valid=bool)
+def get_aggregated_news(symbol, max_items=3, ctx=None):
     """
     Aggregate news from multiple sources, remove duplicates, and return top 3 latest
+    Results are cached (stale-while-revalidate) for minutes.
     """
     print(f"Fetching aggregated news for {symbol} from multiple sources...")
     
     all_news = []
     
     # Fetch from all sources
-    yahoo_news = get_yahoo_news(symbol, max_items=10)
+    yahoo_news = get_yahoo_news(symbol, max_items=10, ctx=ctx)
     finnhub_news = get_finnhub_news(symbol, max_items=10)
     tradingview_news = get_tradingview_news(symbol, max_items=10)
     
@@ -351,6 +359,10 @@ def get_aggregated_news(symbol, max_items=3):
             if len(unique_news) >= max_items:
                 break
     
+    # Tag every headline with the tickers it mentions in one pass
+    for news_item, tickers in zip(unique_news, ticker_matcher.find_all(n['title'] for n in unique_news)):
+        news_item['tickers'] = sorted(tickers)
+
     print(f"Aggregated {len(unique_news)} unique news items from {len(all_news)} total articles")
     return unique_news
 
@@ -367,11 +379,14 @@ def get_global_news(max_items=MAX_GLOBAL_NEWS):
         if len(out) >= max_items: break
     return out
 
+@cached("sentiment", is_valid=lambda crowd: crowd["mentions"] > 0)
 def get_crowd_sentiment(symbol, max_items=MAX_SENTIMENT_ITEMS):
-    """Get crowd sentiment from StockTwits"""
+    """Get crowd sentiment from StockTwits (cached for minutes)"""
     try:
-        url = f"https://api.stocktwits.com/api/2/streams/symbol/{symbol}.json"
-        r = requests.get(url, timeout=HTTP_TIMEOUT)
+        quota_manager.acquire("stocktwits")
+        r = http_client.get(STOCKTWITS_STREAM_URL.format(symbol=symbol))
+        if r.status_code == 429:
+            quota_manager.penalize("stocktwits", retry_after=retry_after_seconds(r))
         if not r.ok: return {"mentions": 0, "bull": 0, "bear": 0}
         msgs = r.json().get("messages", [])[:max_items]
         bull = bear = 0
@@ -391,16 +406,137 @@ def get_historical_data(symbol, period="1y"):
     from charts.chart_data import get_chart_data
     return get_chart_data(symbol, period)
 
-def get_stock_package(symbol):
-    """Get complete stock data package including fundamentals, news, and sentiment"""
+# Empty values used when a package source fails, times out or is skipped
+PACKAGE_FALLBACKS = {
+    "news": list,
+    "yahoo_news": list,
+    "crowd": lambda: {"mentions": 0, "bull": 0, "bear": 0},
+    "chart_data": lambda: None,
+}
+
+def _submit_package(symbol, ctx, sources, executor=_fetch_executor):
+    """Submit the requested package sources for one symbol to a fetch pool"""
     from charts.chart_data import get_chart_data
-    d = get_full_stock_data(symbol)
-    d["news"] = get_company_news(symbol)  # Keep old Finnhub news for compatibility
-    d["yahoo_news"] = get_aggregated_news(symbol, max_items=3)  # Aggregated news from all sources
-    d["crowd"] = get_crowd_sentiment(symbol)
-    d["chart_data"] = get_chart_data(symbol, "1y")  # Default to 1 year
+
+    tasks = {
+        "fundamentals": lambda: executor.submit(get_full_stock_data, symbol, ctx=ctx),
+        "news": lambda: executor.submit(get_company_news, symbol),  # Keep old Finnhub news for compatibility
+        "yahoo_news": lambda: executor.submit(get_aggregated_news, symbol, max_items=3, ctx=ctx),  # Aggregated news from all sources
+        "crowd": lambda: executor.submit(get_crowd_sentiment, symbol),
+        "chart_data": lambda: executor.submit(get_chart_data, symbol, "1y", ctx=ctx),  # Default to 1 year
+    }
+    return {name: submit() for name, submit in tasks.items() if name in sources}
+
+def _collect_package(symbol, futures):
+    """Build a package from finished futures, falling back for the rest"""
+    results, timed_out = {}, []
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            timed_out.append(name)
+            continue
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            print(f"Error fetching {name} for {symbol}: {e}")
+
+    d = results.get("fundamentals") or _empty_stock_data(symbol)
+    for name, fallback in PACKAGE_FALLBACKS.items():
+        d[name] = results[name] if name in results else fallback()
+    d["timed_out"] = timed_out
     return d
 
+def get_stock_package(symbol, deadline=PACKAGE_DEADLINE):
+    """
+    Get complete stock data package including fundamentals, news, and sentiment.
+
+    All sources are fetched concurrently on the shared fetch pool, so the call
+    takes as long as the slowest source. Sources that have not finished within
+    ``deadline`` seconds fall back to their empty value and are listed under
+    the package's ``timed_out`` key. The Yahoo-backed sources share one
+    TickerContext, so info, news and history are each downloaded once.
+    """
+    started = time.monotonic()
+    futures = _submit_package(symbol, TickerContext(symbol), PACKAGE_SOURCES)
+    wait(futures.values(), timeout=deadline)
+    d = _collect_package(symbol, futures)
+
+    if d["timed_out"]:
+        print(f"Stock package for {symbol} hit the {deadline}s deadline; missing: {', '.join(d['timed_out'])}")
+    print(f"Stock package for {symbol} assembled in {time.monotonic() - started:.2f}s")
+    return d
+
+def _bulk_history(symbols, period):
+    """Download OHLCV for many symbols in one call, split per symbol"""
+    # yf.download still makes one request per symbol, on cpu_count() * 2
+    # threads by default; give it as many as the batch pool has
+    try:
+        frame = yf.download(symbols, period=period, group_by="ticker", auto_adjust=True,
+                            threads=BATCH_FETCH_WORKERS, progress=False)
+    except Exception as e:
+        print(f"Error bulk downloading history for {len(symbols)} symbols: {e}")
+        return {}
+    if frame is None or frame.empty:
+        return {}
+
+    history = {}
+    for symbol in symbols:
+        try:
+            hist = frame[symbol] if isinstance(frame.columns, pd.MultiIndex) else frame
+            hist = hist.dropna(subset=["Close"])
+        except KeyError:
+            continue
+        if not hist.empty:
+            history[symbol] = hist
+    return history
+
+def get_stock_packages(symbols, include_news=False, include_crowd=False, include_charts=True, deadline=None):
+    """
+    Get stock data packages for many symbols at once.
+
+    Price history for the whole list comes from a single ``yf.download`` call
+    (symbols it misses fetch their own) and all symbols share one
+    ``yf.Tickers`` session for their fundamentals, which are fetched
+    concurrently on the batch fetch pool while the history downloads.
+    Yahoo still serves fundamentals one symbol at a time, so throughput
+    scales with BATCH_FETCH_WORKERS. Returns a dict of
+    symbol -> package with the same shape as ``get_stock_package``. News and
+    StockTwits sentiment cost one request per symbol, so they are skipped
+    (left empty) unless asked for; ``include_charts=False`` skips the price
+    history too, for callers that only need fundamentals.
+    """
+    symbols = list(dict.fromkeys(s.upper().strip() for s in symbols if s and s.strip()))
+    if not symbols:
+        return {}
+
+    started = time.monotonic()
+    tickers = yf.Tickers(" ".join(symbols)).tickers
+
+    sources = {"fundamentals"}
+    if include_news:
+        sources |= {"news", "yahoo_news"}
+    if include_crowd:
+        sources.add("crowd")
+
+    # Everything but charts starts now and runs while any history downloads
+    contexts = {symbol: TickerContext(symbol, ticker=tickers.get(symbol)) for symbol in symbols}
+    futures = {symbol: _submit_package(symbol, ctx, sources, executor=_batch_executor)
+               for symbol, ctx in contexts.items()}
+    if include_charts:
+        history = _bulk_history(symbols, "1y")
+        for symbol, ctx in contexts.items():
+            # Seed the bulk download so charts skip the per-symbol fetch; symbols
+            # missing from it fall back to fetching their own history
+            if symbol in history:
+                ctx.prime(("history", "1y"), history[symbol])
+            futures[symbol].update(_submit_package(symbol, ctx, {"chart_data"}, executor=_batch_executor))
+
+    wait([f for fs in futures.values() for f in fs.values()], timeout=deadline)
+    packages = {symbol: _collect_package(symbol, fs) for symbol, fs in futures.items()}
+
+    print(f"Assembled {len(packages)} stock packages in {time.monotonic() - started:.2f}s")
+    return packages
+
 def get_top_volume_tickers(n=10):
     """Get top volume tickers from Yahoo Finance"""
     try:
@@ -410,7 +546,14 @@ def get_top_volume_tickers(n=10):
     except Exception:
         return []
 
-def get_most_mentioned_tickers(n=10):
-    """Get most mentioned tickers - simplified implementation"""
-    # In practice, this would analyze social media mentions
+def get_most_mentioned_tickers(n=10, days=1):
+    """Get the tickers most mentioned on Reddit over the last `days` days, from the streaming ingester"""
+    from core.reddit_ingester import ingested_aggregates
+
+    aggregates = ingested_aggregates()
+    if aggregates is not None:
+        top = aggregates.most_mentioned(n, days=days)
+        if top:
+            return [ticker for ticker, _ in top]
+    # Ingester not running: fall back to a fixed list of popular names
     return ["TSLA", "AAPL", "NVDA", "AMZN", "MSFT", "GOOGL", "META", "AMD", "NFLX", "INTC"][:n]
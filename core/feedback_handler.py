@@ -7,10 +7,10 @@ Also saves a local backup file for each submission.
 
 from flask import Blueprint, request, jsonify
 import os
-import requests
 from datetime import datetime
 from pathlib import Path
 import traceback
+from utils.http_client import http_client
 
 # Blueprint setup
 feedback_bp = Blueprint("feedback_bp", __name__)
@@ -63,7 +63,7 @@ def send_feedback_via_brevo(user: str, message: str) -> bool:
     }
 
     try:
-        response = requests.post(
+        response = http_client.post(
             "https://api.brevo.com/v3/smtp/email",
             headers={
                 "api-key": BREVO_API_KEY,
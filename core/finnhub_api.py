@@ -4,30 +4,45 @@ Finnhub API module
 Handles Finnhub API requests for financial data and news
 """
 
-import requests
 from datetime import datetime, timedelta
-from config.settings import HTTP_TIMEOUT, MAX_NEWS_ITEMS, MAX_GLOBAL_NEWS
+from config.settings import MAX_NEWS_ITEMS, MAX_GLOBAL_NEWS
+from utils.http_client import http_client
+from utils.quota_manager import quota_manager, QuotaExceeded, retry_after_seconds
 
-# Global API key storage
-FINNHUB_API_KEY = None
+FINNHUB_BASE_URL = "https://finnhub.io/api/v1"
 
 def set_api_key(key):
-    """Set the Finnhub API key"""
-    global FINNHUB_API_KEY
-    FINNHUB_API_KEY = key
+    """Set the Finnhub API key (or a list of keys to rotate across) on the shared HTTP client"""
+    http_client.set_api_key("finnhub", key)
 
-def finnhub_get(path, params):
-    """Make a request to Finnhub API"""
-    if not FINNHUB_API_KEY:
+def finnhub_get(path, params, attempts=2):
+    """
+    Make a request to Finnhub API.
+    Waits for quota before sending; on 429 the key is paused and the
+    request is retried with the next available key.
+    """
+    api_keys = http_client.get_api_keys("finnhub")
+    if not api_keys:
         return None
-    try:
-        url = f"https://finnhub.io/api/v1/{path}"
-        p = dict(params or {})
-        p["token"] = FINNHUB_API_KEY
-        r = requests.get(url, params=p, timeout=HTTP_TIMEOUT)
-        if r.ok:
-            return r.json()
-    except Exception:
+    url = f"{FINNHUB_BASE_URL}/{path}"
+    for _ in range(attempts):
+        try:
+            api_key = quota_manager.acquire("finnhub", api_keys)
+        except QuotaExceeded as e:
+            print(f"Finnhub request to {path} skipped: {e}")
+            return None
+        try:
+            p = dict(params or {})
+            p["token"] = api_key
+            r = http_client.get(url, params=p)
+            if r.status_code == 429:
+                print(f"Finnhub rate limited request to {path}")
+                quota_manager.penalize("finnhub", api_key, retry_after_seconds(r))
+                continue
+            if r.ok:
+                return r.json()
+        except Exception:
+            return None
         return None
     return None
 
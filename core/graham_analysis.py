@@ -6,79 +6,101 @@ Uses the same field names as Peter Lynch module for compatibility.
 Includes Net-Net (NCAV) calculation and a comment/explanation of its meaning.
 """
 
-import math
-
-def calc_pe(data):
-    return data.get("forwardPE") or data.get("trailingPE") or data.get("pe")
-
-def calc_pb(data):
-    return data.get("priceToBook")
-
-def calc_eps_growth_10y(data):
-    g = data.get("earningsQuarterlyGrowth") or data.get("epsGrowth")
-    return g * 100 if g is not None else None
-
-def calc_earnings_stability_10y(data):
-    eps = data.get("trailingEps") or data.get("eps")
-    g = data.get("earningsQuarterlyGrowth") or data.get("epsGrowth")
-    return (eps is not None and eps > 0) and (g is not None and g > 0)
-
-def calc_debt_to_equity(data):
-    return data.get("debtToEquity")
-
-def calc_current_ratio(data):
-    ca = data.get("totalCurrentAssets") or data.get("currentAssets")
-    cl = data.get("totalCurrentLiabilities") or data.get("currentLiabilities")
-    if ca and cl and cl > 0:
-        return ca / cl
-    return data.get("currentRatio")
-
-def calc_dividend_record_years(data):
-    dy = data.get("dividendYield")
-    return 20 if dy and dy > 0 else 0
-
-def calc_dividend_yield(data):
-    y = data.get("dividendYield")
-    return y if y else 0
-
-def calc_intrinsic_value(data):
-    eps = data.get("trailingEps") or data.get("eps") or 1
-    g = calc_eps_growth_10y(data)
-    g_val = g if g is not None else 4
+from typing import Union
+import numpy as np
+import pandas as pd
+from core.metric_frame import (
+    Columns, FrameLike, MetricSet, as_columns, first_truthy, masked, optional_bool, truthy
+)
+
+# Each metric declares the raw fields and metrics it reads; graham_metrics_frame()
+# evaluates each one once per snapshot, over whole columns (one row per ticker,
+# NaN for missing values). graham_metrics() computes the same metrics for one
+# ticker in plain Python, where NumPy's per-call overhead would dominate.
+graham = MetricSet(text_fields=("sector", "industry"))
+
+GRAHAM_METRICS = [
+    "P/E", "P/B", "EPS_Growth_10Y_%", "Earnings_Stability_10Y", "Debt/Equity", "Current_Ratio",
+    "Dividend_Record_Years", "Dividend_Yield_%", "Intrinsic_Value", "Margin_of_Safety_%", "Net_Net_Value",
+    "NetNet_Buy_Candidate", "NetNet_Comment", "Graham_Combined_Test", "Expected_Return_%",
+    "sector", "industry", "price", "marketCap",
+]
+
+@graham.metric("P/E", "forwardPE", "trailingPE", "pe")
+def calc_pe(forward_pe, trailing_pe, pe):
+    return first_truthy(forward_pe, trailing_pe, pe)
+
+@graham.metric("P/B", "priceToBook")
+def calc_pb(pb):
+    return pb
+
+@graham.metric("_eps", "trailingEps", "eps")
+def calc_eps(trailing_eps, eps):
+    return first_truthy(trailing_eps, eps)
+
+@graham.metric("_eps_growth", "earningsQuarterlyGrowth", "epsGrowth")
+def calc_eps_growth(quarterly_growth, eps_growth):
+    return first_truthy(quarterly_growth, eps_growth)
+
+@graham.metric("_shares", "sharesOutstanding", "shares_outstanding")
+def calc_shares(shares_outstanding, shares):
+    return first_truthy(shares_outstanding, shares)
+
+@graham.metric("EPS_Growth_10Y_%", "_eps_growth")
+def calc_eps_growth_10y(g):
+    return g * 100
+
+@graham.metric("Earnings_Stability_10Y", "_eps", "_eps_growth")
+def calc_earnings_stability_10y(eps, g):
+    return (eps > 0) & (g > 0)
+
+@graham.metric("Debt/Equity", "debtToEquity")
+def calc_debt_to_equity(d2e):
+    return d2e
+
+@graham.metric("Current_Ratio", "totalCurrentAssets", "currentAssets",
+               "totalCurrentLiabilities", "currentLiabilities", "currentRatio")
+def calc_current_ratio(total_ca, ca, total_cl, cl, current_ratio):
+    ca = first_truthy(total_ca, ca)
+    cl = first_truthy(total_cl, cl)
+    return masked(truthy(ca) & (cl > 0), ca / cl, current_ratio)
+
+@graham.metric("Dividend_Record_Years", "dividendYield")
+def calc_dividend_record_years(dy):
+    return np.where(dy > 0, 20, 0)
+
+@graham.metric("Dividend_Yield_%", "dividendYield")
+def calc_dividend_yield(y):
+    return np.where(truthy(y), y, 0.0)
+
+@graham.metric("Intrinsic_Value", "_eps", "EPS_Growth_10Y_%")
+def calc_intrinsic_value(eps, g):
+    eps = first_truthy(eps, 1.0)
+    g_val = np.where(np.isnan(g), 4, g)
     return eps * (8.5 + 2 * g_val)
 
-def calc_margin_of_safety(data):
-    price = data.get("price") or data.get("currentPrice")
-    iv = calc_intrinsic_value(data)
-    if iv and price:
-        return 100 * (1 - price / iv)
-    return None
+@graham.metric("Margin_of_Safety_%", "price", "currentPrice", "Intrinsic_Value")
+def calc_margin_of_safety(price, current_price, iv):
+    price = first_truthy(price, current_price)
+    return masked(truthy(iv) & truthy(price), 100 * (1 - price / iv))
 
-def calc_net_net_value(data):
+@graham.metric("Net_Net_Value", "totalCurrentAssets", "totalLiabilities")
+def calc_net_net_value(ca, tl):
     """
     Net-Net (NCAV) = totalCurrentAssets - totalLiabilities
-    Returns None if fields missing, otherwise numeric (may be negative).
+    NaN if fields missing, otherwise numeric (may be negative).
     """
-    ca = data.get("totalCurrentAssets")
-    tl = data.get("totalLiabilities")
-    if ca is not None and tl is not None:
-        return ca - tl
-    return None
+    return ca - tl
 
-def calc_net_net_comment(data):
+@graham.narrative("NetNet_Comment", "totalCurrentAssets", "totalLiabilities", "marketCap", "_shares")
+def calc_net_net_comment(ca, tl, mc, shares):
     """
     Returns a plain English comment for Net-Net value and buy candidate logic.
     """
-    ca = data.get("totalCurrentAssets")
-    tl = data.get("totalLiabilities")
-    mc = data.get("marketCap")
-    shares = data.get("sharesOutstanding") or data.get("shares_outstanding")
-    netnet = calc_net_net_value(data)
     comment = ""
     if ca is None or tl is None:
         return "Net-Net calculation not possible: missing totalCurrentAssets or totalLiabilities."
-    if netnet is None:
-        return "Net-Net calculation not possible: missing required fields."
+    netnet = ca - tl
     if shares is not None and shares > 0:
         ncav_per_share = netnet / shares
     else:
@@ -107,60 +129,99 @@ def calc_net_net_comment(data):
         comment += f" NCAV per share: ${ncav_per_share:,.2f}."
     return comment
 
-def calc_market_cap(data):
-    return data.get("marketCap")
-
-def calc_netnet_buy_candidate(data):
-    mc = calc_market_cap(data)
-    nnv = calc_net_net_value(data)
-    if mc is None or nnv is None:
-        return None
-    return mc < (2/3 * nnv) if nnv > 0 else False
-
-def calc_graham_combined_test(data):
-    pe = calc_pe(data)
-    pb = calc_pb(data)
-    d2e = calc_debt_to_equity(data)
-    div_years = calc_dividend_record_years(data)
-    earning_stab = calc_earnings_stability_10y(data)
+@graham.metric("NetNet_Buy_Candidate", "marketCap", "Net_Net_Value")
+def calc_netnet_buy_candidate(mc, nnv):
+    missing = np.isnan(mc) | np.isnan(nnv)
+    return optional_bool((nnv > 0) & (mc < 2/3 * nnv), missing)
+
+@graham.metric("Graham_Combined_Test", "P/E", "P/B", "Debt/Equity", "Dividend_Record_Years", "Earnings_Stability_10Y")
+def calc_graham_combined_test(pe, pb, d2e, div_years, earning_stab):
+    # NaN compares False, so a missing value fails its test
     tests = [
-        pe is not None and pe < 15,
-        pb is not None and pb < 1.5,
-        pe is not None and pb is not None and pe * pb < 22.5,
+        pe < 15,
+        pb < 1.5,
+        pe * pb < 22.5,
         div_years >= 20,
-        earning_stab is True,
-        d2e is not None and d2e < 0.5,
+        earning_stab,
+        d2e < 0.5,
     ]
-    return all(tests)
+    return np.logical_and.reduce(tests)
+
+@graham.metric("Expected_Return_%", "Dividend_Yield_%", "EPS_Growth_10Y_%", "Margin_of_Safety_%")
+def calc_expected_return(div_yield, g, mos):
+    return div_yield + first_truthy(g, 4.0) + (first_truthy(mos, 0.0)/3)
 
-def calc_expected_return(data):
-    div_yield = calc_dividend_yield(data) or 0
-    g = calc_eps_growth_10y(data) or 4
-    mos = calc_margin_of_safety(data) or 0
-    return div_yield + g + (mos/3)
+def graham_metrics_frame(frame: Union[FrameLike, Columns], narratives: bool = False) -> pd.DataFrame:
+    """
+    Graham metrics for many tickers at once. Takes a DataFrame or dict of
+    arrays with one row per ticker and returns one metrics row per ticker
+    (NaN/<NA> where a metric cannot be computed). NetNet_Comment is only
+    written when narratives is set.
+    """
+    columns = as_columns(frame)
+    return pd.DataFrame(graham.evaluate(columns, GRAHAM_METRICS, narratives), index=columns.index)
 
-def graham_metrics(data):
+def graham_metrics(data, narratives=True):
     """
-    Returns all Graham metrics, including a 'NetNet_Comment' for the Net-Net calculation.
+    Returns all Graham metrics, including a 'NetNet_Comment' for the Net-Net calculation
+    unless narratives is off. Each input and intermediate is read or computed once.
     """
-    return {
-        "P/E": calc_pe(data),
-        "P/B": calc_pb(data),
-        "EPS_Growth_10Y_%": calc_eps_growth_10y(data),
-        "Earnings_Stability_10Y": calc_earnings_stability_10y(data),
-        "Debt/Equity": calc_debt_to_equity(data),
-        "Current_Ratio": calc_current_ratio(data),
-        "Dividend_Record_Years": calc_dividend_record_years(data),
-        "Dividend_Yield_%": calc_dividend_yield(data),
-        "Intrinsic_Value": calc_intrinsic_value(data),
-        "Margin_of_Safety_%": calc_margin_of_safety(data),
-        "Net_Net_Value": calc_net_net_value(data),
-        "NetNet_Buy_Candidate": calc_netnet_buy_candidate(data),
-        "NetNet_Comment": calc_net_net_comment(data),  # <-- Comment/explanation
-        "Graham_Combined_Test": calc_graham_combined_test(data),
-        "Expected_Return_%": calc_expected_return(data),
-        "sector": data.get("sector"),
-        "industry": data.get("industry"),
-        "price": data.get("price"),
-        "marketCap": calc_market_cap(data),
+    get = data.get
+    pe = get("forwardPE") or get("trailingPE") or get("pe")
+    pb = get("priceToBook")
+    eps = get("trailingEps") or get("eps")
+    growth = get("earningsQuarterlyGrowth") or get("epsGrowth")
+    eps_growth = growth * 100 if growth is not None else None
+    d2e = get("debtToEquity")
+    ca = get("totalCurrentAssets") or get("currentAssets")
+    cl = get("totalCurrentLiabilities") or get("currentLiabilities")
+    current_ratio = ca / cl if ca and cl and cl > 0 else get("currentRatio")
+    dy = get("dividendYield")
+    div_years = 20 if dy and dy > 0 else 0
+    div_yield = dy if dy else 0
+    intrinsic = (eps or 1) * (8.5 + 2 * (eps_growth if eps_growth is not None else 4))
+    price = get("price") or get("currentPrice")
+    mos = 100 * (1 - price / intrinsic) if intrinsic and price else None
+    total_ca, total_l, mc = get("totalCurrentAssets"), get("totalLiabilities"), get("marketCap")
+    netnet = total_ca - total_l if total_ca is not None and total_l is not None else None
+    if mc is None or netnet is None:
+        buy_candidate = None
+    else:
+        buy_candidate = mc < 2/3 * netnet if netnet > 0 else False
+    stability = (eps is not None and eps > 0) and (growth is not None and growth > 0)
+    combined = all([
+        pe is not None and pe < 15,
+        pb is not None and pb < 1.5,
+        pe is not None and pb is not None and pe * pb < 22.5,
+        div_years >= 20,
+        stability is True,
+        d2e is not None and d2e < 0.5,
+    ])
+
+    metrics = {
+        "P/E": pe,
+        "P/B": pb,
+        "EPS_Growth_10Y_%": eps_growth,
+        "Earnings_Stability_10Y": stability,
+        "Debt/Equity": d2e,
+        "Current_Ratio": current_ratio,
+        "Dividend_Record_Years": div_years,
+        "Dividend_Yield_%": div_yield,
+        "Intrinsic_Value": intrinsic,
+        "Margin_of_Safety_%": mos,
+        "Net_Net_Value": netnet,
+        "NetNet_Buy_Candidate": buy_candidate,
+        "NetNet_Comment": None,
+        "Graham_Combined_Test": combined,
+        "Expected_Return_%": (div_yield or 0) + (eps_growth or 4) + ((mos or 0) / 3),
+        "sector": get("sector"),
+        "industry": get("industry"),
+        "price": get("price"),
+        "marketCap": mc,
     }
+    if narratives:
+        shares = get("sharesOutstanding") or get("shares_outstanding")
+        metrics["NetNet_Comment"] = calc_net_net_comment(total_ca, total_l, mc, shares)
+    else:
+        del metrics["NetNet_Comment"]
+    return metrics
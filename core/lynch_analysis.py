@@ -5,114 +5,146 @@ Implements Lynch-style ratios and logic to produce a BUY/HOLD/SELL verdict.
 Keeps all existing metrics and adds all core Lynch metrics and explanations.
 """
 
-def calc_pe(data):
-    return data.get("forwardPE") or data.get("trailingPE") or data.get("pe")
-
-def calc_eps_growth(data):
-    g = data.get("earningsQuarterlyGrowth") or data.get("epsGrowth")
-    if g is not None:
-        return g * 100
-    return None
-
+from typing import Union
+import numpy as np
+import pandas as pd
+from core.metric_frame import Columns, FrameLike, MetricSet, as_columns, first_truthy, masked, truthy
+
+# Each metric declares the raw fields and metrics it reads; lynch_metrics_frame()
+# evaluates each one once per snapshot, over whole columns (one row per ticker,
+# NaN for missing values). lynch_metrics() computes the same metrics for one
+# ticker in plain Python, where NumPy's per-call overhead would dominate.
+lynch = MetricSet(text_fields=("sector", "industry"))
+
+LYNCH_METRICS = [
+    "P/E", "EPS_Growth_%", "PEG", "Debt/Equity", "Dividend_Yield_%", "Cash/Assets_%",
+    "Inventory/Sales_Growth_%", "Insider_Ownership_%", "ROE_%", "ROA_%", "Profit_Margin_%",
+    "Price/Book", "Price/Sales", "Current_Ratio", "Quick_Ratio", "Earnings_Yield_%", "FCF_Yield_%",
+    # keep old metrics if needed
+    "sector", "industry",
+]
+
+@lynch.metric("P/E", "forwardPE", "trailingPE", "pe")
+def calc_pe(forward_pe, trailing_pe, pe):
+    return first_truthy(forward_pe, trailing_pe, pe)
+
+@lynch.metric("EPS_Growth_%", "earningsQuarterlyGrowth", "epsGrowth")
+def calc_eps_growth(quarterly_growth, eps_growth):
+    return first_truthy(quarterly_growth, eps_growth) * 100
+
+@lynch.metric("PEG", "P/E", "EPS_Growth_%")
 def calc_peg(pe, growth):
-    if pe and growth and growth > 0:
-        return pe / growth
-    return None
-
-def calc_debt_to_equity(data):
-    return data.get("debtToEquity")
-
-def calc_dividend_yield(data):
-    y = data.get("dividendYield")
-    if y:
-        return y
-    return 0
-
-def calc_roe(data):
-    roe = data.get("returnOnEquity") or data.get("roe")
-    return roe if roe is not None else None
-
-def calc_roa(data):
-    roa = data.get("returnOnAssets") or data.get("roa")
-    return roa if roa is not None else None
-
-def calc_profit_margin(data):
-    pm = data.get("profitMargins") or data.get("profitMargin")
-    return pm if pm is not None else None
-
-def calc_price_to_book(data):
-    return data.get("priceToBook")
-
-def calc_price_to_sales(data):
-    return data.get("priceToSales") or data.get("priceToSalesTrailing12Months")
-
-def calc_current_ratio(data):
-    ca = data.get("totalCurrentAssets") or data.get("currentAssets")
-    cl = data.get("totalCurrentLiabilities") or data.get("currentLiabilities")
-    if ca and cl and cl > 0:
-        return ca / cl
-    return data.get("currentRatio")
-
-def calc_quick_ratio(data):
-    ca = data.get("totalCurrentAssets") or data.get("currentAssets")
-    inv = data.get("inventory")
-    cl = data.get("totalCurrentLiabilities") or data.get("currentLiabilities")
-    if ca and inv is not None and cl and cl > 0:
-        return (ca - inv) / cl
-    return data.get("quickRatio")
-
-def calc_cash_position(data):
-    cash = data.get("totalCash")
-    assets = data.get("totalAssets")
-    if cash and assets and assets > 0:
-        return (cash / assets) * 100
-    return None
-
-def calc_inventory_growth(data):
-    inv_growth = data.get("inventoryGrowth")
-    rev_growth = data.get("salesGrowth") or data.get("revenueGrowth")
-    if inv_growth and rev_growth and rev_growth != 0:
-        return inv_growth / rev_growth * 100
-    return None
-
-def calc_insider_ownership(data):
-    insiders = data.get("heldPercentInsiders") or data.get("sharesPercentInsiders")
-    if insiders:
-        return insiders * 100
-    return None
-
-def calc_earnings_yield(data):
-    pe = calc_pe(data)
-    return 100 / pe if pe else None
-
-def calc_fcf_yield(data):
-    fcf = data.get("freeCashflow")
-    mcap = data.get("marketCap")
-    if fcf and mcap:
-        return (fcf / mcap) * 100
-    return None
+    return masked(truthy(pe) & (growth > 0), pe / growth)
+
+@lynch.metric("Debt/Equity", "debtToEquity")
+def calc_debt_to_equity(d2e):
+    return d2e
+
+@lynch.metric("Dividend_Yield_%", "dividendYield")
+def calc_dividend_yield(y):
+    return np.where(truthy(y), y, 0.0)
+
+@lynch.metric("ROE_%", "returnOnEquity", "roe")
+def calc_roe(return_on_equity, roe):
+    return first_truthy(return_on_equity, roe)
+
+@lynch.metric("ROA_%", "returnOnAssets", "roa")
+def calc_roa(return_on_assets, roa):
+    return first_truthy(return_on_assets, roa)
+
+@lynch.metric("Profit_Margin_%", "profitMargins", "profitMargin")
+def calc_profit_margin(profit_margins, profit_margin):
+    return first_truthy(profit_margins, profit_margin)
+
+@lynch.metric("Price/Book", "priceToBook")
+def calc_price_to_book(pb):
+    return pb
+
+@lynch.metric("Price/Sales", "priceToSales", "priceToSalesTrailing12Months")
+def calc_price_to_sales(ps, ps_ttm):
+    return first_truthy(ps, ps_ttm)
+
+@lynch.metric("_current_assets", "totalCurrentAssets", "currentAssets")
+def calc_current_assets(total_ca, ca):
+    return first_truthy(total_ca, ca)
+
+@lynch.metric("_current_liabilities", "totalCurrentLiabilities", "currentLiabilities")
+def calc_current_liabilities(total_cl, cl):
+    return first_truthy(total_cl, cl)
+
+@lynch.metric("Current_Ratio", "_current_assets", "_current_liabilities", "currentRatio")
+def calc_current_ratio(ca, cl, current_ratio):
+    return masked(truthy(ca) & (cl > 0), ca / cl, current_ratio)
+
+@lynch.metric("Quick_Ratio", "_current_assets", "inventory", "_current_liabilities", "quickRatio")
+def calc_quick_ratio(ca, inv, cl, quick_ratio):
+    return masked(truthy(ca) & ~np.isnan(inv) & (cl > 0), (ca - inv) / cl, quick_ratio)
+
+@lynch.metric("Cash/Assets_%", "totalCash", "totalAssets")
+def calc_cash_position(cash, assets):
+    return masked(truthy(cash) & (assets > 0), (cash / assets) * 100)
+
+@lynch.metric("Inventory/Sales_Growth_%", "inventoryGrowth", "salesGrowth", "revenueGrowth")
+def calc_inventory_growth(inv_growth, sales_growth, revenue_growth):
+    rev_growth = first_truthy(sales_growth, revenue_growth)
+    return masked(truthy(inv_growth) & truthy(rev_growth), inv_growth / rev_growth * 100)
+
+@lynch.metric("Insider_Ownership_%", "heldPercentInsiders", "sharesPercentInsiders")
+def calc_insider_ownership(held, shares):
+    insiders = first_truthy(held, shares)
+    return masked(truthy(insiders), insiders * 100)
+
+@lynch.metric("Earnings_Yield_%", "P/E")
+def calc_earnings_yield(pe):
+    return masked(truthy(pe), 100 / pe)
+
+@lynch.metric("FCF_Yield_%", "freeCashflow", "marketCap")
+def calc_fcf_yield(fcf, mcap):
+    return masked(truthy(fcf) & truthy(mcap), (fcf / mcap) * 100)
+
+# Collect all metrics in a single frame for screening many tickers
+def lynch_metrics_frame(frame: Union[FrameLike, Columns]) -> pd.DataFrame:
+    """
+    Lynch metrics for many tickers at once. Takes a DataFrame or dict of
+    arrays with one row per ticker and returns one metrics row per ticker
+    (NaN where a metric cannot be computed).
+    """
+    columns = as_columns(frame)
+    return pd.DataFrame(lynch.evaluate(columns, LYNCH_METRICS), index=columns.index)
 
 # Collect all metrics in a single dict for reporting
 def lynch_metrics(data):
+    get = data.get
+    pe = get("forwardPE") or get("trailingPE") or get("pe")
+    growth = get("earningsQuarterlyGrowth") or get("epsGrowth")
+    eps_growth = growth * 100 if growth is not None else None
+    ca = get("totalCurrentAssets") or get("currentAssets")
+    cl = get("totalCurrentLiabilities") or get("currentLiabilities")
+    inv = get("inventory")
+    cash, assets = get("totalCash"), get("totalAssets")
+    inv_growth = get("inventoryGrowth")
+    rev_growth = get("salesGrowth") or get("revenueGrowth")
+    insiders = get("heldPercentInsiders") or get("sharesPercentInsiders")
+    fcf, mcap = get("freeCashflow"), get("marketCap")
     return {
-        "P/E": calc_pe(data),
-        "EPS_Growth_%": calc_eps_growth(data),
-        "PEG": calc_peg(calc_pe(data), calc_eps_growth(data)),
-        "Debt/Equity": calc_debt_to_equity(data),
-        "Dividend_Yield_%": calc_dividend_yield(data),
-        "Cash/Assets_%": calc_cash_position(data),
-        "Inventory/Sales_Growth_%": calc_inventory_growth(data),
-        "Insider_Ownership_%": calc_insider_ownership(data),
-        "ROE_%": calc_roe(data),
-        "ROA_%": calc_roa(data),
-        "Profit_Margin_%": calc_profit_margin(data),
-        "Price/Book": calc_price_to_book(data),
-        "Price/Sales": calc_price_to_sales(data),
-        "Current_Ratio": calc_current_ratio(data),
-        "Quick_Ratio": calc_quick_ratio(data),
-        "Earnings_Yield_%": calc_earnings_yield(data),
-        "FCF_Yield_%": calc_fcf_yield(data),
+        "P/E": pe,
+        "EPS_Growth_%": eps_growth,
+        "PEG": pe / eps_growth if pe and eps_growth and eps_growth > 0 else None,
+        "Debt/Equity": get("debtToEquity"),
+        "Dividend_Yield_%": get("dividendYield") or 0,
+        "Cash/Assets_%": (cash / assets) * 100 if cash and assets and assets > 0 else None,
+        "Inventory/Sales_Growth_%": inv_growth / rev_growth * 100 if inv_growth and rev_growth else None,
+        "Insider_Ownership_%": insiders * 100 if insiders else None,
+        "ROE_%": get("returnOnEquity") or get("roe"),
+        "ROA_%": get("returnOnAssets") or get("roa"),
+        "Profit_Margin_%": get("profitMargins") or get("profitMargin"),
+        "Price/Book": get("priceToBook"),
+        "Price/Sales": get("priceToSales") or get("priceToSalesTrailing12Months"),
+        "Current_Ratio": ca / cl if ca and cl and cl > 0 else get("currentRatio"),
+        "Quick_Ratio": (ca - inv) / cl if ca and inv is not None and cl and cl > 0 else get("quickRatio"),
+        "Earnings_Yield_%": 100 / pe if pe else None,
+        "FCF_Yield_%": (fcf / mcap) * 100 if fcf and mcap else None,
         # keep old metrics if needed
-        "sector": data.get("sector"),
-        "industry": data.get("industry"),
+        "sector": get("sector"),
+        "industry": get("industry"),
     }
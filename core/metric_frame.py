@@ -0,0 +1,178 @@
+"""
+Columnar metric engine for the Graham and Lynch metrics
+-------------------------------------------------------
+The analysis modules compute every metric over a whole universe at once:
+one row per ticker, one NumPy array per field, NaN where a value is
+missing. Each metric is registered in a MetricSet with the inputs it reads
+(raw fields or other metrics), so a snapshot evaluates every metric once
+however many others depend on it. Narrative text is built only on request.
+
+The helpers below turn a DataFrame or a dict of arrays into such columns,
+reproduce the scalar code's `a or b or c` fallbacks with masks, and convert
+a result value back into a plain Python value.
+"""
+
+import math
+from typing import Callable, Dict, Iterable, Mapping, Union
+import numpy as np
+import pandas as pd
+
+FrameLike = Union[pd.DataFrame, Mapping]
+
+
+def frame_length(frame: FrameLike) -> int:
+    """Number of rows (tickers) in a DataFrame or dict of equal-length arrays"""
+    if isinstance(frame, pd.DataFrame):
+        return len(frame)
+    for values in frame.values():
+        return len(values)
+    return 0
+
+
+def as_columns(frame) -> "Columns":
+    """Columns over frame; an existing Columns is reused so raw fields convert once"""
+    return frame if isinstance(frame, Columns) else Columns(frame)
+
+
+def frame_index(frame: FrameLike, n: int = None):
+    """Row labels for the metrics frame: the input's index, or 0..n-1"""
+    if isinstance(frame, pd.DataFrame):
+        return frame.index
+    return pd.RangeIndex(frame_length(frame) if n is None else n)
+
+
+def column(frame: FrameLike, name: str, n: int) -> np.ndarray:
+    """Numeric column as float64; missing fields and non-numeric values become NaN"""
+    if name not in frame:
+        return np.full(n, np.nan)
+    values = frame[name]
+    if isinstance(values, np.ndarray) and values.dtype.kind in "fiub":
+        return values.astype(float, copy=False)
+    if isinstance(values, (list, tuple)):
+        try:
+            return np.array(values, dtype=float)
+        except (TypeError, ValueError):
+            pass
+    return pd.to_numeric(pd.Series(values, copy=False), errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def text_column(frame: FrameLike, name: str, n: int) -> np.ndarray:
+    """Pass-through column (sector, industry) as an object array with None for missing"""
+    if name not in frame:
+        return np.full(n, None, dtype=object)
+    values = pd.Series(frame[name], copy=False).to_numpy(dtype=object)
+    return np.where(pd.isna(values), None, values)
+
+
+class Columns:
+    """
+    Column accessor over one frame; each field is converted once and reused.
+    n overrides the row count, so an empty dict can stand for one all-missing row.
+    """
+
+    def __init__(self, frame: FrameLike, n: int = None):
+        self.frame = frame
+        self.n = frame_length(frame) if n is None else n
+        self.index = frame_index(frame, self.n)
+        self._columns = {}
+
+    def __call__(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            self._columns[name] = column(self.frame, name, self.n)
+        return self._columns[name]
+
+    def text(self, name: str) -> np.ndarray:
+        key = ("text", name)
+        if key not in self._columns:
+            self._columns[key] = text_column(self.frame, name, self.n)
+        return self._columns[key]
+
+
+class MetricSet:
+    """
+    Metrics with declared inputs. An input is another metric of the set or,
+    failing that, a raw field of the snapshot. Names starting with "_" are
+    intermediates shared by several metrics.
+    """
+
+    def __init__(self, text_fields: Iterable[str] = ()):
+        self.metrics: Dict[str, tuple] = {}
+        self.text_fields = frozenset(text_fields)
+
+    def metric(self, name: str, *inputs: str) -> Callable:
+        """Register fn(*input_columns) -> column as metric name"""
+        def decorator(fn):
+            self.metrics[name] = (fn, inputs, False)
+            return fn
+        return decorator
+
+    def narrative(self, name: str, *inputs: str) -> Callable:
+        """Register fn(*input_values) -> str, called per row and only when narratives are requested"""
+        def decorator(fn):
+            self.metrics[name] = (fn, inputs, True)
+            return fn
+        return decorator
+
+    def is_narrative(self, name: str) -> bool:
+        return name in self.metrics and self.metrics[name][2]
+
+    def evaluate(self, columns: Columns, names: Iterable[str], narratives: bool = False) -> dict:
+        """Columns for names, computing each metric they need exactly once"""
+        values = {}
+
+        def get(name, path=()):
+            if name in values:
+                return values[name]
+            if name not in self.metrics:
+                value = columns.text(name) if name in self.text_fields else columns(name)
+            else:
+                if name in path:
+                    raise ValueError(f"Metric dependency cycle: {' -> '.join(path + (name,))}")
+                fn, inputs, narrative = self.metrics[name]
+                args = [get(dep, path + (name,)) for dep in inputs]
+                if narrative:
+                    value = np.array([fn(*(to_python(arg[i]) for arg in args)) for i in range(columns.n)],
+                                     dtype=object)
+                else:
+                    value = fn(*args)
+            values[name] = value
+            return value
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {name: get(name) for name in names if narratives or not self.is_narrative(name)}
+
+
+def truthy(values: np.ndarray) -> np.ndarray:
+    """Where a value would pass `if value:` (present and non-zero)"""
+    return ~np.isnan(values) & (values != 0)
+
+
+def first_truthy(*columns) -> np.ndarray:
+    """Columnar `a or b or c`: the first truthy value, else the last one as is (may be a scalar)"""
+    result = np.asarray(columns[-1], dtype=float)
+    for values in reversed(columns[:-1]):
+        result = np.where(truthy(values), values, result)
+    return result
+
+
+def masked(mask: np.ndarray, values: np.ndarray, fallback=np.nan) -> np.ndarray:
+    """values where mask holds, fallback (NaN by default) elsewhere"""
+    return np.where(mask, values, fallback)
+
+
+def optional_bool(values: np.ndarray, missing: np.ndarray) -> pd.arrays.BooleanArray:
+    """Nullable boolean column: True/False, or <NA> where missing"""
+    return pd.arrays.BooleanArray(values & ~missing, missing.copy())
+
+
+def to_python(value):
+    """NumPy/pandas scalar to the plain value the scalar metrics used to return"""
+    if value is None or value is pd.NA:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if math.isnan(value) else float(value)
+    return value
@@ -0,0 +1,397 @@
+"""
+Reddit streaming ingester
+-------------------------
+Tails new submissions from the tracked subreddits, scores each one once,
+and keeps rolling 1d/7d/14d aggregates for every ticker it mentions.
+
+The ingester runs as its own process so web requests never wait on it:
+
+    python -m core.reddit_ingester
+
+It uses the same praw client, and so the same Reddit OAuth rate limit, as
+the web workers. praw paces the stream itself; the score re-checks below
+are metered through ``quota_manager`` like every other Reddit call.
+
+Brand-new posts have almost no upvotes, so a streamed post only counts
+once it reaches REDDIT_MIN_POST_SCORE, the same bar the live search
+applies. Posts below it are re-checked in batches at every checkpoint
+until they qualify or are REDDIT_INGEST_PENDING_HOURS old.
+
+Aggregates are bucketed by hour and checkpointed to disk. Web workers load
+the latest checkpoint, so ``get_reddit_sentiment_summary`` and
+``get_most_mentioned_tickers`` become lookups instead of live searches.
+The submission stream is injectable, so a local fixture can replace praw.
+"""
+
+import json
+import math
+import os
+import signal
+import threading
+import time
+import uuid
+from collections import deque
+from math import ceil
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+from config.settings import (
+    PROJECT_ROOT, REDDIT_INGEST_CHECKPOINT_SECONDS, REDDIT_INGEST_STALE_SECONDS,
+    REDDIT_INGEST_PENDING_HOURS, REDDIT_MIN_POST_SCORE
+)
+from utils.quota_manager import quota_manager
+from utils.ticker_matcher import ticker_matcher
+
+CHECKPOINT_PATH = PROJECT_ROOT / "cache" / "reddit_ingest.json"
+CHECKPOINT_VERSION = 2
+WINDOWS = (1, 7, 14)          # Days of the rolling windows
+RETENTION_HOURS = max(WINDOWS) * 24
+TOP_POSTS_PER_TICKER = 10
+SEEN_IDS = 5000               # Recently ingested post ids remembered for de-duplication
+INFO_BATCH = 100              # Post ids per Reddit info lookup
+
+# Bucket layout: [mentions, sentiment_sum, sentiment_sq_sum, weighted_sum, weight_sum, quality, score_sum, {sub: n}]
+MENTIONS, SENT_SUM, SENT_SQ, WEIGHTED, WEIGHT, QUALITY, SCORE, SUBS = range(8)
+
+
+def _empty_bucket() -> list:
+    return [0, 0.0, 0.0, 0.0, 0.0, 0, 0, {}]
+
+
+class RollingAggregates:
+    """
+    Hourly per-ticker buckets covering the longest window. Reads sum at most
+    RETENTION_HOURS buckets per ticker, so lookups cost the same however
+    many posts were ingested.
+    """
+
+    def __init__(self):
+        self.buckets = {}     # ticker -> {hour: bucket}
+        self.top_posts = {}   # ticker -> [post summary]
+        self._lock = threading.Lock()
+
+    def add(self, tickers: Iterable[str], sub: str, created_utc: float, sentiment: float, weight: float,
+            score: int, quality_flag: bool, post: dict) -> None:
+        hour = int(created_utc // 3600)
+        with self._lock:
+            for ticker in tickers:
+                bucket = self.buckets.setdefault(ticker, {}).setdefault(hour, _empty_bucket())
+                bucket[MENTIONS] += 1
+                bucket[SENT_SUM] += sentiment
+                bucket[SENT_SQ] += sentiment * sentiment
+                bucket[WEIGHTED] += sentiment * weight
+                bucket[WEIGHT] += weight
+                bucket[QUALITY] += int(bool(quality_flag))
+                bucket[SCORE] += score
+                bucket[SUBS][sub] = bucket[SUBS].get(sub, 0) + 1
+                posts = self.top_posts.setdefault(ticker, [])
+                posts.append(post)
+                posts.sort(key=lambda p: (p["score"], p["created_utc"]), reverse=True)
+                del posts[TOP_POSTS_PER_TICKER:]
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Drop buckets and posts older than the longest window"""
+        oldest = int((now or time.time()) // 3600) - RETENTION_HOURS
+        with self._lock:
+            for ticker in list(self.buckets):
+                hours = self.buckets[ticker]
+                for hour in [h for h in hours if h <= oldest]:
+                    del hours[hour]
+                posts = [p for p in self.top_posts.get(ticker, []) if p["created_utc"] // 3600 > oldest]
+                if hours:
+                    self.top_posts[ticker] = posts
+                else:
+                    del self.buckets[ticker]
+                    self.top_posts.pop(ticker, None)
+
+    def window(self, ticker: str, days: float, end_days_ago: float = 0, now: Optional[float] = None) -> list:
+        """Summed bucket for the `days` days ending `end_days_ago` days before now"""
+        now_hour = int((now or time.time()) // 3600)
+        newest = now_hour - int(end_days_ago * 24)
+        oldest = newest - int(days * 24)
+        total = _empty_bucket()
+        with self._lock:
+            for hour, bucket in self.buckets.get(ticker, {}).items():
+                if oldest < hour <= newest:
+                    for i in range(SUBS):
+                        total[i] += bucket[i]
+                    for sub, n in bucket[SUBS].items():
+                        total[SUBS][sub] = total[SUBS].get(sub, 0) + n
+        return total
+
+    def windows(self, ticker: str, now: Optional[float] = None) -> dict:
+        """Mentions and weighted sentiment for each rolling window"""
+        out = {}
+        for days in WINDOWS:
+            b = self.window(ticker, days, now=now)
+            out[f"{days}d"] = {"mentions": b[MENTIONS],
+                               "avg_sentiment": b[WEIGHTED] / b[WEIGHT] if b[WEIGHT] else 0.0}
+        return out
+
+    def most_mentioned(self, n: int = 10, days: float = 1, now: Optional[float] = None) -> list:
+        """(ticker, mentions) pairs for the n most mentioned tickers in the window"""
+        with self._lock:
+            tickers = list(self.buckets)
+        counts = [(t, self.window(t, days, now=now)[MENTIONS]) for t in tickers]
+        counts = [c for c in counts if c[1]]
+        return sorted(counts, key=lambda c: (-c[1], c[0]))[:n]
+
+    def summary(self, ticker: str, days: float = 14, now: Optional[float] = None) -> Optional[dict]:
+        """Reddit summary for ticker over the last `days` days, or None without mentions"""
+        from core.reddit_sentiment import compose_summary
+
+        b = self.window(ticker, days, now=now)
+        mentions = b[MENTIONS]
+        if not mentions:
+            return None
+        mean = b[SENT_SUM] / mentions
+        std_dev = math.sqrt(max(0.0, b[SENT_SQ] / mentions - mean * mean)) if mentions > 1 else 0
+        this_week, last_week = self.window(ticker, 7, now=now), self.window(ticker, 7, end_days_ago=7, now=now)
+        weeks = tuple({"mentions": w[MENTIONS], "avg_sentiment": w[WEIGHTED] / w[WEIGHT] if w[WEIGHT] else 0.0}
+                      for w in (this_week, last_week))
+        with self._lock:
+            top_posts = [dict(p) for p in self.top_posts.get(ticker, [])[:3]]
+        for post in top_posts:
+            post.pop("created_utc", None)
+        result = compose_summary(
+            ticker, mentions, b[WEIGHTED] / b[WEIGHT] if b[WEIGHT] else 0.0, std_dev, b[SUBS],
+            quality_count=b[QUALITY], score_sum=b[SCORE], top_posts=top_posts, weeks=weeks,
+        )
+        result.update({"windows": self.windows(ticker, now=now), "source": "stream",
+                       "partial": False, "timed_out": [], "comments_missing": 0})
+        return result
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "buckets": {t: {str(h): b for h, b in hours.items()} for t, hours in self.buckets.items()},
+                "top_posts": self.top_posts,
+            }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RollingAggregates":
+        aggregates = cls()
+        aggregates.buckets = {t: {int(h): b for h, b in hours.items()}
+                              for t, hours in data.get("buckets", {}).items()}
+        aggregates.top_posts = data.get("top_posts", {})
+        return aggregates
+
+
+def praw_stream(subreddits: Iterable[str]):
+    """Endless praw submission stream; yields None whenever it is idle"""
+    from core.reddit_sentiment import reddit
+    if reddit is None:
+        raise RuntimeError("Reddit API not available")
+    return reddit.subreddit("+".join(subreddits)).stream.submissions(pause_after=0)
+
+
+def praw_scores(post_ids: list) -> dict:
+    """Current upvote scores of posts by id (one Reddit request per INFO_BATCH ids)"""
+    from core.reddit_sentiment import reddit
+    if reddit is None or not post_ids:
+        return {}
+    quota_manager.acquire("reddit", cost=ceil(len(post_ids) / INFO_BATCH))
+    return {post.id: post.score for post in reddit.info(fullnames=[f"t3_{i}" for i in post_ids])}
+
+
+class RedditIngester:
+    """
+    Consumes a submission stream into RollingAggregates.
+
+    ``stream`` is a callable returning an iterable of praw-like submissions
+    (``id``, ``title``, ``selftext``, ``subreddit.display_name``,
+    ``created_utc``, ``score``, ``permalink``); ``None`` items mark idle
+    points where the loop checkpoints and checks for shutdown. Defaults to
+    a live praw stream over SUBREDDITS. ``scores`` maps a list of post ids
+    to their current scores (default: praw_scores) for pending posts.
+    """
+
+    def __init__(self, stream: Optional[Callable[[], Iterable]] = None, checkpoint_path: Path = CHECKPOINT_PATH,
+                 checkpoint_every: float = REDDIT_INGEST_CHECKPOINT_SECONDS, subreddits: Optional[list] = None,
+                 scores: Optional[Callable[[list], dict]] = None):
+        from core.reddit_sentiment import SUBREDDITS
+        self.subreddits = list(subreddits or SUBREDDITS)
+        self.stream = stream or (lambda: praw_stream(self.subreddits))
+        self.scores = scores or praw_scores
+        self.pending = {}     # post id -> scored post waiting for REDDIT_MIN_POST_SCORE
+        self.checkpoint_path = Path(checkpoint_path)
+        self.checkpoint_every = checkpoint_every
+        self.aggregates = RollingAggregates()
+        self.seen = deque(maxlen=SEEN_IDS)
+        self._seen_set = set()
+        self.ingested = 0
+        self._last_checkpoint = time.monotonic()
+        self._stop = threading.Event()
+        self.load()
+
+    def ingest(self, post) -> set:
+        """
+        Score one submission and add it to every ticker it mentions, or park it
+        as pending until it has enough upvotes; returns those tickers
+        """
+        from core.reddit_sentiment import analyzer, blend_sentiment, has_quality_keywords
+
+        if post.id in self._seen_set:
+            return set()
+        if len(self.seen) == self.seen.maxlen:
+            self._seen_set.discard(self.seen[0])
+        self.seen.append(post.id)
+        self._seen_set.add(post.id)
+
+        title, body = post.title or "", post.selftext or ""
+        tickers = ticker_matcher.find(title + " " + body)
+        if not tickers or analyzer is None:
+            return set()
+
+        names = {s.lower(): s for s in self.subreddits}
+        sub = post.subreddit.display_name
+        sub = names.get(sub.lower(), sub)
+        scored = {
+            "id": post.id,
+            "tickers": sorted(tickers),
+            "sub": sub,
+            "title": title[:120],
+            "sentiment": blend_sentiment(analyzer.polarity_scores(title)["compound"],
+                                         analyzer.polarity_scores(body)["compound"]),
+            "quality_flag": has_quality_keywords(title + " " + body),
+            "url": f"https://www.reddit.com{post.permalink}",
+            "created_utc": post.created_utc,
+        }
+        if post.score >= REDDIT_MIN_POST_SCORE:
+            self._admit(scored, post.score)
+        else:
+            self.pending[post.id] = scored
+        return tickers
+
+    def _admit(self, scored: dict, score: int) -> None:
+        """Add a qualifying post to the aggregates, weighted like the live search"""
+        from core.reddit_sentiment import record_weight
+        weight = record_weight({"subreddit": scored["sub"], "score": score})
+        post = {k: scored[k] for k in ("sub", "title", "sentiment", "quality_flag", "url", "created_utc")}
+        post["score"] = score
+        self.aggregates.add(scored["tickers"], scored["sub"], scored["created_utc"], scored["sentiment"],
+                            weight, score, scored["quality_flag"], post)
+        self.ingested += 1
+
+    def rescore_pending(self, now: Optional[float] = None) -> int:
+        """
+        Re-check the scores of pending posts, admit those that reached
+        REDDIT_MIN_POST_SCORE and forget those that aged out; returns how many
+        were admitted
+        """
+        now = now or time.time()
+        cutoff = now - REDDIT_INGEST_PENDING_HOURS * 3600
+        for post_id in [i for i, p in self.pending.items() if p["created_utc"] < cutoff]:
+            del self.pending[post_id]
+        admitted = 0
+        post_ids = list(self.pending)
+        for i in range(0, len(post_ids), INFO_BATCH):
+            batch = post_ids[i:i + INFO_BATCH]
+            try:
+                scores = self.scores(batch)
+            except Exception as e:
+                print(f"Could not re-check scores of pending Reddit posts: {e}")
+                break
+            for post_id in batch:
+                score = scores.get(post_id)
+                if score is not None and score >= REDDIT_MIN_POST_SCORE:
+                    self._admit(self.pending.pop(post_id), score)
+                    admitted += 1
+        return admitted
+
+    def run(self) -> None:
+        """Consume the stream until stop() is called, reconnecting on errors"""
+        print(f"Reddit ingester tailing r/{'+'.join(self.subreddits)}")
+        while not self._stop.is_set():
+            try:
+                for post in self.stream():
+                    if post is not None:
+                        self.ingest(post)
+                    if time.monotonic() - self._last_checkpoint >= self.checkpoint_every:
+                        self.checkpoint()
+                    if self._stop.is_set():
+                        break
+                else:
+                    # A finite stream (e.g. a fixture) is done
+                    break
+            except Exception as e:
+                print(f"Reddit stream error: {e}; reconnecting")
+                self._stop.wait(5)
+        self.checkpoint()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def checkpoint(self) -> None:
+        """Re-check pending posts, prune old buckets and atomically write the aggregates to disk"""
+        self.rescore_pending()
+        self.aggregates.prune()
+        data = {"version": CHECKPOINT_VERSION, "saved_at": time.time(), "ingested": self.ingested,
+                "seen": list(self.seen), "pending": list(self.pending.values()), **self.aggregates.to_dict()}
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_name(f".{self.checkpoint_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.checkpoint_path)
+        except Exception as e:
+            print(f"Error writing Reddit ingest checkpoint: {e}")
+        self._last_checkpoint = time.monotonic()
+
+    def load(self) -> bool:
+        """Resume from the last checkpoint, if any"""
+        data = _read_checkpoint(self.checkpoint_path)
+        if data is None:
+            return False
+        self.aggregates = RollingAggregates.from_dict(data)
+        self.aggregates.prune()
+        self.seen.extend(data.get("seen", []))
+        self._seen_set = set(self.seen)
+        self.ingested = data.get("ingested", 0)
+        self.pending = {p["id"]: p for p in data.get("pending", [])}
+        return True
+
+
+def _read_checkpoint(path: Path) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if data.get("version") == CHECKPOINT_VERSION else None
+
+
+_view = {"mtime": None, "checked": 0.0, "aggregates": None}
+_view_lock = threading.Lock()
+
+def ingested_aggregates(path: Path = CHECKPOINT_PATH, max_age: float = REDDIT_INGEST_STALE_SECONDS,
+                        recheck: float = 30) -> Optional[RollingAggregates]:
+    """
+    Aggregates from the ingester's latest checkpoint, reloaded when the file
+    changes (checked at most every `recheck` seconds). None when there is no
+    checkpoint or it is older than max_age, i.e. the ingester is not running.
+    """
+    now = time.time()
+    with _view_lock:
+        if now - _view["checked"] >= recheck:
+            _view["checked"] = now
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                mtime = None
+            if mtime is None or now - mtime > max_age:
+                _view["mtime"], _view["aggregates"] = mtime, None
+            elif mtime != _view["mtime"]:
+                data = _read_checkpoint(path)
+                _view["mtime"] = mtime
+                _view["aggregates"] = RollingAggregates.from_dict(data) if data else None
+        return _view["aggregates"]
+
+
+if __name__ == "__main__":
+    ingester = RedditIngester()
+    signal.signal(signal.SIGTERM, lambda *_: ingester.stop())
+    try:
+        ingester.run()
+    except KeyboardInterrupt:
+        ingester.stop()
+        ingester.checkpoint()
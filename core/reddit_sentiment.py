@@ -6,16 +6,24 @@ and weighted bias & reliability index.
 """
 
 import os
-import re
 import time
 import webbrowser
 import statistics
-from math import log1p
+from concurrent.futures import ThreadPoolExecutor, wait
+from math import ceil, log1p
 import praw
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from dotenv import load_dotenv
 from pathlib import Path
-from config.settings import PROJECT_ROOT
+from config.settings import (
+    PROJECT_ROOT, REDDIT_FETCH_WORKERS, REDDIT_DEADLINE,
+    REDDIT_COMMENT_BUDGET, REDDIT_COMMENTS_PER_POST, REDDIT_COMMENT_WEIGHT, REDDIT_CURSOR_OVERLAP_SECONDS,
+    REDDIT_MIN_POST_SCORE
+)
+from core.reddit_ingester import ingested_aggregates
+from core.reddit_store import post_store
+from utils.quota_manager import quota_manager, QuotaExceeded
+from utils.ticker_matcher import ticker_matcher
 
 # ---------- Load Reddit credentials ----------
 def load_reddit_credentials():
@@ -60,6 +68,10 @@ SUBREDDITS = ["investing", "stocks", "StockMarket", "wallstreetbets"]
 WEIGHTS = {"investing": 1.0, "stocks": 0.9, "StockMarket": 0.8, "wallstreetbets": 0.5}
 CACHE_TTL = 3600
 DAYS = 14
+QUALITY_KEYWORDS = ["dd", "earnings", "guidance", "undervalued", "buyback", "forecast", "results"]
+
+# Bounded pool shared by every summary; praw calls are network-bound
+_reddit_executor = ThreadPoolExecutor(max_workers=REDDIT_FETCH_WORKERS, thread_name_prefix="investo-reddit")
 
 
 # ---------- Utility functions ----------
@@ -76,84 +88,322 @@ def normalize(value, low, high):
     return max(0, min(1, (value - low) / (high - low))) if high != low else 0.5
 
 
+# ---------- Reddit fetching ----------
+def time_filter_for(days):
+    """Narrowest Reddit search time_filter that still covers the last `days` days"""
+    for filter_days, name in ((1, "day"), (7, "week"), (31, "month"), (365, "year")):
+        if days <= filter_days:
+            return name
+    return "all"
+
+
+def _search_subreddits(subreddits, ticker, limit, since, stop_at, posts, newest):
+    """
+    Search all subreddits with one multireddit query (e.g. r/investing+stocks)
+    and append upvoted (subreddit, post) matches newer than since[subreddit]
+    to posts as they arrive, so a caller that stops waiting keeps what was
+    found. newest collects the newest post time listed per subreddit.
+
+    Returns the time down to which the listing is complete: the oldest
+    cutoff when it reached min(since) or ran out of results, or the oldest
+    post listed when ``limit`` cut it off first. Returns None if stop_at cut
+    the listing short.
+    """
+    names = {sub.lower(): sub for sub in subreddits}
+    oldest_needed = min(since.values())
+    multireddit = reddit.subreddit("+".join(subreddits))
+    # One Reddit API call per 100 listing results
+    quota_manager.acquire("reddit", cost=ceil(limit / 100))
+    # The time filter drops old posts server-side; the exact cutoffs are applied below
+    time_filter = time_filter_for((time.time() - oldest_needed) / 86400)
+    listed, oldest_listed = 0, None
+    for post in multireddit.search(ticker, limit=limit, sort="new", time_filter=time_filter):
+        if time.monotonic() > stop_at:
+            return None
+        if post.created_utc < oldest_needed:
+            return oldest_needed  # Sorted by new: everything further down was ingested already
+        listed += 1
+        oldest_listed = post.created_utc
+        sub = post.subreddit.display_name
+        sub = names.get(sub.lower(), sub)
+        newest[sub] = max(newest.get(sub, 0), post.created_utc)
+        if post.created_utc < since.get(sub, oldest_needed):
+            continue
+        if post.score < REDDIT_MIN_POST_SCORE:
+            continue
+        if not ticker_matcher.contains((post.title or "") + " " + (post.selftext or ""), ticker):
+            continue
+        posts.append((sub, post))
+    # A full page of results may have stopped short of the cutoff
+    return oldest_listed if limit and listed >= limit else oldest_needed
+
+
+def _fetch_comments(post, count=REDDIT_COMMENTS_PER_POST):
+    """Bodies of a post's first top-level comments (one API round-trip)"""
+    quota_manager.acquire("reddit")
+    post.comments.replace_more(limit=0)
+    return [c.body for c in post.comments[:count]]
+
+
 # ---------- Main sentiment summary ----------
-def get_reddit_sentiment_summary(ticker, subreddits=SUBREDDITS, limit=200, days=DAYS):
-    """Perform comprehensive Reddit sentiment analysis for a ticker"""
+def blend_sentiment(title_score, body_score, comment_score=None):
+    """
+    Blend title, body and (when fetched) comment polarity into one score in [-1, 1].
+    Comments take REDDIT_COMMENT_WEIGHT of the score; without them the
+    original 60/40 title/body split applies.
+    """
+    sentiment = 0.6 * title_score + 0.4 * body_score
+    if comment_score is not None:
+        sentiment = (1 - REDDIT_COMMENT_WEIGHT) * sentiment + REDDIT_COMMENT_WEIGHT * comment_score
+    return max(-1, min(1, sentiment))
+
+
+def has_quality_keywords(text):
+    text = text.lower()
+    return any(kw in text for kw in QUALITY_KEYWORDS)
+
+
+def _score_post(sub, post, ticker, stored):
+    """
+    Post record for the store. Title and body are scored with VADER only the
+    first time a post is seen; afterwards only the score snapshot changes.
+    """
+    if stored:
+        return dict(stored, score=post.score, tickers=stored["tickers"] | {ticker})
+    return {
+        "post_id": post.id,
+        "subreddit": sub,
+        "created_utc": post.created_utc,
+        "title": (post.title or "")[:120],
+        "permalink": post.permalink,
+        "score": post.score,
+        "title_sentiment": analyzer.polarity_scores(post.title or "")["compound"],
+        "body_sentiment": analyzer.polarity_scores(post.selftext or "")["compound"],
+        "comment_sentiment": None,
+        "comments_scored": 0,
+        "quality_flag": has_quality_keywords((post.title or "") + " " + (post.selftext or "")),
+        "tickers": {ticker},
+    }
+
+
+def _apply_comments(record, comments):
+    """
+    Fold newly fetched comments into a post record. A post without comments
+    is stored as checked (neutral, comments_scored 0) so it is not refetched.
+    """
+    record["comment_sentiment"] = (statistics.mean(analyzer.polarity_scores(c)["compound"] for c in comments)
+                                   if comments else 0.0)
+    record["comments_scored"] = len(comments)
+    record["quality_flag"] = record["quality_flag"] or has_quality_keywords(" ".join(comments))
+
+
+def record_sentiment(record):
+    # Checked posts with no comments keep the plain title/body score
+    comment_score = record["comment_sentiment"] if record["comments_scored"] else None
+    return blend_sentiment(record["title_sentiment"], record["body_sentiment"], comment_score)
+
+
+def record_weight(record):
+    return WEIGHTS.get(record["subreddit"], 0.7) * log1p(max(record["score"], 0))
+
+
+def week_over_week(ticker, now=None):
+    """
+    Real momentum inputs from the daily series: mentions and weighted
+    sentiment for the last 7 UTC days (today included) and the 7 before.
+    """
+    now = now or time.time()
+    this_week = post_store.window(ticker, now - 6 * 86400, now + 86400)
+    last_week = post_store.window(ticker, now - 13 * 86400, now - 6 * 86400)
+    return this_week, last_week
+
+
+def get_reddit_sentiment_summary(ticker, subreddits=SUBREDDITS, limit=200, days=DAYS, deadline=REDDIT_DEADLINE,
+                                 comment_budget=REDDIT_COMMENT_BUDGET):
+    """
+    Perform comprehensive Reddit sentiment analysis for a ticker.
+
+    Reddit is read incrementally: per-subreddit cursors in ``post_store``
+    remember the newest post already ingested for the ticker, so a single
+    multireddit search only lists posts newer than that (with
+    REDDIT_CURSOR_OVERLAP_SECONDS of overlap so young posts that gain
+    upvotes are picked up), capped at ``limit`` posts within the last
+    ``days`` days. A cursor only advances once the listing has reached it;
+    if ``limit`` cut the listing off first, the cursor stays put so the gap
+    is listed again next time. Every scored post is kept per post id, so posts seen by
+    an earlier analysis (of any ticker) are never re-scored, and the
+    summary covers every stored post for the ticker in the window, each
+    weighted by the subreddit it came from.
+
+    Comments cost one API call per post, so they are only fetched for the
+    ``comment_budget`` highest-scored posts that have none yet (0 skips
+    them), concurrently on a shared pool, and they feed those posts'
+    sentiment. Everything runs within ``deadline`` seconds. Whatever has not
+    finished by then is left out, and the result is marked ``partial`` with
+    the unfinished stages under ``timed_out`` and the number of budgeted
+    posts scored without their comments under ``comments_missing``. Running
+    out of Reddit quota (QuotaExceeded) is reported the same way. Partial
+    results are not cached and do not advance the cursors.
+
+    Each newly matched post is added to the ticker's daily series, and
+    ``sentiment_momentum`` and ``buzz_ratio`` compare this week with the
+    previous one from that series.
+
+    When the streaming ingester (core.reddit_ingester) is running and has
+    seen the ticker, its rolling aggregates are returned instead and no
+    Reddit request is made.
+    """
+    ticker = ticker.upper()
+    aggregates = ingested_aggregates()
+    if aggregates is not None:
+        streamed = aggregates.summary(ticker, days)
+        if streamed is not None:
+            return streamed
+
     if not reddit or not analyzer:
         return {"ticker": ticker, "summary": "Reddit API not available"}
 
-    ticker = ticker.upper()
     if ticker in _cache and (time.time() - _cache[ticker]["timestamp"] < CACHE_TTL):
         return _cache[ticker]["data"]
 
-    pattern = re.compile(rf"\b{re.escape(ticker)}\b", re.IGNORECASE)
-    total_score, total_weight, mentions = 0.0, 0.0, 0
-    sentiments, sub_counts, posts_data = [], {}, []
-
-    for sub in subreddits:
+    stop_at = time.monotonic() + deadline
+    window_start = time.time() - days * 86400
+    cursors = post_store.get_cursors(ticker)
+    since = {sub: max(window_start, cursors.get(sub, 0) - REDDIT_CURSOR_OVERLAP_SECONDS) for sub in subreddits}
+
+    found, newest, timed_out = [], {}, []
+    search = _reddit_executor.submit(_search_subreddits, subreddits, ticker, limit, since, stop_at,
+                                     found, newest)
+    wait([search], timeout=deadline)
+    if not search.done():
+        search.cancel()
+        timed_out.append("search")
+    else:
         try:
-            subreddit = reddit.subreddit(sub)
-            for post in subreddit.search(ticker, limit=limit, sort="new"):
-                if time.time() - post.created_utc > days * 86400:
-                    continue
-                if post.score < 5:
-                    continue
-
-                text = (post.title or "") + " " + (post.selftext or "")
-                if not re.search(pattern, text):
-                    continue
-
-                try:
-                    post.comments.replace_more(limit=0)
-                    for c in post.comments[:2]:
-                        text += " " + c.body
-                except Exception:
-                    pass
-
-                title_score = analyzer.polarity_scores(post.title)["compound"]
-                body_score = analyzer.polarity_scores(post.selftext)["compound"]
-                sentiment = 0.6 * title_score + 0.4 * body_score
-                sentiment = max(-1, min(1, sentiment))
-
-                keywords = ["dd", "earnings", "guidance", "undervalued", "buyback", "forecast", "results"]
-                quality_flag = any(kw in text.lower() for kw in keywords)
-
-                weight = WEIGHTS.get(sub, 0.7) * log1p(post.score)
-                total_score += sentiment * weight
-                total_weight += weight
-                sentiments.append(sentiment)
-                mentions += 1
-                sub_counts[sub] = sub_counts.get(sub, 0) + 1
-
-                posts_data.append({
-                    "sub": sub,
-                    "title": post.title[:120],
-                    "score": post.score,
-                    "sentiment": sentiment,
-                    "quality_flag": quality_flag,
-                    "url": f"https://www.reddit.com{post.permalink}"
-                })
+            covered_to = search.result()
+            if covered_to is None:
+                timed_out.append("search")
+            else:
+                # Only subreddits listed all the way back to their cutoff may move on;
+                # the others keep their cursor so the gap is searched next time
+                post_store.advance_cursors(ticker, {sub: ts for sub, ts in newest.items()
+                                                    if since.get(sub, 0) >= covered_to})
+        except QuotaExceeded as e:
+            # Out of Reddit quota: answer from stored posts, marked partial
+            print(f"Skipping Reddit search for {ticker}: {e}")
+            timed_out.append("search")
         except Exception as e:
-            print(f"Error processing subreddit {sub}: {e}")
+            print(f"Error searching {'+'.join(subreddits)}: {e}")
+
+    # Fresh listings update stored posts; the rest of the window comes from the store
+    matched = {post.id: (sub, post) for sub, post in found}
+    stored = post_store.get_many(matched)
+    window = {p["post_id"]: p for p in post_store.posts_for_ticker(ticker, window_start)}
+    new_mentions = []
+    for post_id, (sub, post) in matched.items():
+        previous = stored.get(post_id)
+        record = _score_post(sub, post, ticker, previous)
+        if previous is None or ticker not in previous["tickers"]:
+            new_mentions.append(record)
+        window[post_id] = record
+
+    needs_comments = [r for r in window.values() if r["comment_sentiment"] is None]
+    top_posts = sorted(needs_comments, key=lambda r: r["score"], reverse=True)[:max(0, comment_budget)]
+    comment_futures = {
+        r["post_id"]: _reddit_executor.submit(
+            _fetch_comments, matched[r["post_id"]][1] if r["post_id"] in matched else reddit.submission(id=r["post_id"]))
+        for r in top_posts
+    }
+    wait(comment_futures.values(), timeout=max(0, stop_at - time.monotonic()))
+
+    comments_missing = 0
+    touched = dict.fromkeys(matched)
+    for post_id, future in comment_futures.items():
+        if not future.done():
+            future.cancel()
+            comments_missing += 1
+            continue
+        try:
+            comments = future.result()
+        except QuotaExceeded:
+            comments_missing += 1
             continue
+        except Exception:
+            continue
+        _apply_comments(window[post_id], comments)
+        touched[post_id] = None
+
+    try:
+        post_store.upsert(window[post_id] for post_id in touched)
+        post_store.record_mentions(ticker, ((r["created_utc"], record_sentiment(r), record_weight(r))
+                                            for r in new_mentions))
+    except Exception as e:
+        print(f"Error saving scored Reddit posts: {e}")
+
+    total_score, total_weight, mentions = 0.0, 0.0, 0
+    sentiments, sub_counts, posts_data = [], {}, []
+
+    for record in window.values():
+        sub = record["subreddit"]
+        sentiment = record_sentiment(record)
+        weight = record_weight(record)
+        total_score += sentiment * weight
+        total_weight += weight
+        sentiments.append(sentiment)
+        mentions += 1
+        sub_counts[sub] = sub_counts.get(sub, 0) + 1
+
+        posts_data.append({
+            "sub": sub,
+            "title": record["title"],
+            "score": record["score"],
+            "sentiment": sentiment,
+            "quality_flag": record["quality_flag"],
+            "comments_scored": record["comments_scored"],
+            "url": f"https://www.reddit.com{record['permalink']}"
+        })
+
+    partial = bool(timed_out or comments_missing)
+    if partial:
+        print(f"Reddit summary for {ticker} hit the {deadline}s deadline; "
+              f"unfinished: {timed_out}, posts without comments: {comments_missing}")
 
     if not mentions:
-        return {"ticker": ticker, "summary": f"No relevant Reddit posts found for {ticker}."}
+        return {"ticker": ticker, "summary": f"No relevant Reddit posts found for {ticker}.",
+                "partial": partial, "timed_out": timed_out}
 
     avg_sent = total_score / total_weight if total_weight else 0
     std_dev = statistics.pstdev(sentiments) if len(sentiments) > 1 else 0
-    verdict = classify_sentiment(avg_sent)
+    result = compose_summary(
+        ticker, mentions, avg_sent, std_dev, sub_counts,
+        quality_count=sum(1 for p in posts_data if p["quality_flag"]),
+        score_sum=sum(p["score"] for p in posts_data),
+        top_posts=sorted(posts_data, key=lambda x: x["score"], reverse=True)[:3],
+        weeks=week_over_week(ticker),
+    )
+    result.update({"partial": partial, "timed_out": timed_out, "comments_missing": comments_missing})
+
+    if not partial:
+        _cache[ticker] = {"timestamp": time.time(), "data": result}
+    return result
+
 
-    # Week-over-week proxies
-    last_week_avg = avg_sent * 0.75
-    last_week_mentions = mentions * 0.8
-    sentiment_momentum = (avg_sent - last_week_avg) / abs(last_week_avg) if abs(last_week_avg) > 0.001 else 0
-    buzz_ratio = mentions / last_week_mentions if last_week_mentions else 1
+def compose_summary(ticker, mentions, avg_sent, std_dev, sub_counts, quality_count, score_sum, top_posts, weeks):
+    """
+    Turn window aggregates into the summary dict shared by the live search
+    and the streaming ingester. weeks is (this_week, last_week), each with
+    ``mentions`` and ``avg_sentiment``.
+    """
+    this_week, last_week = weeks
+    last_week_avg = last_week["avg_sentiment"]
+    sentiment_momentum = ((this_week["avg_sentiment"] - last_week_avg) / abs(last_week_avg)
+                          if abs(last_week_avg) > 0.001 else 0)
+    buzz_ratio = this_week["mentions"] / last_week["mentions"] if last_week["mentions"] else 1
 
     # Reliability, quality, engagement
     reliability_weight = sum(WEIGHTS.get(s, 0.7) * c for s, c in sub_counts.items()) / max(1, mentions)
-    dd_quality_ratio = sum(1 for p in posts_data if p["quality_flag"]) / max(1, mentions)
-    engagement_norm = normalize(sum(p["score"] for p in posts_data) / max(1, mentions), 10, 1000)
+    dd_quality_ratio = quality_count / max(1, mentions)
+    engagement_norm = normalize(score_sum / max(1, mentions), 10, 1000)
 
     sentiment_norm = normalize(avg_sent, -1, 1)
     buzz_norm = normalize(buzz_ratio, 0.5, 3)
@@ -174,7 +424,7 @@ def get_reddit_sentiment_summary(ticker, subreddits=SUBREDDITS, limit=200, days=
                          dd_quality_ratio * 0.4 +
                          min(1, mentions / 30) * 0.1) * 100
 
-    result = {
+    return {
         "ticker": ticker,
         "mentions": mentions,
         "avg_sentiment": round(avg_sent, 3),
@@ -189,12 +439,9 @@ def get_reddit_sentiment_summary(ticker, subreddits=SUBREDDITS, limit=200, days=
         "reddit_score": round(reddit_score, 1),
         "verdict": score_verdict,
         "subreddit_breakdown": sub_counts,
-        "top_posts": sorted(posts_data, key=lambda x: x["score"], reverse=True)[:3]
+        "top_posts": top_posts,
     }
 
-    _cache[ticker] = {"timestamp": time.time(), "data": result}
-    return result
-
 
 # ---------- HTML report generator (REMOVED) ----------
 # Individual Reddit reports are no longer generated
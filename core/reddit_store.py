@@ -0,0 +1,200 @@
+"""
+Reddit post store
+-----------------
+Durable per-post sentiment keyed by Reddit post id.
+
+Hot posts come back for many tickers and many requests, so their VADER
+scores, comment sentiment and matched tickers are computed once and kept
+in a local SQLite database shared by every worker. Only the score snapshot
+is refreshed when a post is seen again.
+
+The same database holds per-ticker, per-subreddit search cursors, so each
+analysis only fetches posts newer than the last one, and a compact daily
+time series of mentions and weighted sentiment per ticker that outlives
+the posts themselves and feeds week-over-week momentum and buzz.
+"""
+
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from config.settings import PROJECT_ROOT, REDDIT_POST_RETENTION_DAYS, REDDIT_DAILY_RETENTION_DAYS
+from utils.sqlite_store import SQLiteStore
+
+
+def day_of(timestamp: float) -> str:
+    """UTC calendar day (YYYY-MM-DD) of a Unix timestamp"""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class PostStore(SQLiteStore):
+    """Scored Reddit posts, search cursors and daily per-ticker aggregates"""
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS posts (
+            post_id TEXT PRIMARY KEY,
+            subreddit TEXT NOT NULL,
+            created_utc REAL NOT NULL,
+            title TEXT NOT NULL,
+            permalink TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            title_sentiment REAL NOT NULL,
+            body_sentiment REAL NOT NULL,
+            comment_sentiment REAL,
+            comments_scored INTEGER NOT NULL DEFAULT 0,
+            quality_flag INTEGER NOT NULL DEFAULT 0,
+            tickers TEXT NOT NULL DEFAULT '',
+            scored_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_posts_created ON posts (created_utc);
+        CREATE TABLE IF NOT EXISTS cursors (
+            ticker TEXT NOT NULL,
+            subreddit TEXT NOT NULL,
+            newest_utc REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (ticker, subreddit)
+        );
+        CREATE TABLE IF NOT EXISTS ticker_daily (
+            ticker TEXT NOT NULL,
+            day TEXT NOT NULL,
+            mentions INTEGER NOT NULL DEFAULT 0,
+            sentiment_sum REAL NOT NULL DEFAULT 0,
+            weight_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (ticker, day)
+        );
+    """
+    BATCH_SIZE = 500
+
+    def __init__(self, db_path: Optional[Path] = None, retention_days: int = REDDIT_POST_RETENTION_DAYS):
+        super().__init__(db_path or (PROJECT_ROOT / "cache" / "reddit_posts.db"))
+        self.retention_days = retention_days
+
+    @staticmethod
+    def _row(row) -> dict:
+        post = dict(row)
+        post["tickers"] = set(filter(None, post["tickers"].split(",")))
+        post["quality_flag"] = bool(post["quality_flag"])
+        return post
+
+    def get_many(self, post_ids: Iterable[str]) -> Dict[str, dict]:
+        """Stored posts by id; unknown ids are left out"""
+        post_ids = list(post_ids)
+        found = {}
+        for i in range(0, len(post_ids), self.BATCH_SIZE):
+            batch = post_ids[i:i + self.BATCH_SIZE]
+            rows = self.conn.execute(
+                f"SELECT * FROM posts WHERE post_id IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            for row in rows:
+                found[row["post_id"]] = self._row(row)
+        return found
+
+    def upsert(self, posts: Iterable[dict]) -> None:
+        """
+        Insert or refresh posts. Matched tickers are merged with those already
+        stored, and stored comment sentiment is kept unless new comments were scored.
+        """
+        now = time.time()
+        rows = [(
+            p["post_id"], p["subreddit"], p["created_utc"], p["title"], p["permalink"], p["score"],
+            p["title_sentiment"], p["body_sentiment"], p.get("comment_sentiment"),
+            p.get("comments_scored", 0), int(bool(p.get("quality_flag"))),
+            ",".join(sorted(p.get("tickers") or ())), p.get("scored_at", now), now,
+        ) for p in posts]
+        if not rows:
+            return
+        with self.transaction() as conn:
+            existing = {}
+            ids = [r[0] for r in rows]
+            for i in range(0, len(ids), self.BATCH_SIZE):
+                batch = ids[i:i + self.BATCH_SIZE]
+                for row in conn.execute(
+                    f"SELECT post_id, tickers FROM posts WHERE post_id IN ({','.join('?' * len(batch))})", batch
+                ):
+                    existing[row["post_id"]] = set(filter(None, row["tickers"].split(",")))
+            merged = []
+            for r in rows:
+                tickers = set(filter(None, r[11].split(","))) | existing.get(r[0], set())
+                merged.append(r[:11] + (",".join(sorted(tickers)),) + r[12:])
+            conn.executemany(
+                """INSERT INTO posts (post_id, subreddit, created_utc, title, permalink, score,
+                                      title_sentiment, body_sentiment, comment_sentiment,
+                                      comments_scored, quality_flag, tickers, scored_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (post_id) DO UPDATE SET
+                       score = excluded.score,
+                       comment_sentiment = COALESCE(excluded.comment_sentiment, posts.comment_sentiment),
+                       comments_scored = MAX(excluded.comments_scored, posts.comments_scored),
+                       quality_flag = MAX(excluded.quality_flag, posts.quality_flag),
+                       tickers = excluded.tickers,
+                       updated_at = excluded.updated_at""",
+                merged
+            )
+            conn.execute("DELETE FROM posts WHERE created_utc < ?", (now - self.retention_days * 86400,))
+
+    def posts_for_ticker(self, ticker: str, since: float) -> list:
+        """Stored posts created after since that matched ticker"""
+        rows = self.conn.execute(
+            "SELECT * FROM posts WHERE created_utc >= ? AND (',' || tickers || ',') LIKE ?",
+            (since, f"%,{ticker},%")
+        ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def get_cursors(self, ticker: str) -> Dict[str, float]:
+        """Newest post time already ingested for ticker, per subreddit"""
+        rows = self.conn.execute("SELECT subreddit, newest_utc FROM cursors WHERE ticker = ?", (ticker,))
+        return {row["subreddit"]: row["newest_utc"] for row in rows}
+
+    def advance_cursors(self, ticker: str, newest: Dict[str, float]) -> None:
+        """Move cursors forward (never back) to the newest post time seen per subreddit"""
+        now = time.time()
+        with self.transaction() as conn:
+            conn.executemany(
+                """INSERT INTO cursors (ticker, subreddit, newest_utc, updated_at) VALUES (?, ?, ?, ?)
+                   ON CONFLICT (ticker, subreddit) DO UPDATE SET
+                       newest_utc = MAX(newest_utc, excluded.newest_utc), updated_at = excluded.updated_at""",
+                [(ticker, sub, ts, now) for sub, ts in newest.items()]
+            )
+
+    def record_mentions(self, ticker: str, mentions: Iterable[tuple]) -> None:
+        """Add (created_utc, sentiment, weight) mentions of ticker to its daily series"""
+        daily = {}
+        for created_utc, sentiment, weight in mentions:
+            day = daily.setdefault(day_of(created_utc), [0, 0.0, 0.0])
+            day[0] += 1
+            day[1] += sentiment * weight
+            day[2] += weight
+        if not daily:
+            return
+        with self.transaction() as conn:
+            conn.executemany(
+                """INSERT INTO ticker_daily (ticker, day, mentions, sentiment_sum, weight_sum) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (ticker, day) DO UPDATE SET
+                       mentions = mentions + excluded.mentions,
+                       sentiment_sum = sentiment_sum + excluded.sentiment_sum,
+                       weight_sum = weight_sum + excluded.weight_sum""",
+                [(ticker, day, *totals) for day, totals in daily.items()]
+            )
+            conn.execute("DELETE FROM ticker_daily WHERE day < ?",
+                         (day_of(time.time() - REDDIT_DAILY_RETENTION_DAYS * 86400),))
+
+    def window(self, ticker: str, start: float, end: float) -> dict:
+        """Mentions and weighted average sentiment for the UTC days in [start, end)"""
+        row = self.conn.execute(
+            """SELECT COALESCE(SUM(mentions), 0) AS mentions, COALESCE(SUM(sentiment_sum), 0) AS s,
+                      COALESCE(SUM(weight_sum), 0) AS w
+               FROM ticker_daily WHERE ticker = ? AND day >= ? AND day < ?""",
+            (ticker, day_of(start), day_of(end))
+        ).fetchone()
+        return {"mentions": row["mentions"], "avg_sentiment": row["s"] / row["w"] if row["w"] else 0.0}
+
+    def get_info(self) -> dict:
+        row = self.conn.execute("SELECT COUNT(*) AS n, MIN(created_utc) AS oldest FROM posts").fetchone()
+        tickers = self.conn.execute("SELECT COUNT(DISTINCT ticker) FROM ticker_daily").fetchone()[0]
+        return {"db_path": str(self.db_path), "posts": row["n"], "oldest_created_utc": row["oldest"],
+                "tickers_tracked": tickers}
+
+
+# Global post store instance
+post_store = PostStore()
@@ -0,0 +1,292 @@
+"""
+Universe screener
+-----------------
+Runs the Graham combined test, the net-net buy test and the Lynch thresholds
+over a whole universe of tickers (a list in config/universes/ or a custom
+list) and returns ranked, filtered, paginated results.
+
+Screens read fundamentals from the cache only, so they never wait on an
+upstream API. Tickers with nothing cached are listed as missing; fill them
+with ``python -m core.screener <universe> --warm``, which fetches through
+the batch get_stock_packages API.
+
+Universes shipped: dow30 and sp500. There is no Russell 2000 list; screen
+one with a custom list (``--symbols`` or ``?symbols=``) or add
+``config/universes/russell2000.txt``.
+"""
+
+import argparse
+import json
+import math
+import re
+import time
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+import numpy as np
+import pandas as pd
+from config.settings import UNIVERSES_DIR, SCREEN_PAGE_SIZE, SCREEN_MAX_PAGE_SIZE
+from core.data_sources import get_full_stock_data, get_stock_packages
+from core.graham_analysis import graham_metrics_frame
+from core.lynch_analysis import lynch_metrics_frame
+from core.metric_frame import Columns, to_python
+from utils.cache_manager import cache
+from utils.helpers import is_valid_ticker
+from utils.ticker_matcher import load_symbols
+
+# Lynch rules of thumb, as checked in the combined report: (operator, threshold)
+LYNCH_THRESHOLDS = {
+    "P/E": ("<", 15),
+    "PEG": ("<", 1.0),
+    "EPS_Growth_%": (">", 15),
+    "ROE_%": (">", 15),
+    "Debt/Equity": ("<", 0.5),
+    "Current_Ratio": (">", 2.0),
+    "Price/Book": ("<", 1.5),
+    "Price/Sales": ("<", 1.0),
+}
+
+# Query names of numeric fields, usable as min_<name>, max_<name> and sort=<name>
+FIELDS = {
+    "pe": "P/E",
+    "pb": "P/B",
+    "peg": "PEG",
+    "growth": "EPS_Growth_%",
+    "debt_equity": "Debt/Equity",
+    "current_ratio": "Current_Ratio",
+    "dividend_yield": "Dividend_Yield_%",
+    "roe": "ROE_%",
+    "price_to_sales": "Price/Sales",
+    "margin_of_safety": "Margin_of_Safety_%",
+    "expected_return": "Expected_Return_%",
+    "market_cap": "marketCap",
+    "price": "price",
+    "lynch_score": "Lynch_Score",
+}
+
+# Query names of pass/fail tests, usable as <name>=1 or <name>=0
+FLAGS = {
+    "graham": "Graham_Combined_Test",
+    "netnet": "NetNet_Buy_Candidate",
+    "peg_under_1": "Lynch_PEG_Test",
+}
+
+# Default ranking: Graham passes first, then net-nets, Lynch score, expected return
+RANK_ORDER = ["Graham_Combined_Test", "NetNet_Buy_Candidate", "Lynch_Score", "Expected_Return_%"]
+
+RESULT_COLUMNS = [
+    "shortName", "sector", "industry", "price", "marketCap",
+    "P/E", "P/B", "PEG", "EPS_Growth_%", "Debt/Equity", "Current_Ratio", "Dividend_Yield_%",
+    "ROE_%", "Price/Sales", "Margin_of_Safety_%", "Expected_Return_%",
+    "Graham_Combined_Test", "NetNet_Buy_Candidate", "Lynch_PEG_Test", "Lynch_Score", "fetched_at",
+]
+
+UNIVERSE_NAME = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def list_universes() -> List[str]:
+    """Names of the universes shipped in config/universes"""
+    return sorted(path.stem for path in UNIVERSES_DIR.glob("*.txt"))
+
+
+def load_universe(name: str) -> List[str]:
+    """Symbols of a named universe; raises KeyError if there is no such list"""
+    path = UNIVERSES_DIR / f"{name}.txt"
+    if not UNIVERSE_NAME.fullmatch(name or "") or not path.is_file():
+        raise KeyError(name)
+    return sorted(load_symbols(path))
+
+
+def parse_symbols(text: str) -> List[str]:
+    """A custom universe from a comma- or space-separated list"""
+    symbols = {s.strip().upper() for s in re.split(r"[,\s]+", text or "") if s.strip()}
+    invalid = sorted(s for s in symbols if not is_valid_ticker(s))
+    if invalid:
+        raise ValueError(f"Invalid ticker symbols: {', '.join(invalid)}")
+    return sorted(symbols)
+
+
+def cached_fundamentals(symbols: Iterable[str]) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Cached get_full_stock_data results as one row per symbol, plus the symbols
+    with nothing cached. Never calls upstream.
+    """
+    symbols = list(symbols)
+    keys = {get_full_stock_data.cache_key(symbol): symbol for symbol in symbols}
+    entries = cache.get_many(keys)
+    rows, found, missing = [], [], []
+    for key, symbol in keys.items():
+        entry = entries.get(key)
+        if entry and entry.get("value"):
+            rows.append({**entry["value"], "fetched_at": entry["fetched_at"]})
+            found.append(symbol)
+        else:
+            missing.append(symbol)
+    return pd.DataFrame(rows, index=pd.Index(found, name="symbol")), missing
+
+
+def screen_frame(fundamentals: pd.DataFrame) -> pd.DataFrame:
+    """Graham and Lynch metrics plus screen flags for every row of fundamentals"""
+    columns = Columns(fundamentals)   # raw fields are converted once for both metric sets
+    graham = graham_metrics_frame(columns)
+    lynch = lynch_metrics_frame(columns)
+    metrics = pd.concat([graham, lynch.drop(columns=graham.columns.intersection(lynch.columns))], axis=1)
+
+    passes = []
+    for name, (op, threshold) in LYNCH_THRESHOLDS.items():
+        values = metrics[name].to_numpy(dtype=float)
+        passes.append(values < threshold if op == "<" else values > threshold)
+    metrics["Lynch_PEG_Test"] = passes[list(LYNCH_THRESHOLDS).index("PEG")]
+    metrics["Lynch_Score"] = np.sum(passes, axis=0) if passes else 0
+    for name in ("shortName", "fetched_at"):
+        metrics[name] = fundamentals[name] if name in fundamentals else None
+    return metrics[RESULT_COLUMNS]
+
+
+def parse_filters(args: Mapping[str, str]) -> Dict[str, object]:
+    """
+    Filters from query-style arguments: min_<field>=x, max_<field>=x,
+    <flag>=1|0 and sector=<name>. Raises ValueError on anything else.
+    """
+    filters = {}
+    for name, raw in args.items():
+        if name == "sector":
+            filters["sector"] = raw
+        elif name in FLAGS:
+            if raw.lower() not in ("1", "0", "true", "false", "yes", "no"):
+                raise ValueError(f"{name} must be 1 or 0")
+            filters[name] = raw.lower() in ("1", "true", "yes")
+        elif name[:4] in ("min_", "max_") and name[4:] in FIELDS:
+            try:
+                value = float(raw)
+            except ValueError:
+                raise ValueError(f"{name} must be a number") from None
+            if math.isnan(value):
+                raise ValueError(f"{name} must be a number")
+            filters[name] = value
+        else:
+            raise ValueError(f"Unknown filter: {name}")
+    return filters
+
+
+def apply_filters(metrics: pd.DataFrame, filters: Mapping[str, object]) -> pd.DataFrame:
+    """Rows that pass every filter; a missing value fails min_/max_ filters"""
+    keep = np.ones(len(metrics), dtype=bool)
+    for name, value in filters.items():
+        if name == "sector":
+            keep &= metrics["sector"].fillna("").str.lower().to_numpy() == str(value).lower()
+        elif name in FLAGS:
+            keep &= metrics[FLAGS[name]].fillna(False).to_numpy(dtype=bool) == value
+        else:
+            column = metrics[FIELDS[name[4:]]].to_numpy(dtype=float)
+            keep &= column >= value if name.startswith("min_") else column <= value
+    return metrics[keep]
+
+
+def rank(metrics: pd.DataFrame, sort: str = "rank", descending: bool = True) -> pd.DataFrame:
+    """Order rows by the default ranking, a FIELDS name or 'symbol'; missing values last"""
+    if sort == "rank":
+        keys = metrics[RANK_ORDER].astype(float)
+        return metrics.iloc[np.lexsort([np.nan_to_num(-keys[c].to_numpy(), nan=np.inf)
+                                        for c in reversed(RANK_ORDER)])]
+    if sort == "symbol":
+        return metrics.sort_index(ascending=not descending)
+    if sort not in FIELDS:
+        raise ValueError(f"Unknown sort field: {sort}")
+    return metrics.sort_values(FIELDS[sort], ascending=not descending, na_position="last", kind="stable")
+
+
+def screen(symbols: Iterable[str], filters: Optional[Mapping[str, object]] = None, sort: str = "rank",
+           descending: bool = True, page: int = 1, page_size: int = SCREEN_PAGE_SIZE) -> dict:
+    """
+    Screen symbols from cached fundamentals: filter, rank and return one page.
+    Raises ValueError on an unknown sort field or a bad page.
+    """
+    started = time.time()
+    if page < 1 or not 1 <= page_size <= SCREEN_MAX_PAGE_SIZE:
+        raise ValueError(f"page must be >= 1 and page_size between 1 and {SCREEN_MAX_PAGE_SIZE}")
+    symbols = list(symbols)
+    fundamentals, missing = cached_fundamentals(symbols)
+    metrics = screen_frame(fundamentals) if len(fundamentals) else pd.DataFrame(columns=RESULT_COLUMNS)
+    matches = rank(apply_filters(metrics, filters or {}), sort, descending)
+
+    start = (page - 1) * page_size
+    results = [
+        {"symbol": symbol, **{name: to_python(value) for name, value in row.items()}}
+        for symbol, row in zip(matches.index[start:start + page_size],
+                               matches.iloc[start:start + page_size].to_dict("records"))
+    ]
+    return {
+        "universe_size": len(symbols),
+        "screened": len(metrics),
+        "matches": len(matches),
+        "page": page,
+        "page_size": page_size,
+        "pages": max(1, math.ceil(len(matches) / page_size)),
+        "results": results,
+        "missing": missing,
+        "elapsed_ms": round((time.time() - started) * 1000, 1),
+    }
+
+
+def warm(symbols: Iterable[str]) -> int:
+    """Fetch fundamentals for symbols with nothing cached; returns how many were fetched"""
+    _, missing = cached_fundamentals(symbols)
+    if not missing:
+        return 0
+    packages = get_stock_packages(missing, include_charts=False)
+    return sum(1 for data in packages.values() if data.get("price") is not None or data.get("shortName"))
+
+
+def _print_table(result: dict) -> None:
+    print(f"{'#':>4}  {'Symbol':<7} {'Name':<28} {'Graham':<7} {'NetNet':<7} {'Lynch':>5} "
+          f"{'P/E':>7} {'PEG':>6} {'Exp.Ret%':>9}")
+    offset = (result["page"] - 1) * result["page_size"]
+
+    def num(value, width):
+        return f"{value:>{width}.2f}" if value is not None else f"{'-':>{width}}"
+
+    for i, row in enumerate(result["results"], offset + 1):
+        netnet = {True: "yes", False: "no", None: "-"}[row["NetNet_Buy_Candidate"]]
+        print(f"{i:>4}  {row['symbol']:<7} {(row['shortName'] or '')[:28]:<28} "
+              f"{'PASS' if row['Graham_Combined_Test'] else 'fail':<7} {netnet:<7} {row['Lynch_Score']:>5} "
+              f"{num(row['P/E'], 7)} {num(row['PEG'], 6)} {num(row['Expected_Return_%'], 9)}")
+    print(f"\n{result['matches']} of {result['screened']} screened tickers match "
+          f"(page {result['page']}/{result['pages']}, {result['elapsed_ms']} ms)")
+    if result["missing"]:
+        print(f"No cached fundamentals for {len(result['missing'])} tickers; run with --warm to fetch them")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.screener",
+                                     description="Screen a universe on the Graham and Lynch tests")
+    parser.add_argument("universe", nargs="?", default="dow30",
+                        help=f"Universe name ({', '.join(list_universes()) or 'none found'})")
+    parser.add_argument("--symbols", help="Custom comma-separated list instead of a universe")
+    parser.add_argument("--filter", action="append", default=[], metavar="NAME=VALUE",
+                        help="e.g. graham=1, max_pe=15, min_lynch_score=4, sector=Technology")
+    parser.add_argument("--sort", default="rank", help=f"rank, symbol or one of: {', '.join(FIELDS)}")
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=SCREEN_PAGE_SIZE)
+    parser.add_argument("--warm", action="store_true", help="Fetch fundamentals missing from the cache first")
+    parser.add_argument("--json", action="store_true", help="Print the raw result as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        symbols = parse_symbols(args.symbols) if args.symbols else load_universe(args.universe)
+        filters = parse_filters(dict(f.split("=", 1) if "=" in f else (f, "") for f in args.filter))
+        if args.warm:
+            print(f"Fetched fundamentals for {warm(symbols)} tickers")
+        result = screen(symbols, filters, args.sort, not args.ascending, args.page, args.page_size)
+    except KeyError as e:
+        parser.error(f"Unknown universe {e}; available: {', '.join(list_universes())}")
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        _print_table(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Ticker context module
+---------------------
+Request-scoped access to a single symbol's Yahoo Finance resources.
+
+A TickerContext wraps one ``yf.Ticker`` and lazily fetches and memoizes
+``info``, price ``history``, ``news`` and financial statements, so every
+consumer of one analysis (fundamentals, news, charts) shares a single
+Yahoo session and never downloads the same resource twice.
+"""
+
+import threading
+import pandas as pd
+import yfinance as yf
+
+# Periods that can be served by slicing an already downloaded, longer history
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+STATEMENTS = ("balance_sheet", "income_stmt", "cashflow",
+              "quarterly_balance_sheet", "quarterly_income_stmt", "quarterly_cashflow")
+
+
+class TickerContext:
+    """Lazily fetched, memoized Yahoo Finance data for one symbol"""
+
+    def __init__(self, symbol: str, ticker=None):
+        self.symbol = symbol
+        self._ticker = ticker
+        self._values = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ticker(self):
+        """The single yf.Ticker shared by everything in this context"""
+        with self._lock:
+            if self._ticker is None:
+                self._ticker = yf.Ticker(self.symbol)
+            return self._ticker
+
+    def _memoize(self, key, loader):
+        """Run loader once per key; failures are memoized and re-raised too"""
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self._values:
+                try:
+                    self._values[key] = (True, loader())
+                except Exception as e:
+                    self._values[key] = (False, e)
+        ok, value = self._values[key]
+        if not ok:
+            raise value
+        return value
+
+    def prime(self, key, value):
+        """Seed a resource that was fetched elsewhere (e.g. by a bulk download)"""
+        with self._lock:
+            self._values[key] = (True, value)
+
+    @property
+    def info(self) -> dict:
+        return self._memoize("info", lambda: self.ticker.info or {})
+
+    @property
+    def news(self) -> list:
+        return self._memoize("news", lambda: self.ticker.news or [])
+
+    def history(self, period: str = "1y"):
+        """
+        Price history for a period. A shorter period is sliced from a longer
+        history already held by this context instead of being downloaded again.
+        """
+        key = ("history", period)
+        if key not in self._values and period in PERIOD_OFFSETS:
+            longer = self._longest_cached_history(period)
+            if longer is not None:
+                start = longer.index[-1] - PERIOD_OFFSETS[period]
+                return self._memoize(key, lambda: longer[longer.index >= start])
+        return self._memoize(key, lambda: self.ticker.history(period=period))
+
+    def _longest_cached_history(self, period):
+        wanted = PERIOD_OFFSETS[period]
+        best, best_offset = None, None
+        with self._lock:
+            cached = [(k[1], v) for k, v in self._values.items() if isinstance(k, tuple) and k[0] == "history"]
+        for cached_period, (ok, hist) in cached:
+            offset = PERIOD_OFFSETS.get(cached_period)
+            if not ok or hist is None or hist.empty or offset is None:
+                continue
+            anchor = hist.index[-1]
+            if anchor - offset <= anchor - wanted and (best_offset is None or anchor - offset > anchor - best_offset):
+                best, best_offset = hist, offset
+        return best
+
+    def statement(self, name: str):
+        """Financial statement by yfinance attribute name, e.g. 'balance_sheet'"""
+        if name not in STATEMENTS:
+            raise ValueError(f"Unknown statement: {name}")
+        return self._memoize(("statement", name), lambda: getattr(self.ticker, name))
+
+    @property
+    def balance_sheet(self):
+        return self.statement("balance_sheet")
+
+
+def ticker_context(symbol: str, ctx: TickerContext = None) -> TickerContext:
+    """Return ctx when given, otherwise a fresh context for symbol"""
+    return ctx if ctx is not None else TickerContext(symbol)
@@ -25,7 +25,7 @@ def main():
     
     # Load configuration
     config = load_config()
-    set_api_key(config['FINNHUB_API_KEY'])
+    set_api_key(config['FINNHUB_API_KEYS'] or config['FINNHUB_API_KEY'])
 
     # Interactive ticker input
     print("\nWelcome to Investo - Smart Stock Analysis")
@@ -4,20 +4,61 @@ Combined Report Generator
 Generates comprehensive HTML reports combining Graham, Lynch, and Reddit analyses.
 """
 
+import gzip
+import hashlib
 import os
+import re
+import time
+import uuid
 import webbrowser
 from datetime import datetime
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
-from config.settings import PROJECT_ROOT
+from markupsafe import escape
+from config.settings import PROJECT_ROOT, GENERATED_REPORTS_DIR, REPORT_FRESHNESS_SECONDS, REPORT_PIPELINE_VERSION, STREAM_CHUNK_SIZE
 
-from core.data_sources import get_stock_package
+from core.data_sources import get_stock_package, get_full_stock_data, get_aggregated_news
 from core.graham_analysis import graham_metrics
 from core.lynch_analysis import lynch_metrics
 from core.reddit_sentiment import get_reddit_sentiment_summary
 from core.investment_verdict import combine_investment_verdict
 from reports.report_builder import get_graham_interpretation, get_lynch_interpretation, generate_graham_summary, generate_lynch_summary
+from charts.chart_data import get_chart_data
 from charts.chart_renderer import render_chart_html, get_chart_css
+from reports.templating import get_template
+from utils.single_flight import SingleFlight, file_lock
+from utils.cache_manager import cache
+
+try:
+    import brotli
+except ImportError:  # Optional: reports are still served gzip-compressed
+    brotli = None
+
+# Precompressed variants written next to each report: (suffix, Content-Encoding)
+REPORT_ENCODINGS = [(".br", "br"), (".gz", "gzip")] if brotli else [(".gz", "gzip")]
+
+# Symbols used verbatim in report and lock file names; anything else is hashed
+SAFE_FILE_SYMBOL = re.compile(r"[A-Z0-9][A-Z0-9.\-]{0,15}")
+
+# Closes a streamed page whose analysis could not produce a report
+STREAM_FAILED_HTML = '    <div class="container"><p style="color: var(--red)">{message}</p></div>\n</body>\n</html>\n'
+
+# Concurrent requests for the same symbol share one in-flight report build
+_report_flights = SingleFlight()
+
+# Files whose changes make previously generated reports outdated
+REPORT_INPUT_FILES = [
+    PROJECT_ROOT / "templates" / "combined_template.html",
+    PROJECT_ROOT / "templates" / "combined_head.html",
+    PROJECT_ROOT / "templates" / "verdict_template.html",
+    PROJECT_ROOT / "core" / "graham_analysis.py",
+    PROJECT_ROOT / "core" / "lynch_analysis.py",
+    PROJECT_ROOT / "core" / "metric_frame.py",
+    PROJECT_ROOT / "core" / "investment_verdict.py",
+    PROJECT_ROOT / "core" / "reddit_sentiment.py",
+    PROJECT_ROOT / "reports" / "report_builder.py",
+    PROJECT_ROOT / "charts" / "chart_renderer.py",
+    Path(__file__),
+]
 
 def get_graham_criteria(metric):
     """Get Graham criteria for a metric"""
@@ -147,22 +188,123 @@ def generate_combined_verdict(graham_metrics, lynch_metrics, reddit_data):
     verdict_text = f"{recommendation}. " + " ".join(verdicts)
     return verdict_text
 
-def create_combined_report(symbol):
-    """Create a combined HTML report for a stock symbol"""
+def report_file_id(symbol):
+    """File-name-safe form of symbol: plain tickers as-is, anything else as a hash"""
+    if SAFE_FILE_SYMBOL.fullmatch(symbol):
+        return symbol
+    return "sym-" + hashlib.sha1(symbol.encode("utf-8", "surrogatepass")).hexdigest()[:16]
+
+def get_report_path(symbol):
+    """Path of the latest combined report for a symbol"""
+    return GENERATED_REPORTS_DIR / f"combined_report_{report_file_id(symbol)}.html"
+
+def report_inputs_fetched_at(symbol):
+    """When each cached upstream input of symbol's report was fetched (None when not cached)"""
+    return {
+        "stock": get_full_stock_data.fetched_at(symbol),
+        "news": get_aggregated_news.fetched_at(symbol, max_items=3),
+        "chart": get_chart_data.fetched_at(symbol, "1y"),
+    }
+
+def report_inputs_version(symbol):
+    """
+    Fingerprint of the pipeline version, the templates/modules a report is
+    built from and when the cached data it was built from was fetched
+    """
+    digest = hashlib.sha1(REPORT_PIPELINE_VERSION.encode())
+    for path in REPORT_INPUT_FILES:
+        try:
+            stat = path.stat()
+            digest.update(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+        except OSError:
+            digest.update(f"{path.name}:missing".encode())
+    for name, fetched_at in report_inputs_fetched_at(symbol).items():
+        digest.update(f"{name}:{fetched_at}".encode())
+    return digest.hexdigest()[:16]
+
+def _report_cache_key(symbol):
+    return f"report:{symbol}"
+
+def get_fresh_report(symbol, max_age=REPORT_FRESHNESS_SECONDS):
+    """
+    Path of a cached report still within max_age seconds and built from the
+    current code and the currently cached data, else None
+    """
+    entry = cache.get(_report_cache_key(symbol))
+    if not entry or entry.get("inputs_version") != report_inputs_version(symbol):
+        return None
+    if time.time() - entry.get("generated_at", 0) > max_age:
+        return None
+    path = Path(entry.get("path", ""))
+    return str(path) if path.exists() else None
+
+def _remember_report(symbol, filepath):
+    cache.set(_report_cache_key(symbol), {
+        "path": str(filepath),
+        "inputs_version": report_inputs_version(symbol),
+        "generated_at": time.time(),
+    }, ttl=REPORT_FRESHNESS_SECONDS)
+
+def _report_progress(progress, stage, percent):
+    """Report a pipeline stage to an optional progress callback"""
+    if progress is not None:
+        progress(stage, percent)
+
+def create_combined_report(symbol, progress=None, force_refresh=False):
+    """
+    Create a combined HTML report for a stock symbol.
+
+    A report generated within REPORT_FRESHNESS_SECONDS from the current
+    templates, analysis code and cached market data is returned as-is
+    unless ``force_refresh``.
+    Concurrent calls for the same symbol wait for the build already in
+    flight and share its result: threads of one worker through a
+    single-flight group, other gunicorn workers through a per-symbol file lock.
+    ``progress(stage, percent)`` is called as the build moves through its stages.
+    """
+    if not force_refresh:
+        cached_path = get_fresh_report(symbol)
+        if cached_path:
+            print(f"Serving cached report for {symbol}")
+            return cached_path
+    return _report_flights.do(symbol, _create_report_exclusive, symbol, progress, force_refresh)
+
+def _create_report_exclusive(symbol, progress=None, force_refresh=False):
+    """Build the report while holding the symbol's cross-process lock"""
+    filepath = get_report_path(symbol)
+    requested_at = time.time()
+    _report_progress(progress, "waiting", 5)
+    with file_lock(GENERATED_REPORTS_DIR / ".locks" / f"{report_file_id(symbol)}.lock") as waited:
+        # Another worker built it while we were queued: reuse instead of rebuilding
+        if waited and filepath.exists() and filepath.stat().st_mtime >= requested_at:
+            print(f"Reusing report for {symbol} generated by another worker")
+            return str(filepath)
+        if waited and not force_refresh:
+            cached_path = get_fresh_report(symbol)
+            if cached_path:
+                return cached_path
+        return _build_combined_report(symbol, progress)
+
+def _build_report_context(symbol, progress=None):
+    """Run the analysis pipeline and return the template context, or None without price data"""
     print(f"Analyzing {symbol}...")
     
     # Get stock data
+    _report_progress(progress, "fetching_data", 10)
     stock_data = get_stock_package(symbol)
     if not stock_data.get('price'):
         print(f"Could not fetch data for {symbol}")
         return None
     
+    _report_progress(progress, "graham", 40)
     print("Running Graham analysis...")
     graham_results = graham_metrics(stock_data)
     
+    _report_progress(progress, "lynch", 45)
     print("Running Lynch analysis...")
     lynch_results = lynch_metrics(stock_data)
     
+    _report_progress(progress, "reddit", 50)
     print("Analyzing Reddit sentiment...")
     reddit_results = get_reddit_sentiment_summary(symbol)
     
@@ -185,6 +327,8 @@ def create_combined_report(symbol):
         reddit_results["verdict"] = "Neutral"
         reddit_results["reddit_score"] = 50
         reddit_results["note"] = reddit_results["summary"]
+    elif reddit_results.get("partial"):
+        reddit_results["note"] = "Partial Reddit results: some searches did not finish within the time limit."
     else:
         reddit_results["note"] = "Reddit sentiment analysis completed successfully."
     
@@ -198,10 +342,7 @@ def create_combined_report(symbol):
     # Generate new structured verdict using investment_verdict module
     verdict = combine_investment_verdict(graham_results, lynch_results, reddit_results)
     
-    # Load template with FileSystemLoader to support includes
-    template_dir = PROJECT_ROOT / "templates"
-    env = Environment(loader=FileSystemLoader(str(template_dir)))
-    template = env.get_template("combined_template.html")
+    _report_progress(progress, "rendering", 85)
     
     # Format market cap
     market_cap = stock_data.get('marketCap')
@@ -221,8 +362,7 @@ def create_combined_report(symbol):
     chart_html = render_chart_html(stock_data.get('chart_data'), symbol)
     chart_css = get_chart_css()
     
-    # Render HTML
-    html_content = template.render(
+    return dict(
         symbol=symbol,
         company_name=stock_data.get('shortName', 'N/A'),
         price=stock_data.get('price', 'N/A'),
@@ -244,19 +384,56 @@ def create_combined_report(symbol):
         check_graham_criteria=check_graham_criteria,
         check_lynch_criteria=check_lynch_criteria
     )
+
+def _temp_report_path(filepath):
+    """Unique temp file next to filepath; renamed into place once complete"""
+    return filepath.with_name(f".{filepath.name}.{uuid.uuid4().hex}.tmp")
+
+def _compress(data, suffix):
+    if suffix == ".br":
+        return brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def _publish_report(symbol, tmp_path, filepath):
+    """
+    Move a finished temp report into place, writing its precompressed variants
+    first. Variants are therefore never older than the HTML they belong to.
+    """
+    data = tmp_path.read_bytes()
+    for suffix, _ in REPORT_ENCODINGS:
+        variant = filepath.with_name(filepath.name + suffix)
+        variant_tmp = _temp_report_path(variant)
+        try:
+            variant_tmp.write_bytes(_compress(data, suffix))
+            os.replace(variant_tmp, variant)
+        except Exception as e:
+            print(f"Could not write {suffix} variant of {filepath.name}: {e}")
+            variant_tmp.unlink(missing_ok=True)
+            variant.unlink(missing_ok=True)
+    os.replace(tmp_path, filepath)
+    _remember_report(symbol, filepath)
+    print(f"Report saved as {filepath}")
+
+def _build_combined_report(symbol, progress=None):
+    """Run the full analysis pipeline and write the report"""
+    context = _build_report_context(symbol, progress)
+    if context is None:
+        return None
+
+    # Shared environment: compiled once per process, includes resolved from templates/
+    html_content = get_template("combined_template.html").render(**context)
     
     # Save report
-    reports_dir = PROJECT_ROOT / "reports" / "generated"
-    reports_dir.mkdir(exist_ok=True)
+    GENERATED_REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Always overwrite the latest report for each symbol
-    filename = f"combined_report_{symbol}.html"
-    filepath = reports_dir / filename
+    # Always overwrite the latest report for each symbol; write to a temp
+    # file first so readers never see a half-written report
+    filepath = get_report_path(symbol)
+    tmp_path = _temp_report_path(filepath)
     
-    with open(filepath, 'w', encoding='utf-8') as f:
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         f.write(html_content)
-    
-    print(f"Report saved as {filepath}")
+    _publish_report(symbol, tmp_path, filepath)
     
     # Open in browser only once
     try:
@@ -268,6 +445,96 @@ def create_combined_report(symbol):
     
     return str(filepath)
 
+def _read_report_chunks(path, chunk_size=STREAM_CHUNK_SIZE):
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+def _chunked(pieces, chunk_size=STREAM_CHUNK_SIZE):
+    """Batch template output into chunks of at least chunk_size characters"""
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    chunk = "".join(buffer)
+    if chunk:
+        yield chunk
+
+def _generate_report_chunks(symbol, save, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Send the page head and a loading skeleton, then run the analysis and
+    render the rest with template.generate(), optionally teeing it to disk
+    """
+    head = get_template("combined_head.html").render(symbol=symbol, chart_css=get_chart_css())
+    filepath = get_report_path(symbol)
+    tmp_path = None
+    out = None
+    if save:
+        GENERATED_REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = _temp_report_path(filepath)
+        out = open(tmp_path, 'w', encoding='utf-8')
+
+    completed = False
+    try:
+        if out:
+            out.write(head)
+        # The skeleton only exists in the stream; saved reports start straight with the analysis
+        yield head + get_template("report_skeleton.html").render(symbol=symbol)
+
+        try:
+            context = _report_flights.do(("context", symbol), _build_report_context, symbol)
+        except Exception as e:
+            print(f"Streaming report failed for {symbol}: {e}")
+            import traceback
+            traceback.print_exc()
+            yield STREAM_FAILED_HTML.format(message=escape(f"Analysis failed: {e}"))
+            return
+        if context is None:
+            yield STREAM_FAILED_HTML.format(message=escape(
+                f"Could not generate report for {symbol}. The ticker may not exist or data may be unavailable."))
+            return
+
+        pieces = get_template("combined_template.html").generate(head_sent=True, **context)
+        for chunk in _chunked(pieces, chunk_size):
+            if out:
+                out.write(chunk)
+            yield chunk
+        completed = True
+    finally:
+        if out:
+            out.close()
+            if completed:
+                _publish_report(symbol, tmp_path, filepath)
+            else:
+                # Client went away mid-stream or the analysis failed: never publish a truncated report
+                os.unlink(tmp_path)
+
+def stream_combined_report(symbol, save=True, force_refresh=False):
+    """
+    Build a combined report and return an iterator over its HTML chunks.
+
+    The first chunk is the page head and a loading skeleton, sent before
+    the analysis pipeline runs, so the browser can start loading styles
+    while the data is fetched. The analysis then runs inside the iterator
+    and the page is rendered with ``template.generate()``, each chunk
+    handed out as soon as it is produced. With ``save`` the chunks are also
+    written to the generated report file. A fresh cached report is streamed
+    straight from disk. When there is no price data or the analysis fails,
+    the page ends with an error message and nothing is saved. Concurrent
+    streams of one symbol share a single analysis run.
+    """
+    if not force_refresh:
+        cached_path = get_fresh_report(symbol)
+        if cached_path:
+            return _read_report_chunks(cached_path)
+    return _generate_report_chunks(symbol, save)
+
 def main():
     """Main function to generate combined report"""
     print("Starting Investo Combined Analysis...")
@@ -0,0 +1,66 @@
+"""
+Report Template Environment
+===========================
+One process-wide Jinja environment for report rendering.
+
+Templates are parsed and compiled once per process, compiled bytecode is
+kept in a filesystem cache shared by all workers, and an optional build
+step precompiles every template into Python modules so cold workers skip
+parsing entirely:
+
+    python -m reports.templating
+"""
+
+import sys
+import threading
+from jinja2 import ChoiceLoader, Environment, FileSystemBytecodeCache, FileSystemLoader, ModuleLoader
+from config.settings import PROJECT_ROOT, REPORTS_DIR, TEMPLATE_AUTO_RELOAD
+
+TEMPLATE_DIR = PROJECT_ROOT / "templates"
+COMPILED_TEMPLATES_DIR = REPORTS_DIR / "compiled_templates"
+BYTECODE_CACHE_DIR = PROJECT_ROOT / "cache" / "jinja"
+
+_env = None
+_env_lock = threading.Lock()
+
+def _build_environment(auto_reload=TEMPLATE_AUTO_RELOAD):
+    """Create the environment, preferring precompiled templates when reloading is off"""
+    loader = FileSystemLoader(str(TEMPLATE_DIR))
+    if not auto_reload and COMPILED_TEMPLATES_DIR.is_dir() and any(COMPILED_TEMPLATES_DIR.iterdir()):
+        # Anything missing from the precompiled set still loads from source
+        loader = ChoiceLoader([ModuleLoader(str(COMPILED_TEMPLATES_DIR)), loader])
+
+    BYTECODE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return Environment(
+        loader=loader,
+        auto_reload=auto_reload,
+        bytecode_cache=FileSystemBytecodeCache(str(BYTECODE_CACHE_DIR)),
+        cache_size=100,
+    )
+
+def get_template_env():
+    """Get the shared template environment, creating it on first use"""
+    global _env
+    if _env is None:
+        with _env_lock:
+            if _env is None:
+                _env = _build_environment()
+    return _env
+
+def get_template(name):
+    """Get a compiled template from the shared environment"""
+    return get_template_env().get_template(name)
+
+def compile_templates(target=COMPILED_TEMPLATES_DIR):
+    """Precompile every HTML template into Python modules under target"""
+    env = _build_environment(auto_reload=True)
+    target.mkdir(parents=True, exist_ok=True)
+    env.compile_templates(str(target), zip=None,
+                          filter_func=lambda name: name.endswith(".html"),
+                          ignore_errors=False)
+    return sorted(p.name for p in target.glob("*.py"))
+
+if __name__ == "__main__":
+    compiled = compile_templates()
+    print(f"Precompiled {len(compiled)} templates into {COMPILED_TEMPLATES_DIR}")
+    sys.exit(0)
@@ -0,0 +1,157 @@
+"""
+Tests for the cache manager: memory tier, backends and codecs
+"""
+
+import time
+import pytest
+from utils import cache_codecs
+from utils.cache_manager import CacheManager, MemoryTier, estimate_size
+
+SERIES = [{"date": f"2025-01-{i % 28 + 1:02d}", "close": 100.0 + i * 0.01, "volume": 1_000_000 + i}
+          for i in range(5000)]
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def backend(request):
+    return request.param
+
+
+def make_cache(tmp_path, backend, memory_budget_bytes=0, **kwargs):
+    return CacheManager(cache_dir=tmp_path / "cache", backend=backend,
+                        memory_budget_bytes=memory_budget_bytes, **kwargs)
+
+
+def test_memory_tier_counts_decoded_size(tmp_path, backend):
+    cache = make_cache(tmp_path, backend, memory_budget_bytes=64 * 1024 * 1024,
+                       codecs={"chart": "msgpack+zstd"})
+    payload = cache_codecs.encode(SERIES, "msgpack+zstd")
+    cache.set("chart:AAPL", SERIES)
+    size = cache.memory.get_info()["size_bytes"]
+    assert size >= len(cache_codecs.encode(SERIES, "json"))
+    assert size > 10 * len(payload)
+
+
+def test_decoded_values_over_budget_stay_out_of_memory(tmp_path, backend):
+    budget = estimate_size(SERIES) // 2
+    cache = make_cache(tmp_path, backend, memory_budget_bytes=budget, codecs={"chart": "msgpack+zstd"})
+    assert len(cache_codecs.encode(SERIES, "msgpack+zstd")) < budget
+    cache.set("chart:AAPL", SERIES)
+    assert cache.memory.get_info()["entries"] == 0
+    assert cache.get("chart:AAPL") == SERIES
+    assert cache.memory.get_info()["size_bytes"] == 0
+
+
+def test_estimate_size_tracks_a_full_walk():
+    import sys
+
+    def walk(obj, seen):
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        size = sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            size += sum(walk(k, seen) + walk(v, seen) for k, v in obj.items())
+        elif isinstance(obj, list):
+            size += sum(walk(v, seen) for v in obj)
+        return size
+
+    exact = walk(SERIES, set())
+    assert estimate_size(SERIES) == pytest.approx(exact, rel=0.1)
+
+
+def test_memory_tier_evicts_least_recently_used_past_budget():
+    tier = MemoryTier(budget_bytes=300)
+    expires_at = time.time() + 60
+    for key in "abc":
+        tier.set(key, key, expires_at, 100)
+    assert tier.get("a") == (True, "a")   # b is now the least recently used
+    tier.set("d", "d", expires_at, 100)
+    assert tier.get("b") == (False, None)
+    assert all(tier.get(key)[0] for key in "acd")
+    assert tier.get_info()["size_bytes"] == 300
+
+
+def test_memory_tier_evicts_expired_entries_first():
+    tier = MemoryTier(budget_bytes=300)
+    now = time.time()
+    tier.set("old", 1, now + 60, 100)
+    tier.set("expiring", 2, now - 1, 100)
+    tier.set("new", 3, now + 60, 100)
+    tier.set("newest", 4, now + 60, 100)
+    assert tier.get("old") == (True, 1)
+    assert tier.get("expiring") == (False, None)
+    assert tier.get_info()["size_bytes"] == 300
+
+
+def test_memory_tier_serves_hot_keys_without_the_backend(tmp_path, backend):
+    cache = make_cache(tmp_path, backend, memory_budget_bytes=1024 * 1024)
+    cache.set("stock:AAPL", {"price": 200.0})
+
+    def unreachable(*args):
+        raise AssertionError("backend read")
+
+    cache.backend.read = unreachable
+    assert cache.get("stock:AAPL") == {"price": 200.0}
+    assert cache.memory.get_info()["hits"] == 1
+
+
+def test_file_backend_stays_within_disk_budget(tmp_path):
+    cache = make_cache(tmp_path, "file", memory_budget_bytes=1024 * 1024, max_disk_bytes=4096)
+    for i in range(40):
+        cache.set(f"news:S{i}", "x" * 200)
+        time.sleep(0.001)   # Distinct mtimes so the oldest files go first
+    assert cache.get_info()["total_size_bytes"] <= 4096
+    assert cache.get("news:S39") == "x" * 200
+    # Evicted keys leave the memory tier too, so they are misses everywhere
+    assert cache.get("news:S0") is None
+    assert cache.memory.get_info()["entries"] == cache.get_info()["file_count"]
+
+
+@pytest.mark.parametrize("codec", ["json", "pickle", "msgpack", "json+zstd", "pickle+zlib", "msgpack+zstd"])
+def test_codecs_round_trip_through_each_backend(tmp_path, backend, codec):
+    cache = make_cache(tmp_path, backend, codecs={"chart": codec})
+    small = {"symbol": "AAPL", "price": 200.5, "tags": ["a", "b"], "none": None}
+    cache.set("chart:AAPL", SERIES)
+    cache.set("chart:SMALL", small)
+    assert cache.get("chart:AAPL") == SERIES
+    assert cache.get("chart:SMALL") == small
+
+    payload = cache_codecs.encode(SERIES, codec)
+    assert cache_codecs.decode(payload) == SERIES
+    # Small payloads skip compression; the header names what was actually used
+    assert cache_codecs.encode(small, codec).split(b"\0", 1)[0].count(b"+") == 0
+
+
+def test_entries_stay_readable_after_a_codec_switch(tmp_path, backend):
+    make_cache(tmp_path, backend, codecs={"chart": "pickle+zlib"}).set("chart:AAPL", SERIES)
+    assert make_cache(tmp_path, backend, codecs={"chart": "json"}).get("chart:AAPL") == SERIES
+
+
+def test_sqlite_backend_is_shared_between_managers(tmp_path):
+    writer = make_cache(tmp_path, "sqlite")
+    reader = make_cache(tmp_path, "sqlite")
+    items = {f"stock:S{i}": {"price": float(i)} for i in range(1200)}
+    writer.set_many(items, ttl=60)
+    assert reader.get_many(list(items) + ["stock:MISSING"]) == items
+
+    writer.set("stock:S0", {"price": -1.0})
+    assert reader.get("stock:S0") == {"price": -1.0}
+
+
+def test_sqlite_backend_purges_expired_rows(tmp_path):
+    cache = make_cache(tmp_path, "sqlite")
+    cache.set("news:OLD", ["headline"], ttl=-1)
+    cache.set("news:NEW", ["headline"], ttl=60)
+    assert cache.purge_expired() == 1
+    assert cache.get_info()["file_count"] == 1
+    assert cache.get("news:NEW") == ["headline"]
+
+
+def test_sqlite_backend_stays_within_disk_budget(tmp_path):
+    cache = make_cache(tmp_path, "sqlite", max_disk_bytes=10_000)
+    cache.backend.BUDGET_CHECK_EVERY = 1
+    for i in range(100):
+        cache.set(f"news:S{i}", "x" * 200)
+    assert cache.get_info()["total_size_bytes"] <= 10_000
+    assert cache.get("news:S99") == "x" * 200
+    assert cache.get("news:S0") is None
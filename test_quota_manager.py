@@ -0,0 +1,36 @@
+"""
+Tests for the cross-worker upstream quota manager
+"""
+
+import pytest
+from utils.quota_manager import QuotaManager, QuotaExceeded
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return QuotaManager(db_path=tmp_path / "quota.db", limits={"stocktwits": (2, 3600)}, max_wait=0)
+
+
+def test_keyless_upstream_is_metered(manager):
+    """Upstreams without API keys draw from one default bucket and run out"""
+    assert manager.acquire("stocktwits") is None
+    assert manager.acquire("stocktwits") is None
+    with pytest.raises(QuotaExceeded):
+        manager.acquire("stocktwits")
+
+    usage = manager.get_info()["stocktwits"]["default"]
+    assert usage["used"] == 2
+    assert usage["rejected"] == 1
+
+
+def test_key_pool_rotates_to_fullest_bucket(manager):
+    """With several keys, each request takes the key with the most tokens left"""
+    keys = ["key-a", "key-b"]
+    first = manager.acquire("stocktwits", keys)
+    second = manager.acquire("stocktwits", keys)
+    assert {first, second} == set(keys)
+
+
+def test_unlimited_upstream_is_never_throttled(manager):
+    for _ in range(10):
+        assert manager.acquire("unknown", ["key"]) == "key"
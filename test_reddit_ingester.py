@@ -0,0 +1,128 @@
+"""
+Tests for the streaming Reddit ingester and its rolling hourly aggregates
+"""
+
+import time
+from types import SimpleNamespace
+import pytest
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+import core.reddit_ingester as reddit_ingester
+import core.reddit_sentiment as reddit_sentiment
+from core.reddit_ingester import MENTIONS, SENT_SUM, SUBS, WEIGHT, WEIGHTED, RedditIngester, RollingAggregates
+from config.settings import REDDIT_MIN_POST_SCORE
+from utils.ticker_matcher import TickerMatcher
+
+NOW = 1_750_000_000.0   # Fixed clock for the aggregate tests
+HOUR = 3600
+
+
+def add(aggregates, ticker, created_utc, sentiment, weight=1.0, sub="stocks"):
+    post = {"sub": sub, "title": "t", "sentiment": sentiment, "quality_flag": False, "url": "u",
+            "created_utc": created_utc, "score": 10}
+    aggregates.add([ticker], sub, created_utc, sentiment, weight, 10, False, post)
+
+
+def test_posts_in_one_hour_share_a_bucket():
+    aggregates = RollingAggregates()
+    hour_start = NOW // HOUR * HOUR
+    add(aggregates, "TSLA", hour_start + 1, 0.5, weight=2.0)
+    add(aggregates, "TSLA", hour_start + HOUR - 1, -0.5, weight=1.0, sub="investing")
+    add(aggregates, "TSLA", hour_start - 1, 1.0)
+
+    buckets = aggregates.buckets["TSLA"]
+    assert sorted(buckets) == [int(NOW // HOUR) - 1, int(NOW // HOUR)]
+    current = buckets[int(NOW // HOUR)]
+    assert current[MENTIONS] == 2
+    assert current[SENT_SUM] == pytest.approx(0.0)
+    assert current[WEIGHTED] == pytest.approx(2.0 * 0.5 - 0.5)
+    assert current[WEIGHT] == pytest.approx(3.0)
+    assert current[SUBS] == {"stocks": 1, "investing": 1}
+
+
+def test_windows_sum_the_buckets_they_cover():
+    aggregates = RollingAggregates()
+    add(aggregates, "TSLA", NOW - 2 * HOUR, 0.4)
+    add(aggregates, "TSLA", NOW - 3 * 86400, -0.2)
+    add(aggregates, "TSLA", NOW - 10 * 86400, 0.1)
+
+    windows = aggregates.windows("TSLA", now=NOW)
+    assert [windows[w]["mentions"] for w in ("1d", "7d", "14d")] == [1, 2, 3]
+    assert windows["7d"]["avg_sentiment"] == pytest.approx(0.1)
+    last_week = aggregates.window("TSLA", 7, end_days_ago=7, now=NOW)
+    assert last_week[MENTIONS] == 1
+    assert aggregates.most_mentioned(days=14, now=NOW) == [("TSLA", 3)]
+
+
+def test_prune_drops_buckets_past_the_longest_window():
+    aggregates = RollingAggregates()
+    add(aggregates, "TSLA", NOW - 15 * 86400, 0.3)
+    add(aggregates, "GME", NOW - 15 * 86400, 0.3)
+    add(aggregates, "GME", NOW - HOUR, 0.3)
+    aggregates.prune(now=NOW)
+    assert "TSLA" not in aggregates.buckets and "TSLA" not in aggregates.top_posts
+    assert list(aggregates.buckets["GME"]) == [int((NOW - HOUR) // HOUR)]
+    assert [p["created_utc"] for p in aggregates.top_posts["GME"]] == [NOW - HOUR]
+
+
+@pytest.fixture
+def ingester(tmp_path, monkeypatch):
+    monkeypatch.setattr(reddit_sentiment, "analyzer", SentimentIntensityAnalyzer())
+    monkeypatch.setattr(reddit_ingester, "ticker_matcher", TickerMatcher(symbols=["TSLA", "GME"]))
+    scores = {}
+
+    def make():
+        return RedditIngester(stream=lambda: iter(()), checkpoint_path=tmp_path / "ingest.json",
+                              subreddits=["stocks", "investing"], scores=lambda ids: {i: scores[i] for i in ids})
+
+    ingester = make()
+    ingester.scores_by_id = scores
+    ingester.make = make
+    return ingester
+
+
+def submission(post_id, title, score, age=HOUR, sub="Stocks"):
+    return SimpleNamespace(id=post_id, title=title, selftext="", score=score, created_utc=time.time() - age,
+                           permalink=f"/r/{sub}/{post_id}", subreddit=SimpleNamespace(display_name=sub))
+
+
+def test_ingest_scores_each_post_once_for_every_ticker(ingester):
+    post = submission("p1", "Great earnings for $TSLA and GME", REDDIT_MIN_POST_SCORE)
+    assert ingester.ingest(post) == {"TSLA", "GME"}
+    assert ingester.ingest(post) == set()   # Already seen
+    assert ingester.ingested == 1
+    for ticker in ("TSLA", "GME"):
+        (bucket,) = ingester.aggregates.buckets[ticker].values()
+        assert bucket[MENTIONS] == 1
+        assert bucket[SUBS] == {"stocks": 1}   # Subreddit names are normalised to the tracked spelling
+    summary = ingester.aggregates.summary("TSLA")
+    assert summary["mentions"] == 1 and summary["source"] == "stream"
+
+
+def test_low_score_posts_wait_until_they_qualify(ingester):
+    ingester.ingest(submission("young", "TSLA to the moon", 0))
+    ingester.ingest(submission("stale", "GME squeeze", 0, age=48 * HOUR))
+    assert ingester.ingested == 0 and set(ingester.pending) == {"young", "stale"}
+
+    ingester.scores_by_id["young"] = REDDIT_MIN_POST_SCORE
+    assert ingester.rescore_pending() == 1
+    assert ingester.pending == {}   # The stale one aged out
+    assert ingester.aggregates.window("TSLA", 1)[MENTIONS] == 1
+
+
+def test_checkpoint_resumes_aggregates_seen_ids_and_pending(ingester, monkeypatch):
+    ingester.ingest(submission("p1", "TSLA earnings", REDDIT_MIN_POST_SCORE))
+    ingester.ingest(submission("p2", "GME news", 0))
+    ingester.scores_by_id["p2"] = 0
+    ingester.checkpoint()
+
+    resumed = ingester.make()
+    assert resumed.ingested == 1
+    assert resumed.aggregates.window("TSLA", 1)[MENTIONS] == 1
+    assert set(resumed.pending) == {"p2"}
+    assert resumed.ingest(submission("p1", "TSLA earnings", REDDIT_MIN_POST_SCORE)) == set()
+
+    # Web workers read the same checkpoint
+    monkeypatch.setattr(reddit_ingester, "_view", {"mtime": None, "checked": 0.0, "aggregates": None})
+    view = reddit_ingester.ingested_aggregates(path=ingester.checkpoint_path, recheck=0)
+    assert view.window("TSLA", 1)[MENTIONS] == 1
@@ -0,0 +1,140 @@
+"""
+Tests for the live Reddit sentiment summary, against a fake Reddit client
+"""
+
+import time
+from types import SimpleNamespace
+import pytest
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+import core.reddit_sentiment as reddit_sentiment
+from core.reddit_store import PostStore
+
+
+class Comments(list):
+    def replace_more(self, limit=0):
+        pass
+
+
+class FakeReddit:
+    """Multireddit search over fixed posts, newest first; counts listed posts and comment fetches"""
+
+    def __init__(self, posts):
+        self.posts = posts
+        self.listed = 0
+        self.comment_fetches = {}
+
+    def subreddit(self, name):
+        return SimpleNamespace(search=self.search)
+
+    def search(self, query, limit, sort, time_filter):
+        for post in sorted(self.posts, key=lambda p: p.created_utc, reverse=True)[:limit]:
+            self.listed += 1
+            yield post
+
+    def submission(self, id):
+        return next(p for p in self.posts if p.id == id)
+
+
+def make_post(post_id, comments, age=3600, score=50):
+    return SimpleNamespace(
+        id=post_id, title=f"TSLA earnings look great {post_id}", selftext="strong quarter", score=score,
+        created_utc=time.time() - age, permalink=f"/r/stocks/{post_id}",
+        subreddit=SimpleNamespace(display_name="stocks"),
+        comments=Comments(SimpleNamespace(body=body) for body in comments),
+    )
+
+
+@pytest.fixture
+def fake_reddit(tmp_path, monkeypatch):
+    posts = [make_post("quiet", []), make_post("busy", ["terrible", "awful crash"])]
+    client = FakeReddit(posts)
+    fetch_comments = reddit_sentiment._fetch_comments
+
+    def counting_fetch(post, *args, **kwargs):
+        client.comment_fetches[post.id] = client.comment_fetches.get(post.id, 0) + 1
+        return fetch_comments(post, *args, **kwargs)
+
+    monkeypatch.setattr(reddit_sentiment, "reddit", client)
+    monkeypatch.setattr(reddit_sentiment, "analyzer", SentimentIntensityAnalyzer())
+    monkeypatch.setattr(reddit_sentiment, "post_store", PostStore(db_path=tmp_path / "posts.db"))
+    monkeypatch.setattr(reddit_sentiment, "_cache", {})
+    monkeypatch.setattr(reddit_sentiment, "_fetch_comments", counting_fetch)
+    monkeypatch.setattr(reddit_sentiment, "ingested_aggregates", lambda: None)
+    monkeypatch.setattr(reddit_sentiment.quota_manager, "acquire", lambda *a, **k: None)
+    return client
+
+
+def test_post_without_comments_is_not_refetched(fake_reddit):
+    """A post whose comment fetch came back empty is stored as checked and skipped next time"""
+    reddit_sentiment.get_reddit_sentiment_summary("TSLA", subreddits=["stocks"])
+    assert fake_reddit.comment_fetches == {"quiet": 1, "busy": 1}
+
+    stored = reddit_sentiment.post_store.get_many(["quiet", "busy"])
+    assert stored["quiet"]["comments_scored"] == 0
+    assert stored["quiet"]["comment_sentiment"] == 0.0
+    assert stored["busy"]["comments_scored"] == 2
+
+    reddit_sentiment._cache.clear()
+    reddit_sentiment.get_reddit_sentiment_summary("TSLA", subreddits=["stocks"])
+    assert fake_reddit.comment_fetches == {"quiet": 1, "busy": 1}
+
+
+def test_empty_comments_keep_title_and_body_score(fake_reddit):
+    """No comments is neutral: the post keeps its title/body sentiment"""
+    reddit_sentiment.get_reddit_sentiment_summary("TSLA", subreddits=["stocks"])
+    quiet = reddit_sentiment.post_store.get_many(["quiet"])["quiet"]
+    assert reddit_sentiment.record_sentiment(quiet) == pytest.approx(
+        reddit_sentiment.blend_sentiment(quiet["title_sentiment"], quiet["body_sentiment"]))
+
+
+def test_stored_posts_are_not_rescored(fake_reddit, monkeypatch):
+    """A repeat analysis only runs VADER on posts it has not seen before"""
+    scored = []
+    vader = reddit_sentiment.analyzer
+
+    def counting_scores(text):
+        scored.append(text)
+        return vader.polarity_scores(text)
+
+    monkeypatch.setattr(reddit_sentiment, "analyzer", SimpleNamespace(polarity_scores=counting_scores))
+    reddit_sentiment.get_reddit_sentiment_summary("TSLA", subreddits=["stocks"], comment_budget=0)
+    assert len(scored) == 4   # Title and body of both posts
+
+    scored.clear()
+    fake_reddit.posts.append(make_post("fresh", []))
+    reddit_sentiment._cache.clear()
+    summary = reddit_sentiment.get_reddit_sentiment_summary("TSLA", subreddits=["stocks"], comment_budget=0)
+    assert scored == [fake_reddit.posts[-1].title, fake_reddit.posts[-1].selftext]
+    assert summary["mentions"] == 3
+
+
+def test_cursor_resumes_the_listing_where_the_last_run_stopped(fake_reddit):
+    fake_reddit.posts[:] = [make_post("recent", [], age=3600), make_post("older", [], age=2 * 86400),
+                            make_post("oldest", [], age=3 * 86400)]
+    reddit_sentiment.get_reddit_sentiment_summary("TSLA", subreddits=["stocks"], comment_budget=0)
+    assert fake_reddit.listed == 3
+    cursor = reddit_sentiment.post_store.get_cursors("TSLA")["stocks"]
+    assert cursor == pytest.approx(fake_reddit.posts[0].created_utc)
+
+    # The next run lists new posts and stops at the first one older than the cursor's overlap
+    fake_reddit.listed = 0
+    fake_reddit.posts.append(make_post("new", [], age=600))
+    reddit_sentiment._cache.clear()
+    summary = reddit_sentiment.get_reddit_sentiment_summary("TSLA", subreddits=["stocks"], comment_budget=0)
+    assert fake_reddit.listed == 3   # new, recent, and older which ends the listing
+    assert summary["mentions"] == 4
+    assert reddit_sentiment.post_store.get_cursors("TSLA")["stocks"] > cursor
+
+
+def test_cursor_holds_when_the_limit_cuts_the_listing_short(fake_reddit):
+    fake_reddit.posts[:] = [make_post("recent", [], age=3600), make_post("older", [], age=2 * 86400)]
+    reddit_sentiment.get_reddit_sentiment_summary("TSLA", subreddits=["stocks"], limit=1, comment_budget=0)
+    assert fake_reddit.listed == 1
+    assert reddit_sentiment.post_store.get_cursors("TSLA") == {}
+
+
+def test_buzz_compares_with_the_stored_previous_week(fake_reddit):
+    reddit_sentiment.post_store.record_mentions("TSLA", [(time.time() - 9 * 86400, 0.2, 1.0)])
+    summary = reddit_sentiment.get_reddit_sentiment_summary("TSLA", subreddits=["stocks"], comment_budget=0)
+    assert summary["buzz_ratio"] == pytest.approx(2.0)   # Two posts this week against one the week before
@@ -0,0 +1,86 @@
+"""
+Tests for the Reddit post store: scored posts, search cursors and the daily series
+"""
+
+import time
+import pytest
+from core.reddit_store import PostStore, day_of
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PostStore(db_path=tmp_path / "posts.db")
+
+
+def make_record(post_id, tickers, created_utc=None, **fields):
+    record = {
+        "post_id": post_id, "subreddit": "stocks", "created_utc": created_utc or time.time() - 3600,
+        "title": f"post {post_id}", "permalink": f"/r/stocks/{post_id}", "score": 10,
+        "title_sentiment": 0.5, "body_sentiment": 0.1, "comment_sentiment": None, "comments_scored": 0,
+        "quality_flag": False, "tickers": set(tickers),
+    }
+    record.update(fields)
+    return record
+
+
+def test_posts_round_trip_by_id(store):
+    store.upsert([make_record("p1", {"TSLA"}, quality_flag=True)])
+    stored = store.get_many(["p1", "missing"])
+    assert list(stored) == ["p1"]
+    assert stored["p1"]["tickers"] == {"TSLA"}
+    assert stored["p1"]["quality_flag"] is True
+    assert stored["p1"]["title_sentiment"] == 0.5
+
+
+def test_upsert_merges_tickers_and_keeps_scored_comments(store):
+    store.upsert([make_record("p1", {"TSLA"}, comment_sentiment=-0.4, comments_scored=3)])
+    # Seen again for another ticker, without re-fetching comments
+    store.upsert([make_record("p1", {"AAPL"}, score=99)])
+    post = store.get_many(["p1"])["p1"]
+    assert post["tickers"] == {"AAPL", "TSLA"}
+    assert post["score"] == 99
+    assert post["comment_sentiment"] == -0.4
+    assert post["comments_scored"] == 3
+
+
+def test_posts_for_ticker_matches_whole_symbols_in_the_window(store):
+    now = time.time()
+    store.upsert([
+        make_record("recent", {"TSLA", "F"}, created_utc=now - 3600),
+        make_record("old", {"TSLA"}, created_utc=now - 20 * 86400),
+        make_record("other", {"TSLAX"}, created_utc=now - 3600),
+    ])
+    assert [p["post_id"] for p in store.posts_for_ticker("TSLA", now - 14 * 86400)] == ["recent"]
+    assert [p["post_id"] for p in store.posts_for_ticker("F", now - 14 * 86400)] == ["recent"]
+
+
+def test_upsert_drops_posts_past_retention(tmp_path):
+    store = PostStore(db_path=tmp_path / "posts.db", retention_days=7)
+    now = time.time()
+    store.upsert([make_record("old", {"TSLA"}, created_utc=now - 8 * 86400),
+                  make_record("new", {"TSLA"}, created_utc=now - 86400)])
+    assert list(store.get_many(["old", "new"])) == ["new"]
+
+
+def test_cursors_only_move_forward(store):
+    store.advance_cursors("TSLA", {"stocks": 2000.0, "investing": 1000.0})
+    store.advance_cursors("TSLA", {"stocks": 1500.0, "investing": 3000.0})
+    store.advance_cursors("AAPL", {"stocks": 500.0})
+    assert store.get_cursors("TSLA") == {"stocks": 2000.0, "investing": 3000.0}
+    assert store.get_cursors("AAPL") == {"stocks": 500.0}
+
+
+def test_daily_series_weights_sentiment_per_day(store):
+    now = time.time()
+    store.record_mentions("TSLA", [(now, 1.0, 3.0), (now, -1.0, 1.0), (now - 8 * 86400, 0.5, 1.0)])
+    store.record_mentions("TSLA", [(now, 0.0, 4.0)])
+    today = store.window("TSLA", now, now + 86400)
+    assert today["mentions"] == 3
+    assert today["avg_sentiment"] == pytest.approx((3.0 - 1.0) / 8.0)
+
+    this_week = store.window("TSLA", now - 6 * 86400, now + 86400)
+    last_week = store.window("TSLA", now - 13 * 86400, now - 6 * 86400)
+    assert (this_week["mentions"], last_week["mentions"]) == (3, 1)
+    assert last_week["avg_sentiment"] == pytest.approx(0.5)
+    assert store.window("AAPL", now - 6 * 86400, now + 86400) == {"mentions": 0, "avg_sentiment": 0.0}
+    assert day_of(0) == "1970-01-01"
@@ -0,0 +1,129 @@
+"""
+Tests for the /report routes: file serving and streamed reports
+"""
+
+import importlib
+import time
+import pytest
+import app as investo
+
+
+@pytest.fixture
+def client(monkeypatch):
+    rendered = []
+
+    def fake_stream(symbol, save=True, force_refresh=False):
+        rendered.append(symbol)
+        return iter([f"<p>{symbol}</p>"])
+
+    monkeypatch.setattr(investo, "stream_combined_report", fake_stream)
+    client = investo.app.test_client()
+    client.rendered = rendered
+    return client
+
+
+@pytest.mark.parametrize("url", ["/report/../app.py", "/report/app.py", "/report/AAPL"])
+def test_non_report_paths_do_not_render(client, url):
+    assert client.get(url).status_code == 404
+    assert client.rendered == []
+
+
+@pytest.mark.parametrize("symbol", ["..", "TOOLONG", "A-B", "CEO"])
+def test_stream_rejects_invalid_symbols(client, symbol):
+    assert client.get(f"/report/stream/{symbol}").status_code == 400
+    assert client.rendered == []
+
+
+def test_stream_renders_normalized_symbol(client):
+    response = client.get("/report/stream/brk.b")
+    assert response.status_code == 200
+    assert client.rendered == ["BRK.B"]
+
+
+@pytest.mark.parametrize("mode", [None, "job"])
+@pytest.mark.parametrize("symbol", ["../../../zz", "AAPL/../x", "..", "TOOLONG"])
+def test_analyze_rejects_invalid_symbols(client, monkeypatch, mode, symbol):
+    built = []
+    monkeypatch.setattr(investo, "create_combined_report", lambda *a, **kw: built.append(a))
+    response = client.post("/analyze", json={"symbol": symbol, "mode": mode})
+    assert response.status_code == 400
+    assert built == []
+
+
+def test_report_files_never_use_raw_path_parts():
+    from reports.combined_report_generator import GENERATED_REPORTS_DIR, get_report_path, report_file_id
+
+    assert report_file_id("BRK.B") == "BRK.B"
+    for symbol in ("../../../zz", "..", "A/B", "A\\B", ".hidden"):
+        name = report_file_id(symbol)
+        assert "/" not in name and "\\" not in name and not name.startswith(".")
+        assert get_report_path(symbol).parent == GENERATED_REPORTS_DIR
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    import reports.combined_report_generator as generator
+
+    calls = []
+
+    def fake_package(symbol):
+        calls.append(symbol)
+        if symbol == "NODATA":
+            return {}
+        return {"price": 100.0, "shortName": "Example Corp", "trailingPE": 12.0, "marketCap": 5e9,
+                "sector": "Industrials", "industry": "Machinery"}
+
+    monkeypatch.setattr(generator, "GENERATED_REPORTS_DIR", tmp_path)
+    monkeypatch.setattr(generator, "get_stock_package", fake_package)
+    monkeypatch.setattr(generator, "get_reddit_sentiment_summary",
+                        lambda symbol: {"summary": "Reddit API not available"})
+    monkeypatch.setattr(generator, "_remember_report", lambda symbol, filepath: None)
+    generator.calls = calls
+    return generator
+
+
+def test_stream_sends_head_before_analysis(generator):
+    chunks = generator.stream_combined_report("EXMP", force_refresh=True)
+    first = next(chunks)
+    assert generator.calls == []
+    assert "</head>" in first and 'id="report-skeleton"' in first
+
+    rest = "".join(chunks)
+    assert generator.calls == ["EXMP"]
+    assert "Example Corp" in rest and rest.rstrip().endswith("</html>")
+
+    # The saved report is the page without the skeleton, as a non-streamed build renders it
+    saved = generator.get_report_path("EXMP").read_text(encoding="utf-8")
+    assert saved == first.split('    <div id="report-skeleton"')[0] + rest
+    assert saved.count("<head>") == 1
+
+
+def test_stream_without_data_ends_page_and_saves_nothing(generator):
+    page = "".join(generator.stream_combined_report("NODATA", force_refresh=True))
+    assert "Could not generate report for NODATA" in page
+    assert page.rstrip().endswith("</html>")
+    assert not generator.get_report_path("NODATA").exists()
+    assert list(generator.GENERATED_REPORTS_DIR.iterdir()) == []
+
+
+def test_fresh_report_follows_its_input_data(tmp_path, monkeypatch):
+    """A report is outdated once any of its cached inputs is refetched"""
+    import reports.combined_report_generator as generator
+    from utils.cache_manager import CacheManager
+
+    cache = CacheManager(cache_dir=tmp_path / "cache", backend="sqlite")
+    monkeypatch.setattr(importlib.import_module("utils.cached"), "default_cache", cache)
+    monkeypatch.setattr(generator, "cache", cache)
+
+    def fetched(fn, *args, at):
+        cache.set(fn.cache_key(*args), {"value": {"price": 10.0}, "fetched_at": at})
+
+    fetched(generator.get_full_stock_data, "EXMP", at=1000.0)
+    fetched(generator.get_chart_data, "EXMP", "1y", at=1000.0)
+    report = tmp_path / "combined_report_EXMP.html"
+    report.write_text("<html></html>")
+    generator._remember_report("EXMP", report)
+    assert generator.get_fresh_report("EXMP") == str(report)
+
+    fetched(generator.get_chart_data, "EXMP", "1y", at=time.time())
+    assert generator.get_fresh_report("EXMP") is None
@@ -0,0 +1,64 @@
+"""
+Tests for the universe screener
+"""
+
+import time
+import pytest
+import core.screener as screener
+from core.data_sources import get_full_stock_data
+from utils.cache_manager import CacheManager
+from utils.helpers import is_valid_ticker
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = CacheManager(cache_dir=tmp_path / "cache", backend="sqlite")
+    monkeypatch.setattr(screener, "cache", cache)
+    return cache
+
+
+def cache_fundamentals(cache, symbol, **fields):
+    cache.set(get_full_stock_data.cache_key(symbol),
+              {"value": {"symbol": symbol, "shortName": symbol, **fields}, "fetched_at": time.time()})
+
+
+def test_warm_fetches_only_missing_symbols_through_the_batch_api(cache, monkeypatch):
+    calls = []
+
+    def fake_packages(symbols, **kwargs):
+        calls.append((list(symbols), kwargs))
+        return {s: {"symbol": s, "price": 10.0} for s in symbols if s != "ZZZZ"}
+
+    monkeypatch.setattr(screener, "get_stock_packages", fake_packages)
+    cache_fundamentals(cache, "AAPL", price=200.0)
+    assert screener.warm(["AAPL", "MSFT", "ZZZZ"]) == 1
+    assert calls == [(["MSFT", "ZZZZ"], {"include_charts": False})]
+
+
+def test_warm_skips_the_upstream_when_everything_is_cached(cache, monkeypatch):
+    monkeypatch.setattr(screener, "get_stock_packages", lambda *a, **kw: pytest.fail("fetched"))
+    cache_fundamentals(cache, "AAPL", price=200.0)
+    assert screener.warm(["AAPL"]) == 0
+
+
+def test_screen_ranks_cached_fundamentals(cache):
+    cache_fundamentals(cache, "VAL", price=20.0, forwardPE=9.0, priceToBook=1.1, trailingEps=2.5,
+                       earningsQuarterlyGrowth=0.08, debtToEquity=0.3, dividendYield=3.2)
+    cache_fundamentals(cache, "GRO", price=250.0, trailingPE=32.0, priceToBook=45.0, epsGrowth=0.25)
+    result = screener.screen(["GRO", "VAL", "NONE"])
+    assert [row["symbol"] for row in result["results"]] == ["VAL", "GRO"]
+    assert result["results"][0]["Graham_Combined_Test"] is True
+    assert result["missing"] == ["NONE"]
+
+
+@pytest.mark.parametrize("name, size", [("dow30", 30), ("sp500", 504)])
+def test_shipped_universes_are_valid(name, size):
+    symbols = screener.load_universe(name)
+    assert len(symbols) == size
+    assert all(is_valid_ticker(s) for s in symbols)
+
+
+@pytest.mark.parametrize("name", ["nosuch", "../universes/dow30", ""])
+def test_unknown_universe_raises(name):
+    with pytest.raises(KeyError):
+        screener.load_universe(name)
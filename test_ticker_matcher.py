@@ -0,0 +1,39 @@
+"""
+Tests for ticker extraction from Reddit and news text
+"""
+
+import pytest
+from utils.ticker_matcher import TickerMatcher
+
+matcher = TickerMatcher(symbols=["AAPL", "TSLA", "GME", "BRK.B", "ALL"])
+
+
+def test_find_cashtags_symbols_and_false_positives():
+    text = "YOLO on $gme, TSLA and BRK.B. DD says ALL in, CEO loves $all"
+    assert matcher.find(text) == {"GME", "TSLA", "BRK.B", "ALL"}
+
+
+def test_bare_words_need_upper_case_and_symbol_master():
+    assert matcher.find("bought tsla and MSFT today") == set()
+
+
+@pytest.mark.parametrize("ticker, text", [
+    ("TSLA", "love tsla's run"),
+    ("BRK.B", "Adding BRK.B on the dip"),
+    ("BRK-B", "Adding BRK-B on the dip"),
+    ("RDS-A", "rds-a dividend looks safe"),
+    ("SHOP.TO", "SHOP.TO beat estimates"),
+    ("7203.T", "Toyota (7203.T) earnings"),
+])
+def test_contains_requested_symbol(ticker, text):
+    assert TickerMatcher.contains(text, ticker)
+
+
+@pytest.mark.parametrize("ticker, text", [
+    ("TSLA", "TSLAQ is a meme"),
+    ("BRK-B", "BRK-BX is something else"),
+    ("SHOP.TO", "SHOP today"),
+    ("7203.T", "17203.T is not it"),
+])
+def test_contains_rejects_partial_words(ticker, text):
+    assert not TickerMatcher.contains(text, ticker)
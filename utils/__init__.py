@@ -2,6 +2,7 @@
 Utility modules for Investo
 """
 
+from .ticker_matcher import TickerMatcher, ticker_matcher
 from .helpers import (
     is_valid_ticker,
     clean_tickers,
@@ -18,6 +19,10 @@ from .token_persistence import (
 )
 from .logger import setup_logger, get_logger, default_logger
 from .cache_manager import CacheManager, cache
+from .cached import cached
+from .http_client import HttpClient, http_client
+from .quota_manager import QuotaManager, QuotaExceeded, quota_manager
+from .job_queue import JobQueue, job_queue
 
 __all__ = [
     # Ticker utilities
@@ -25,6 +30,8 @@ __all__ = [
     'clean_tickers', 
     'normalize_ticker',
     'validate_ticker_list',
+    'TickerMatcher',
+    'ticker_matcher',
     
     # Budget utilities removed
     
@@ -42,5 +49,19 @@ __all__ = [
     
     # Caching
     'CacheManager',
-    'cache'
+    'cache',
+    'cached',
+
+    # HTTP
+    'HttpClient',
+    'http_client',
+
+    # Upstream quotas
+    'QuotaManager',
+    'QuotaExceeded',
+    'quota_manager',
+
+    # Background jobs
+    'JobQueue',
+    'job_queue'
 ]
@@ -0,0 +1,79 @@
+"""
+Cache payload encoding for Investo
+
+Every payload starts with the name of the codec that wrote it (e.g.
+``pickle+zstd``) followed by a NUL byte, so entries stay readable after a
+namespace switches codecs or an optional library is removed.
+"""
+
+import json
+import pickle
+import zlib
+from typing import Any, Tuple
+
+try:
+    import msgpack
+except ImportError:  # Optional: falls back to pickle
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: falls back to zlib
+    zstandard = None
+
+COMPRESS_MIN_BYTES = 1024  # Smaller payloads are stored uncompressed
+
+SERIALIZERS = {
+    "json": (lambda value: json.dumps(value, separators=(",", ":")).encode(), json.loads),
+    "pickle": (lambda value: pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads),
+}
+if msgpack is not None:
+    SERIALIZERS["msgpack"] = (lambda value: msgpack.packb(value, use_bin_type=True),
+                              lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False))
+
+COMPRESSORS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = (lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+                           lambda data: zstandard.ZstdDecompressor().decompress(data))
+
+def resolve_codec(codec: str) -> Tuple[str, str]:
+    """
+    Split a codec spec like ``msgpack+zstd`` into (serializer, compressor),
+    substituting pickle for msgpack and zlib for zstd when they are not installed.
+    """
+    serializer, _, compressor = codec.partition("+")
+    if serializer not in SERIALIZERS:
+        if serializer != "msgpack":
+            raise ValueError(f"Unknown cache serializer: {serializer}")
+        serializer = "pickle"
+    if compressor and compressor not in COMPRESSORS:
+        if compressor != "zstd":
+            raise ValueError(f"Unknown cache compressor: {compressor}")
+        compressor = "zlib"
+    return serializer, compressor
+
+def encode(value: Any, codec: str = "json") -> bytes:
+    """Serialize value with codec; compression only kicks in past COMPRESS_MIN_BYTES"""
+    serializer, compressor = resolve_codec(codec)
+    data = SERIALIZERS[serializer][0](value)
+    name = serializer
+    if compressor and len(data) >= COMPRESS_MIN_BYTES:
+        data = COMPRESSORS[compressor][0](data)
+        name = f"{serializer}+{compressor}"
+    return name.encode() + b"\0" + data
+
+def decode(payload: bytes) -> Any:
+    """Deserialize a payload written by encode()"""
+    name, sep, data = payload.partition(b"\0")
+    if not sep:
+        raise ValueError("Missing cache codec header")
+    serializer, _, compressor = name.decode().partition("+")
+    if compressor:
+        if compressor not in COMPRESSORS:
+            raise ValueError(f"Cache entry needs unavailable compressor: {compressor}")
+        data = COMPRESSORS[compressor][1](data)
+    if serializer not in SERIALIZERS:
+        raise ValueError(f"Cache entry needs unavailable serializer: {serializer}")
+    return SERIALIZERS[serializer][1](data)
@@ -2,89 +2,589 @@
 Simple caching manager for Investo
 """
 
+import hashlib
 import json
+import os
+import sys
+import threading
 import time
+import uuid
+from collections import OrderedDict
+from itertools import islice
 from pathlib import Path
-from typing import Any, Optional
-from config.settings import PROJECT_ROOT
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from config.settings import PROJECT_ROOT, CACHE_BACKEND, CACHE_CODECS, CACHE_MEMORY_BUDGET_BYTES, CACHE_MAX_DISK_BYTES
+from utils.sqlite_store import SQLiteStore
+from utils import cache_codecs
+
+# A stored entry: (serialized payload, expires_at, created_at)
+Entry = Tuple[bytes, float, float]
+
+SIZE_SAMPLE = 64  # Items per container sized by estimate_size; the rest are extrapolated
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate memory held by a decoded value: sys.getsizeof over nested
+    dicts, lists, tuples and sets, counting shared objects once. Large
+    containers are sized from up to SIZE_SAMPLE of their items.
+    """
+    return _estimate_size(value, set())
+
+def _estimate_size(obj: Any, seen: set) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        sample = list(islice(obj.items(), SIZE_SAMPLE))
+        items = sum(_estimate_size(k, seen) + _estimate_size(v, seen) for k, v in sample)
+    elif isinstance(obj, (list, tuple)):
+        sample = obj[::max(1, len(obj) // SIZE_SAMPLE)]
+        items = sum(_estimate_size(v, seen) for v in sample)
+    elif isinstance(obj, (set, frozenset)):
+        sample = list(islice(obj, SIZE_SAMPLE))
+        items = sum(_estimate_size(v, seen) for v in sample)
+    else:
+        return size
+    return size + (items * len(obj) // len(sample) if sample else 0)
+
+class MemoryTier:
+    """
+    Bounded in-process LRU tier.
+
+    Entries are evicted when they expire or, once the byte budget is
+    exceeded, expired entries go first and then the least recently used.
+    Sizes are those of the decoded values (see estimate_size), not of their
+    compressed payloads. Values are returned as stored, so callers must
+    treat them as read-only.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Return (True, value) on a live hit, else (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            value, expires_at, size = entry
+            if time.time() > expires_at:
+                self._remove(key)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key: str, value: Any, expires_at: float, size: int) -> None:
+        if size > self.budget_bytes:
+            self.delete(key)
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self.size_bytes += size
+            if self.size_bytes > self.budget_bytes:
+                self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[2]
+
+    def _evict(self) -> None:
+        now = time.time()
+        for key in [k for k, (_, expires_at, _) in self._entries.items() if now > expires_at]:
+            self._remove(key)
+        while self.size_bytes > self.budget_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+
+    def get_info(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+class FileBackend:
+    """
+    One file per key, sharded into subdirectories of the cache directory.
+
+    Filenames are a hash of the key, so any key (``BRK/B``, ``^GSPC``) is a
+    safe path and no directory grows past a few thousand entries. Each file
+    holds a one-line JSON header with the key and expiry metadata followed
+    by the serialized payload. ``max_disk_bytes`` bounds the directory:
+    expired files are purged first, then the least recently written ones.
+    """
+
+    name = "file"
+    suffix = ".entry"
+
+    def __init__(self, cache_dir: Path, max_disk_bytes: Optional[int] = None,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_disk_bytes = max_disk_bytes
+        self.on_evict = on_evict
+        self._disk_bytes = None
+        self._disk_files = None
+        self._disk_lock = threading.Lock()
 
-class CacheManager:
-    """Simple JSON-based cache manager"""
-    
-    def __init__(self, cache_dir: Optional[Path] = None):
-        self.cache_dir = cache_dir or (PROJECT_ROOT / "cache")
-        self.cache_dir.mkdir(exist_ok=True)
-    
     def _get_cache_path(self, key: str) -> Path:
-        """Get cache file path for a key"""
-        return self.cache_dir / f"{key}.json"
-    
-    def get(self, key: str, default: Any = None) -> Any:
-        """Get value from cache"""
-        cache_path = self._get_cache_path(key)
-        
-        if not cache_path.exists():
-            return default
-        
+        """Get cache file path for a key: <cache_dir>/<first two hex chars>/<sha256>.entry"""
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}{self.suffix}"
+
+    @staticmethod
+    def _read_header(f) -> dict:
+        return json.loads(f.readline())
+
+    def _header(self, path: Path) -> Optional[dict]:
         try:
-            with open(cache_path, 'r') as f:
-                data = json.load(f)
-                
-            # Check if expired
-            if 'expires_at' in data and time.time() > data['expires_at']:
-                cache_path.unlink()  # Delete expired cache
-                return default
-                
-            return data.get('value', default)
+            with open(path, 'rb') as f:
+                return self._read_header(f)
         except Exception:
-            return default
-    
-    def set(self, key: str, value: Any, ttl: int = 3600) -> None:
-        """Set value in cache with TTL in seconds"""
-        cache_path = self._get_cache_path(key)
-        
-        data = {
-            'value': value,
-            'expires_at': time.time() + ttl,
-            'created_at': time.time()
-        }
-        
+            return None
+
+    def _cache_files(self) -> Iterable[Path]:
+        return self.cache_dir.glob(f"??/*{self.suffix}")
+
+    def read(self, key: str) -> Optional[Entry]:
         try:
-            with open(cache_path, 'w') as f:
-                json.dump(data, f)
-        except Exception as e:
-            print(f"Error saving cache for {key}: {e}")
-    
+            with open(self._get_cache_path(key), 'rb') as f:
+                header = self._read_header(f)
+                payload = f.read()
+            if header.get('key') != key:
+                return None
+            return payload, header['expires_at'], header['created_at']
+        except Exception:
+            return None
+
+    def read_many(self, keys: Iterable[str]) -> Dict[str, Entry]:
+        found = {}
+        for key in keys:
+            entry = self.read(key)
+            if entry is not None:
+                found[key] = entry
+        return found
+
+    def write(self, key: str, payload: bytes, expires_at: float, created_at: float) -> None:
+        cache_path = self._get_cache_path(key)
+        header = json.dumps({'key': key, 'expires_at': expires_at, 'created_at': created_at}).encode() + b"\n"
+        cache_path.parent.mkdir(exist_ok=True)
+        old_size = cache_path.stat().st_size if cache_path.exists() else None
+        # Write then rename so readers never see a partial file
+        tmp_path = cache_path.with_name(f".{cache_path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(payload)
+        os.replace(tmp_path, cache_path)
+        self._track_disk(len(header) + len(payload) - (old_size or 0), 0 if old_size is not None else 1)
+
+    def write_many(self, entries: Dict[str, Entry]) -> None:
+        for key, (payload, expires_at, created_at) in entries.items():
+            self.write(key, payload, expires_at, created_at)
+
     def delete(self, key: str) -> bool:
-        """Delete cache entry"""
         cache_path = self._get_cache_path(key)
         try:
             if cache_path.exists():
+                size = cache_path.stat().st_size
                 cache_path.unlink()
+                self._track_disk(-size, -1)
                 return True
         except Exception:
             pass
         return False
-    
+
     def clear(self) -> None:
-        """Clear all cache files"""
         try:
+            for cache_file in self._cache_files():
+                cache_file.unlink()
+            # Flat <key>.json files written before keys were hashed
             for cache_file in self.cache_dir.glob("*.json"):
                 cache_file.unlink()
         except Exception as e:
             print(f"Error clearing cache: {e}")
-    
+        with self._disk_lock:
+            self._disk_bytes, self._disk_files = 0, 0
+
+    @staticmethod
+    def _is_expired(header: Optional[dict], now: float) -> bool:
+        return header is None or now > header.get('expires_at', float('inf'))
+
+    def purge_expired(self) -> list:
+        """Delete expired files; returns their keys"""
+        now = time.time()
+        purged = []
+        with self._disk_lock:
+            for path, st in self._scan_disk():
+                header = self._header(path)
+                if self._is_expired(header, now):
+                    try:
+                        path.unlink()
+                        self._disk_bytes -= st.st_size
+                        self._disk_files -= 1
+                        if header:
+                            purged.append(header.get('key'))
+                    except OSError:
+                        continue
+        return purged
+
+    def _scan_disk(self) -> list:
+        """Stat every cache file and reset the disk usage counters"""
+        entries = []
+        for cache_file in self._cache_files():
+            try:
+                entries.append((cache_file, cache_file.stat()))
+            except OSError:
+                continue
+        self._disk_bytes = sum(st.st_size for _, st in entries)
+        self._disk_files = len(entries)
+        return entries
+
+    def _track_disk(self, delta_bytes: int, delta_files: int) -> None:
+        """Update disk usage counters and evict when over max_disk_bytes"""
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._scan_disk()
+            else:
+                self._disk_bytes += delta_bytes
+                self._disk_files += delta_files
+            if self.max_disk_bytes and self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Shrink the directory to 90% of its budget: expired files first, then oldest"""
+        entries = self._scan_disk()
+        target = self.max_disk_bytes * 0.9
+        now = time.time()
+
+        headers = {p: self._header(p) for p, _ in entries}
+        doomed = [(p, st) for p, st in entries if self._is_expired(headers[p], now)]
+        doomed_paths = {p for p, _ in doomed}
+        oldest_first = sorted((e for e in entries if e[0] not in doomed_paths), key=lambda e: e[1].st_mtime)
+        for path, st in doomed + oldest_first:
+            if path not in doomed_paths and self._disk_bytes <= target:
+                break
+            try:
+                path.unlink()
+                self._disk_bytes -= st.st_size
+                self._disk_files -= 1
+                if self.on_evict and headers[path]:
+                    self.on_evict(headers[path].get('key'))
+            except OSError:
+                continue
+
     def get_info(self) -> dict:
-        """Get cache information"""
-        cache_files = list(self.cache_dir.glob("*.json"))
-        total_size = sum(f.stat().st_size for f in cache_files)
-        
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._scan_disk()
+            total_size = self._disk_bytes
+            file_count = self._disk_files
         return {
             "cache_dir": str(self.cache_dir),
-            "file_count": len(cache_files),
+            "file_count": file_count,
             "total_size_bytes": total_size,
-            "total_size_mb": round(total_size / (1024 * 1024), 2)
+            "total_size_mb": round(total_size / (1024 * 1024), 2),
+            "max_disk_bytes": self.max_disk_bytes,
         }
 
+class SQLiteBackend(SQLiteStore):
+    """
+    Single SQLite database (WAL mode) shared by every worker on the node.
+
+    Writes are atomic upserts, ``expires_at`` is indexed so expired rows are
+    purged in bulk, and ``get_many``/``set_many`` hit the database once per
+    batch. ``max_disk_bytes`` bounds the total payload size: expired rows go
+    first, then the oldest.
+    """
+
+    name = "sqlite"
+    schema = """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            key TEXT PRIMARY KEY,
+            payload BLOB NOT NULL,
+            expires_at REAL NOT NULL,
+            created_at REAL NOT NULL,
+            size INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache_entries (expires_at);
+        CREATE INDEX IF NOT EXISTS idx_cache_created_at ON cache_entries (created_at);
+    """
+    BATCH_SIZE = 500           # Keys per IN (...) query, below SQLite's variable limit
+    BUDGET_CHECK_EVERY = 100   # Writes between size-budget checks
+
+    def __init__(self, db_path: Path, max_disk_bytes: Optional[int] = None,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        super().__init__(db_path)
+        self.max_disk_bytes = max_disk_bytes
+        self.on_evict = on_evict
+        self._writes = 0
+
+    def read(self, key: str) -> Optional[Entry]:
+        row = self.conn.execute(
+            "SELECT payload, expires_at, created_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        return (bytes(row["payload"]), row["expires_at"], row["created_at"]) if row else None
+
+    def read_many(self, keys: Iterable[str]) -> Dict[str, Entry]:
+        keys = list(keys)
+        found = {}
+        for i in range(0, len(keys), self.BATCH_SIZE):
+            batch = keys[i:i + self.BATCH_SIZE]
+            rows = self.conn.execute(
+                f"SELECT key, payload, expires_at, created_at FROM cache_entries "
+                f"WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            for row in rows:
+                found[row["key"]] = (bytes(row["payload"]), row["expires_at"], row["created_at"])
+        return found
+
+    def write(self, key: str, payload: bytes, expires_at: float, created_at: float) -> None:
+        self.write_many({key: (payload, expires_at, created_at)})
+
+    def write_many(self, entries: Dict[str, Entry]) -> None:
+        with self.transaction() as conn:
+            conn.executemany(
+                """INSERT INTO cache_entries (key, payload, expires_at, created_at, size)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (key) DO UPDATE SET
+                       payload = excluded.payload, expires_at = excluded.expires_at,
+                       created_at = excluded.created_at, size = excluded.size""",
+                [(k, payload, exp, created, len(payload)) for k, (payload, exp, created) in entries.items()]
+            )
+        self._writes += len(entries)
+        if self.max_disk_bytes and self._writes >= self.BUDGET_CHECK_EVERY:
+            self._writes = 0
+            self._enforce_budget()
+
+    def delete(self, key: str) -> bool:
+        with self.transaction() as conn:
+            return conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,)).rowcount > 0
+
+    def clear(self) -> None:
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM cache_entries")
+
+    def purge_expired(self) -> list:
+        """Delete expired rows in one indexed sweep; returns their keys"""
+        with self.transaction() as conn:
+            now = time.time()
+            keys = [r["key"] for r in conn.execute("SELECT key FROM cache_entries WHERE expires_at < ?", (now,))]
+            conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+        return keys
+
+    def _enforce_budget(self) -> None:
+        """Shrink the table to 90% of its budget: expired rows first, then oldest"""
+        evicted = self.purge_expired()
+        with self.transaction() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+            target = self.max_disk_bytes * 0.9
+            rows = conn.execute("SELECT key, size FROM cache_entries ORDER BY created_at").fetchall() \
+                if total > self.max_disk_bytes else []
+            for row in rows:
+                if total <= target:
+                    break
+                conn.execute("DELETE FROM cache_entries WHERE key = ?", (row["key"],))
+                total -= row["size"]
+                evicted.append(row["key"])
+        if self.on_evict:
+            for key in evicted:
+                self.on_evict(key)
+
+    def get_info(self) -> dict:
+        row = self.conn.execute(
+            "SELECT COUNT(*) AS n, COALESCE(SUM(size), 0) AS total FROM cache_entries"
+        ).fetchone()
+        return {
+            "db_path": str(self.db_path),
+            "file_count": row["n"],
+            "total_size_bytes": row["total"],
+            "total_size_mb": round(row["total"] / (1024 * 1024), 2),
+            "max_disk_bytes": self.max_disk_bytes,
+        }
+
+class CacheManager:
+    """
+    Simple caching manager with pluggable storage.
+
+    ``backend`` is ``"file"`` (one hashed file per key) or ``"sqlite"`` (one
+    WAL-mode database shared safely by every worker process). Keys are
+    namespaced as ``"<namespace>:<rest>"`` and ``codecs`` picks the encoding
+    per namespace (``"json"``, ``"pickle"``, ``"msgpack"``, optionally with
+    ``"+zstd"``), falling back to ``default_codec``. An optional
+    in-process LRU tier (``memory_budget_bytes``) sits in front of either so
+    hot keys are served without touching the disk. The memory tier is per
+    process, so a value another worker overwrites may be served until it
+    expires locally.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, backend: str = "file",
+                 memory_budget_bytes: int = 0, max_disk_bytes: Optional[int] = None,
+                 codecs: Optional[Dict[str, str]] = None, default_codec: str = "json"):
+        self.cache_dir = cache_dir or (PROJECT_ROOT / "cache")
+        self.cache_dir.mkdir(exist_ok=True)
+        self.codecs = dict(codecs or {})
+        self.default_codec = default_codec
+        for codec in [default_codec, *self.codecs.values()]:
+            cache_codecs.resolve_codec(codec)  # Fail fast on typos
+        self.memory = MemoryTier(memory_budget_bytes) if memory_budget_bytes else None
+        on_evict = self.memory.delete if self.memory else None
+        if backend == "sqlite":
+            self.backend = SQLiteBackend(self.cache_dir / "cache.db", max_disk_bytes, on_evict)
+        elif backend == "file":
+            self.backend = FileBackend(self.cache_dir, max_disk_bytes, on_evict)
+        else:
+            raise ValueError(f"Unknown cache backend: {backend}")
+
+    def codec_for(self, key: str) -> str:
+        """Codec used for a key, based on its namespace prefix"""
+        namespace, sep, _ = key.partition(":")
+        return self.codecs.get(namespace, self.default_codec) if sep else self.default_codec
+
+    def _encode(self, key: str, value: Any) -> bytes:
+        return cache_codecs.encode(value, self.codec_for(key))
+
+    @staticmethod
+    def _decode(payload: bytes) -> Any:
+        return cache_codecs.decode(payload)
+
+    def _load(self, key: str, entry: Optional[Entry], now: float):
+        """Decode a stored entry; returns (True, value) unless missing, expired or corrupt"""
+        if entry is None:
+            return False, None
+        payload, expires_at, _ = entry
+        if now > expires_at:
+            self.delete(key)  # Delete expired cache
+            return False, None
+        try:
+            value = self._decode(payload)
+        except Exception:
+            return False, None
+        if self.memory:
+            self.memory.set(key, value, expires_at, estimate_size(value))
+        return True, value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get value from cache"""
+        if self.memory:
+            hit, value = self.memory.get(key)
+            if hit:
+                return value
+        try:
+            found, value = self._load(key, self.backend.read(key), time.time())
+        except Exception:
+            return default
+        return value if found else default
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values at once; missing or expired keys are left out"""
+        result, pending = {}, []
+        for key in keys:
+            hit, value = self.memory.get(key) if self.memory else (False, None)
+            if hit:
+                result[key] = value
+            else:
+                pending.append(key)
+        if not pending:
+            return result
+        try:
+            entries = self.backend.read_many(pending)
+        except Exception as e:
+            print(f"Error reading cache batch: {e}")
+            return result
+        now = time.time()
+        for key, entry in entries.items():
+            found, value = self._load(key, entry, now)
+            if found:
+                result[key] = value
+        return result
+
+    def set(self, key: str, value: Any, ttl: int = 3600) -> None:
+        """Set value in cache with TTL in seconds"""
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Dict[str, Any], ttl: int = 3600) -> None:
+        """Set several values with the same TTL in one backend write"""
+        now = time.time()
+        entries = {}
+        for key, value in items.items():
+            try:
+                entries[key] = (self._encode(key, value), now + ttl, now)
+            except Exception as e:
+                print(f"Error saving cache for {key}: {e}")
+        try:
+            self.backend.write_many(entries)
+        except Exception as e:
+            print(f"Error saving cache for {', '.join(entries)}: {e}")
+            return
+        if self.memory:
+            for key, value in items.items():
+                if key in entries:
+                    self.memory.set(key, value, now + ttl, estimate_size(value))
+
+    def delete(self, key: str) -> bool:
+        """Delete cache entry"""
+        if self.memory:
+            self.memory.delete(key)
+        try:
+            return self.backend.delete(key)
+        except Exception:
+            return False
+
+    def purge_expired(self) -> int:
+        """Remove every expired entry from storage; returns how many were removed"""
+        try:
+            purged = self.backend.purge_expired()
+        except Exception as e:
+            print(f"Error purging cache: {e}")
+            return 0
+        if self.memory:
+            for key in purged:
+                self.memory.delete(key)
+        return len(purged)
+
+    def clear(self) -> None:
+        """Clear all cache entries"""
+        if self.memory:
+            self.memory.clear()
+        try:
+            self.backend.clear()
+        except Exception as e:
+            print(f"Error clearing cache: {e}")
+
+    def get_info(self) -> dict:
+        """Get cache information"""
+        info = {"backend": self.backend.name, "cache_dir": str(self.cache_dir)}
+        try:
+            info.update(self.backend.get_info())
+        except Exception as e:
+            info["error"] = str(e)
+        if self.memory:
+            info["memory"] = self.memory.get_info()
+        return info
+
 # Global cache instance
-cache = CacheManager()
+cache = CacheManager(backend=CACHE_BACKEND, memory_budget_bytes=CACHE_MEMORY_BUDGET_BYTES,
+                     max_disk_bytes=CACHE_MAX_DISK_BYTES, codecs=CACHE_CODECS)
@@ -0,0 +1,110 @@
+"""
+Stale-while-revalidate caching for Investo's upstream fetchers
+"""
+
+import copy
+import functools
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional
+from config.settings import CACHE_POLICIES, CACHE_LAST_GOOD_SECONDS, CACHE_REFRESH_WORKERS
+from utils.cache_manager import CacheManager, cache as default_cache
+from utils.single_flight import SingleFlight
+
+_refresh_executor = ThreadPoolExecutor(max_workers=CACHE_REFRESH_WORKERS, thread_name_prefix="investo-refresh")
+_flights = SingleFlight()
+
+def cached(namespace: str, ignore: Iterable[str] = ("ctx",), is_valid: Optional[Callable[[Any], bool]] = None,
+           cache: Optional[CacheManager] = None):
+    """
+    Cache a fetcher's results under ``"<namespace>:<args>"``.
+
+    Freshness comes from ``CACHE_POLICIES[namespace]`` as (fresh, stale)
+    seconds. Fresh values are returned as is. Stale values are returned
+    immediately while one background refresh replaces them. Anything older is
+    fetched synchronously. A result that raises or fails ``is_valid`` never
+    overwrites a cached value; the last good value (kept for
+    ``CACHE_LAST_GOOD_SECONDS``) is served instead when there is one.
+
+    Arguments named in ``ignore`` (request-scoped helpers like ``ctx``) are
+    left out of the key and dropped on background refreshes. Dicts and lists
+    are returned as shallow copies so callers can annotate them freely.
+    """
+    fresh_ttl, stale_ttl = CACHE_POLICIES[namespace]
+    ignore = frozenset(ignore)
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        def cache_key(*args, **kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            parts = [str(value) for name, value in bound.arguments.items() if name not in ignore]
+            return ":".join([namespace, *parts])
+
+        def store() -> CacheManager:
+            return cache or default_cache
+
+        def fetch(key, args, kwargs, fallback):
+            """Call fn once per key; store valid results, else fall back to the last good value"""
+            try:
+                value = _flights.do(key, fn, *args, **kwargs)
+            except Exception as e:
+                if fallback is None:
+                    raise
+                print(f"Serving last good {key} after error: {e}")
+                return fallback["value"]
+            if is_valid is None or is_valid(value):
+                store().set(key, {"value": value, "fetched_at": time.time()},
+                            ttl=fresh_ttl + stale_ttl + CACHE_LAST_GOOD_SECONDS)
+                return value
+            if fallback is not None:
+                print(f"Serving last good {key}; upstream returned no usable data")
+                return fallback["value"]
+            return value
+
+        def refresh(key, args, kwargs, fallback):
+            if _flights.in_flight(key):
+                return
+            # Drop request-scoped arguments so the refresh does not reuse stale resources
+            bound = signature.bind(*args, **kwargs)
+            for name in ignore & bound.arguments.keys():
+                del bound.arguments[name]
+
+            def run():
+                try:
+                    fetch(key, bound.args, bound.kwargs, fallback)
+                except Exception as e:
+                    print(f"Background refresh of {key} failed: {e}")
+            _refresh_executor.submit(run)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = cache_key(*args, **kwargs)
+            entry = store().get(key)
+            if entry is None:
+                return _copy(fetch(key, args, kwargs, None))
+
+            age = time.time() - entry["fetched_at"]
+            if age < fresh_ttl:
+                return _copy(entry["value"])
+            if age < fresh_ttl + stale_ttl:
+                refresh(key, args, kwargs, entry)
+                return _copy(entry["value"])
+            return _copy(fetch(key, args, kwargs, entry))
+
+        def fetched_at(*args, **kwargs) -> Optional[float]:
+            """When the cached value for these arguments was fetched, or None if nothing is cached"""
+            entry = store().get(cache_key(*args, **kwargs))
+            return entry["fetched_at"] if entry else None
+
+        wrapper.cache_key = cache_key
+        wrapper.fetched_at = fetched_at
+        wrapper.uncached = fn
+        return wrapper
+
+    return decorator
+
+def _copy(value):
+    return copy.copy(value) if isinstance(value, (dict, list)) else value
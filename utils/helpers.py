@@ -2,11 +2,11 @@
 Ticker validation and cleaning utilities
 """
 
-import re
+from utils.ticker_matcher import TICKER_SHAPE, NON_TICKERS
 
 def is_valid_ticker(ticker: str) -> bool:
-    """Check if a ticker symbol is valid"""
-    return bool(re.fullmatch(r"[A-Z]{1,5}", ticker)) and ticker not in {"CEO", "ETF", "US", "I"}
+    """Check if a ticker symbol is valid (1-5 letters, optional share class like BRK.B)"""
+    return bool(TICKER_SHAPE.fullmatch(ticker)) and ticker not in NON_TICKERS
 
 def clean_tickers(tickers):
     """Filter list of tickers to only include valid ones"""
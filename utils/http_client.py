@@ -0,0 +1,91 @@
+"""
+Shared HTTP client for Investo
+"""
+
+import os
+import threading
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config.settings import HTTP_TIMEOUT, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_RETRIES, HTTP_BACKOFF
+
+class HttpClient:
+    """Pooled, keep-alive HTTP client shared by all upstream callers"""
+
+    def __init__(self, retries: int = HTTP_RETRIES, backoff: float = HTTP_BACKOFF,
+                 pool_connections: int = HTTP_POOL_CONNECTIONS, pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                 timeout: float = HTTP_TIMEOUT):
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self._api_keys = {}
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+
+    def _build_session(self) -> requests.Session:
+        """Create a session whose adapter keeps one connection pool per host"""
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"User-Agent": "Investo/1.0"})
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        """Process-wide session; rebuilt after a fork so workers never share sockets"""
+        with self._lock:
+            if self._session is None or self._session_pid != os.getpid():
+                self._session = self._build_session()
+                self._session_pid = os.getpid()
+            return self._session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the pooled session with the default timeout"""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def set_api_key(self, service: str, key) -> None:
+        """Register the API key, or a pool of keys, used for an upstream service"""
+        keys = [key] if isinstance(key, str) else list(key or [])
+        self._api_keys[service] = [k for k in keys if k]
+
+    def get_api_key(self, service: str) -> Optional[str]:
+        """Get the first API key registered for an upstream service"""
+        keys = self._api_keys.get(service)
+        return keys[0] if keys else None
+
+    def get_api_keys(self, service: str) -> list:
+        """Get the whole key pool registered for an upstream service"""
+        return list(self._api_keys.get(service) or [])
+
+    def close(self) -> None:
+        """Close pooled connections"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+# Global HTTP client instance
+http_client = HttpClient()
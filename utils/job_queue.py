@@ -0,0 +1,113 @@
+"""
+Background job queue for Investo
+"""
+
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+from config.settings import PROJECT_ROOT, JOB_WORKERS, JOB_STALE_SECONDS, JOB_RETENTION_SECONDS
+from utils.sqlite_store import SQLiteStore
+
+ACTIVE_STATUSES = ("queued", "running")
+
+class JobQueue(SQLiteStore):
+    """
+    Runs jobs on a background thread pool and records their progress.
+
+    Job state lives in SQLite so any gunicorn worker can answer a status
+    poll, while the work itself runs in the worker that accepted the job.
+    Submitting a job for a key that already has an active job returns the
+    existing job instead of queueing a duplicate.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            job_key TEXT NOT NULL,
+            status TEXT NOT NULL,
+            stage TEXT,
+            progress INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_key ON jobs (kind, job_key, status);
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, max_workers: int = JOB_WORKERS):
+        super().__init__(db_path or (PROJECT_ROOT / "cache" / "jobs.db"))
+        self.max_workers = max_workers
+        self._executor = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="investo-job")
+        return self._executor
+
+    def submit(self, kind: str, job_key: str, fn: Callable, *args, **kwargs) -> dict:
+        """
+        Queue fn(*args, progress=callback, **kwargs) and return the job record.
+        fn's return value is stored as the job result.
+        """
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM jobs WHERE updated_at < ? AND status NOT IN ('queued', 'running')",
+                         (now - JOB_RETENTION_SECONDS,))
+            existing = conn.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND job_key = ? AND status IN ('queued', 'running') AND updated_at >= ?",
+                (kind, job_key, now - JOB_STALE_SECONDS)
+            ).fetchone()
+            if existing:
+                job_id = existing["id"]
+            else:
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, job_key, status, stage, created_at, updated_at) VALUES (?, ?, ?, 'queued', 'queued', ?, ?)",
+                    (job_id, kind, job_key, now, now)
+                )
+        if not existing:
+            self.executor.submit(self._run, job_id, fn, args, kwargs)
+        return self.get(job_id)
+
+    def _update(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self.transaction() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def _run(self, job_id: str, fn: Callable, args, kwargs) -> None:
+        def progress(stage: str, percent: int) -> None:
+            self._update(job_id, stage=stage, progress=percent)
+
+        self._update(job_id, status="running", stage="starting")
+        try:
+            result = fn(*args, progress=progress, **kwargs)
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            traceback.print_exc()
+            self._update(job_id, status="failed", stage="failed", error=str(e))
+            return
+        if result is None:
+            self._update(job_id, status="failed", stage="failed", error="No result produced")
+        else:
+            self._update(job_id, status="done", stage="done", progress=100, result=str(result))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Current state of a job, or None if unknown"""
+        row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        # A worker that died mid-job never reports back
+        if job["status"] in ACTIVE_STATUSES and time.time() - job["updated_at"] > JOB_STALE_SECONDS:
+            job["status"], job["error"] = "failed", "Job stopped reporting progress"
+        return job
+
+# Global job queue instance
+job_queue = JobQueue()
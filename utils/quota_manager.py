@@ -0,0 +1,202 @@
+"""
+Upstream quota manager for Investo
+"""
+
+import hashlib
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+from config.settings import PROJECT_ROOT, QUOTA_LIMITS, QUOTA_MAX_WAIT
+from utils.sqlite_store import SQLiteStore
+
+class QuotaExceeded(Exception):
+    """Raised when no token became available within the allowed wait"""
+
+class QuotaManager(SQLiteStore):
+    """
+    Token buckets per upstream and per API key, shared by every worker process.
+
+    Bucket state lives in a local SQLite database, so all gunicorn workers on a
+    node draw from the same budget. ``acquire`` queues briefly for a token and
+    rotates across a pool of keys, preferring the key with the most tokens left.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS buckets (
+            upstream TEXT NOT NULL,
+            key_id TEXT NOT NULL,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            cooldown_until REAL NOT NULL DEFAULT 0,
+            used INTEGER NOT NULL DEFAULT 0,
+            waited INTEGER NOT NULL DEFAULT 0,
+            throttled INTEGER NOT NULL DEFAULT 0,
+            rejected INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (upstream, key_id)
+        );
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, limits: Optional[dict] = None,
+                 max_wait: float = QUOTA_MAX_WAIT):
+        self.limits = dict(limits or QUOTA_LIMITS)
+        self.max_wait = max_wait
+        super().__init__(db_path or (PROJECT_ROOT / "cache" / "quota.db"))
+
+    @staticmethod
+    def key_id(key: Optional[str]) -> str:
+        """Stable identifier for an API key that never stores the secret itself"""
+        if not key:
+            return "default"
+        return hashlib.sha256(key.encode()).hexdigest()[:12]
+
+    def _rate(self, upstream: str):
+        """Return (capacity, refill per second) for an upstream"""
+        requests_allowed, period = self.limits[upstream]
+        return float(requests_allowed), requests_allowed / float(period)
+
+    def _try_take(self, upstream: str, keys: list, cost: float):
+        """
+        Take cost tokens from the fullest bucket among keys in one transaction.
+        A None key (keyless upstreams) draws from the "default" bucket.
+        Returns (True, key, 0) on success or (False, None, seconds until a token is due).
+        """
+        capacity, rate = self._rate(upstream)
+        now = time.time()
+        with self.transaction() as conn:
+            found, best, best_tokens, soonest = False, None, None, None
+            for key in keys:
+                row = conn.execute(
+                    "SELECT tokens, updated_at, cooldown_until FROM buckets WHERE upstream = ? AND key_id = ?",
+                    (upstream, self.key_id(key))
+                ).fetchone()
+                if row is None:
+                    tokens, cooldown_until = capacity, 0.0
+                else:
+                    tokens = min(capacity, row["tokens"] + (now - row["updated_at"]) * rate)
+                    cooldown_until = row["cooldown_until"]
+
+                if now < cooldown_until:
+                    ready_in = cooldown_until - now
+                elif tokens >= cost:
+                    ready_in = 0.0
+                else:
+                    ready_in = (cost - tokens) / rate
+
+                if ready_in == 0.0 and (not found or tokens > best_tokens):
+                    found, best, best_tokens = True, key, tokens
+                soonest = ready_in if soonest is None else min(soonest, ready_in)
+
+            if not found:
+                return False, None, soonest
+
+            conn.execute(
+                """INSERT INTO buckets (upstream, key_id, tokens, updated_at, used)
+                   VALUES (?, ?, ?, ?, 1)
+                   ON CONFLICT (upstream, key_id) DO UPDATE SET
+                       tokens = excluded.tokens, updated_at = excluded.updated_at, used = used + 1""",
+                (upstream, self.key_id(best), best_tokens - cost, now)
+            )
+            return True, best, 0.0
+
+    def _count(self, upstream: str, keys: list, column: str) -> None:
+        now = time.time()
+        capacity, _ = self._rate(upstream)
+        with self.transaction() as conn:
+            for key in keys:
+                conn.execute(
+                    f"""INSERT INTO buckets (upstream, key_id, tokens, updated_at, {column})
+                        VALUES (?, ?, ?, ?, 1)
+                        ON CONFLICT (upstream, key_id) DO UPDATE SET {column} = {column} + 1""",
+                    (upstream, self.key_id(key), capacity, now)
+                )
+
+    def acquire(self, upstream: str, keys: Optional[Iterable[str]] = None, cost: float = 1,
+                max_wait: Optional[float] = None) -> Optional[str]:
+        """
+        Wait for a token from upstream's bucket and return the API key to use.
+
+        With a pool of keys the fullest bucket wins, which rotates requests
+        across keys. Upstreams without a configured limit are never throttled.
+        Raises QuotaExceeded if nothing frees up within max_wait seconds.
+        """
+        keys = list(keys) if keys else [None]
+        if upstream not in self.limits:
+            return keys[0]
+
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        queued = False
+        while True:
+            try:
+                found, key, ready_in = self._try_take(upstream, keys, cost)
+            except Exception as e:
+                # Never let quota bookkeeping take down a request
+                print(f"Quota manager unavailable for {upstream}: {e}")
+                return keys[0]
+            if found:
+                if queued:
+                    self._count(upstream, [key], "waited")
+                return key
+
+            remaining = deadline - time.monotonic()
+            if ready_in > remaining:
+                self._count(upstream, keys, "rejected")
+                raise QuotaExceeded(f"{upstream} quota exhausted; next token in {ready_in:.1f}s")
+            queued = True
+            time.sleep(ready_in)
+
+    def penalize(self, upstream: str, key: Optional[str] = None, retry_after: Optional[float] = None) -> None:
+        """
+        Record an upstream 429: empty the key's bucket and pause it for
+        retry_after seconds (default: the time to refill one token).
+        """
+        if upstream not in self.limits:
+            return
+        capacity, rate = self._rate(upstream)
+        now = time.time()
+        cooldown_until = now + (retry_after if retry_after else 1 / rate)
+        try:
+            with self.transaction() as conn:
+                conn.execute(
+                    """INSERT INTO buckets (upstream, key_id, tokens, updated_at, cooldown_until, throttled)
+                       VALUES (?, ?, 0, ?, ?, 1)
+                       ON CONFLICT (upstream, key_id) DO UPDATE SET
+                           tokens = 0, updated_at = excluded.updated_at,
+                           cooldown_until = excluded.cooldown_until, throttled = throttled + 1""",
+                    (upstream, self.key_id(key), now, cooldown_until)
+                )
+        except Exception as e:
+            print(f"Could not record {upstream} throttling: {e}")
+
+    def get_info(self) -> dict:
+        """Current bucket levels and usage counters per upstream and key"""
+        now = time.time()
+        info = {}
+        try:
+            rows = self.conn.execute("SELECT * FROM buckets ORDER BY upstream, key_id").fetchall()
+        except Exception as e:
+            return {"error": str(e)}
+        for row in rows:
+            if row["upstream"] not in self.limits:
+                continue
+            capacity, rate = self._rate(row["upstream"])
+            info.setdefault(row["upstream"], {})[row["key_id"]] = {
+                "tokens": round(min(capacity, row["tokens"] + (now - row["updated_at"]) * rate), 2),
+                "capacity": capacity,
+                "used": row["used"],
+                "waited": row["waited"],
+                "throttled": row["throttled"],
+                "rejected": row["rejected"],
+                "cooldown_seconds": round(max(0.0, row["cooldown_until"] - now), 1),
+            }
+        return info
+
+def retry_after_seconds(response) -> Optional[float]:
+    """Parse a numeric Retry-After header from a response, if any"""
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+# Global quota manager instance
+quota_manager = QuotaManager()
@@ -0,0 +1,77 @@
+"""
+Request coalescing utilities for Investo
+"""
+
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Hashable
+
+try:
+    import fcntl
+except ImportError:  # Windows: cross-process locking is unavailable
+    fcntl = None
+
+class SingleFlight:
+    """Collapse concurrent calls that share a key into one in-flight execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) unless a call for key is already running, in
+        which case wait for that call and return its result (or raise its error).
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Whether a call for key is currently running in this process"""
+        with self._lock:
+            return key in self._calls
+
+@contextmanager
+def file_lock(path: Path):
+    """
+    Hold an exclusive lock on path across processes.
+    Yields True if another process held the lock and we had to wait for it.
+    """
+    if fcntl is None:
+        yield False
+        return
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as handle:
+        waited = False
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            waited = True
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield waited
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
@@ -0,0 +1,57 @@
+"""
+SQLite helpers shared by Investo's on-disk stores
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+class SQLiteStore:
+    """
+    Base class for small SQLite-backed stores shared by all worker processes.
+
+    Each thread gets its own connection (recreated after a fork), the
+    database runs in WAL mode so readers never block the writer, and
+    ``transaction()`` takes the write lock up front so read-modify-write
+    sequences are atomic across processes.
+    """
+
+    schema = ""
+
+    def __init__(self, db_path: Path, timeout: float = 10.0):
+        self.db_path = Path(db_path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.schema:
+            self.conn.executescript(self.schema)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection owned by the calling thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(str(self.db_path), timeout=self.timeout,
+                                   isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Run a block inside BEGIN IMMEDIATE ... COMMIT"""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
@@ -0,0 +1,115 @@
+"""
+Multi-symbol ticker extraction for Investo
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List, Optional, Set
+from config.settings import SYMBOL_MASTER_PATH
+
+# A ticker: 1-5 letters plus an optional share class (BRK.B)
+TICKER_SHAPE = re.compile(r"[A-Z]{1,5}(?:\.[A-Z])?")
+
+# Upper-case words that are never tickers
+NON_TICKERS = frozenset({"CEO", "ETF", "US", "I"})
+
+# Upper-case words common in posts and headlines that collide with real
+# symbols or are easily mistaken for them. Bare occurrences are ignored;
+# they still match as cashtags ($ALL) or when searched for explicitly.
+FALSE_POSITIVES = NON_TICKERS | frozenset({
+    "A", "AI", "ALL", "AM", "AN", "ANY", "ARE", "AT", "ATH", "BE", "BIG", "BY", "CAN", "CFO", "CPI", "CTO",
+    "DD", "DO", "EDIT", "EPS", "EU", "FD", "FDA", "FED", "FOMO", "FOR", "FUD", "GDP", "GO", "HODL", "IMHO",
+    "IMO", "IN", "IPO", "IS", "IT", "IV", "LOL", "MOON", "NEW", "NOW", "NYSE", "OF", "ON", "ONE", "OP", "OR",
+    "OTM", "ITM", "OUT", "PE", "PM", "PT", "RH", "SEC", "SO", "TA", "THE", "TLDR", "TO", "UK", "UP", "USA",
+    "USD", "WSB", "YOLO", "YOY", "QOQ",
+})
+
+# One pass over the text: optional cashtag, then a ticker-shaped word
+# that is not glued to other letters, digits or a preceding $
+_TOKEN = re.compile(r"(?<![\w$])(\$?)([A-Za-z]{1,5}(?:\.[A-Za-z](?![A-Za-z]))?)(?![\w])")
+
+
+@lru_cache(maxsize=1024)
+def _literal_pattern(ticker: str):
+    """Escaped word-boundary pattern for symbols outside the token grammar (BRK-B, SHOP.TO, 7203.T)"""
+    return re.compile(rf"\b{re.escape(ticker)}\b", re.IGNORECASE)
+
+
+def load_symbols(path: Path) -> Set[str]:
+    """Read a symbol master: whitespace-separated symbols, # comments allowed"""
+    symbols = set()
+    try:
+        with open(path) as f:
+            for line in f:
+                symbols.update(s.upper() for s in line.split("#", 1)[0].split())
+    except OSError as e:
+        print(f"Symbol master not available at {path}: {e}")
+    return symbols
+
+
+class TickerMatcher:
+    """
+    Finds every ticker mentioned in a text with one compiled scan.
+
+    The text is tokenized once and each ticker-shaped token is looked up in
+    a hashed symbol set, so the cost is linear in the text however many
+    symbols are known. Cashtags ($tsla) match in any case and, by default,
+    even outside the symbol master. Bare words must be upper case, in the
+    master and not in FALSE_POSITIVES; single letters (F, T) need a cashtag.
+    Without a master, any ticker-shaped bare word that is not a false
+    positive matches.
+    """
+
+    def __init__(self, symbols: Optional[Iterable[str]] = None,
+                 false_positives: Iterable[str] = FALSE_POSITIVES, unknown_cashtags: bool = True):
+        self.symbols = frozenset(s.upper() for s in symbols) if symbols is not None else None
+        self.false_positives = frozenset(false_positives)
+        self.unknown_cashtags = unknown_cashtags
+
+    @classmethod
+    def from_file(cls, path: Path = SYMBOL_MASTER_PATH, **kwargs) -> "TickerMatcher":
+        symbols = load_symbols(path)
+        return cls(symbols or None, **kwargs)
+
+    def _matches(self, text: str):
+        for cashtag, word in _TOKEN.findall(text or ""):
+            symbol = word.upper()
+            if not TICKER_SHAPE.fullmatch(symbol) or symbol in NON_TICKERS:
+                continue
+            if cashtag:
+                if self.unknown_cashtags or self.symbols is None or symbol in self.symbols:
+                    yield symbol
+            elif (word == symbol and len(symbol) > 1 and symbol not in self.false_positives
+                  and (self.symbols is None or symbol in self.symbols)):
+                yield symbol
+
+    def find(self, text: str) -> Set[str]:
+        """Distinct tickers mentioned in text"""
+        return set(self._matches(text))
+
+    def count(self, text: str) -> Counter:
+        """How often each ticker is mentioned in text"""
+        return Counter(self._matches(text))
+
+    def find_all(self, texts: Iterable[str]) -> List[Set[str]]:
+        """Tag many texts (posts, headlines) at once"""
+        return [self.find(text) for text in texts]
+
+    @staticmethod
+    def contains(text: str, ticker: str) -> bool:
+        """
+        Whether text mentions one explicitly requested ticker, in any case and
+        with or without a cashtag. False positives do not apply: the caller
+        asked for this symbol. Symbols the tokenizer cannot produce (hyphens,
+        exchange suffixes, digits) are matched as a literal whole word.
+        """
+        ticker = ticker.upper()
+        if not TICKER_SHAPE.fullmatch(ticker):
+            return bool(_literal_pattern(ticker).search(text or ""))
+        return any(word.upper() == ticker for _, word in _TOKEN.findall(text or ""))
+
+
+# Global matcher over the symbol master
+ticker_matcher = TickerMatcher.from_file()